@@ -59,8 +59,7 @@ def qubit_integrate(delta, eps0, A, w, gamma1, gamma2, psi0, tlist):
     # --------------------------------------------------------------------------
     # 3) Floquet unitary evolution
     #
-    import qutip.odeconfig
-    qutip.odeconfig.tdfunc = None # better way of reseting this?!?
+    rhs_clear()
     
     start_time = time.time()
        
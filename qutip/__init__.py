@@ -96,6 +96,12 @@ try:
                 elif var == "num_cpus":
                     qutip.settings.num_cpus = int(val)
 
+                elif var == "rhs_cache":
+                    qutip.settings.rhs_cache = True if val == "True" else False
+
+                elif var == "rhs_cache_dir":
+                    qutip.settings.rhs_cache_dir = val
+
 except Exception as e:
     pass
 
@@ -217,7 +223,7 @@ from qutip.partial_transpose import partial_transpose
 import qutip.odeconfig
 from qutip.odeoptions import Odeoptions
 from qutip.odedata import Odedata
-from qutip.rhs_generate import rhs_generate,rhs_clear
+from qutip.rhs_generate import rhs_generate,rhs_clear,rhs_cache_clear
 from qutip.mesolve import mesolve, odesolve
 from qutip.mcsolve import mcsolve
 from qutip.essolve import *
@@ -18,7 +18,10 @@
 ###########################################################################
 
 import numpy as np
+import scipy.sparse as sp
 import scipy.integrate
+import scipy.linalg as la
+from scipy.sparse.csgraph import connected_components
 
 from qutip.qobj import Qobj
 from qutip.superoperator import *
@@ -34,7 +37,7 @@ from qutip.odedata import Odedata
 #
 #
 def brmesolve(H, psi0, tlist, c_ops, e_ops=[], spectra_cb=[],
-              args={}, options=Odeoptions()):
+              args={}, options=Odeoptions(), use_blocks=False, eigen=None):
     """
     Solve the dynamics for the system using the Bloch-Redfeild master equation.
 
@@ -68,6 +71,16 @@ def brmesolve(H, psi0, tlist, c_ops, e_ops=[], spectra_cb=[],
     options : :class:`qutip.Qdeoptions`
         Options for the ODE solver.
 
+    use_blocks : bool
+        Propagate the decoupled blocks of the tensor exactly instead of
+        using the ODE solver, see :func:`bloch_redfield_solve`.
+
+    eigen : tuple
+        Eigen-decomposition of `H` and `c_ops` from
+        :func:`bloch_redfield_tensor` with ``return_eigen=True``, which is
+        reused instead of diagonalizing `H` again, e.g. in a sweep over the
+        noise spectra.
+
     Returns
     -------
 
@@ -82,12 +95,13 @@ def brmesolve(H, psi0, tlist, c_ops, e_ops=[], spectra_cb=[],
             # add white noise callbacks if absent
             spectra_cb.append(lambda w: 1.0)
 
-    R, ekets = bloch_redfield_tensor(H, c_ops, spectra_cb)
+    R, ekets = bloch_redfield_tensor(H, c_ops, spectra_cb, eigen=eigen)
 
     output = Odedata()
     output.times = tlist
 
-    results = bloch_redfield_solve(R, ekets, psi0, tlist, e_ops, options)
+    results = bloch_redfield_solve(R, ekets, psi0, tlist, e_ops, options,
+                                   use_blocks)
 
     if len(e_ops):
         output.expect = results
@@ -101,7 +115,8 @@ def brmesolve(H, psi0, tlist, c_ops, e_ops=[], spectra_cb=[],
 # Evolution of the Bloch-Redfield master equation given the Bloch-Redfield
 # tensor.
 #
-def bloch_redfield_solve(R, ekets, rho0, tlist, e_ops=[], options=None):
+def bloch_redfield_solve(R, ekets, rho0, tlist, e_ops=[], options=None,
+                         use_blocks=False):
     """
     Evolve the ODEs defined by Bloch-Redfield master equation. The
     Bloch-Redfield tensor can be calculated by the function
@@ -128,6 +143,12 @@ def bloch_redfield_solve(R, ekets, rho0, tlist, e_ops=[], options=None):
     options : :class:`qutip.Qdeoptions`
         Options for the ODE solver.
 
+    use_blocks : bool
+        Step through the equally spaced `tlist` with the exact propagator
+        of R instead of the ODE solver. The propagator is computed block by
+        block, for the groups of density-matrix elements that R couples,
+        which is efficient for a secular tensor.
+
     Returns
     -------
 
@@ -178,10 +199,28 @@ def bloch_redfield_solve(R, ekets, rho0, tlist, e_ops=[], options=None):
         for n in arange(len(e_ops)):
             e_ops[n] = e_ops[n].transform(ekets, False)
 
+    initial_vector = mat2vec(rho0.full())
+
+    if use_blocks:
+        #
+        # step with the exact block-diagonal propagator
+        #
+        P = _br_block_propagator(R, dt)
+        rho = Qobj(rho0)
+        y = initial_vector.ravel()
+        for t_idx, t in enumerate(tlist):
+            rho.data = vec2mat(y)
+            if n_e_ops == 0:
+                result_list.append(Qobj(rho))
+            else:
+                for m in range(0, n_e_ops):
+                    result_list[m][t_idx] = expect(e_ops[m], rho)
+            y = P * y
+        return result_list
+
     #
     # setup integrator
     #
-    initial_vector = mat2vec(rho0.full())
     r = scipy.integrate.ode(cyq_ode_rhs)
     r.set_f_params(R.data.data, R.data.indices, R.data.indptr)
     r.set_integrator('zvode', method=options.method, order=options.order,
@@ -220,7 +259,8 @@ def bloch_redfield_solve(R, ekets, rho0, tlist, e_ops=[], options=None):
 # Functions for calculting the Bloch-Redfield tensor for a time-independent
 # system.
 #
-def bloch_redfield_tensor(H, c_ops, spectra_cb, use_secular=True):
+def bloch_redfield_tensor(H, c_ops, spectra_cb, use_secular=True, eigen=None,
+                          return_eigen=False):
     """
     Calculate the Bloch-Redfield tensor for a system given a set of operators
     and corresponding spectral functions that describes the system's coupling
@@ -243,66 +283,150 @@ def bloch_redfield_tensor(H, c_ops, spectra_cb, use_secular=True):
         Flag (True of False) that indicates if the secular approximation should
         be used.
 
+    eigen : tuple
+        Eigen-decomposition ``(evals, ekets, A)`` returned by an earlier call
+        with ``return_eigen=True`` for the same `H` and `c_ops`. When given,
+        `H` is not diagonalized again and `c_ops` are not transformed, so
+        only the noise spectra are evaluated.
+
+    return_eigen : bool
+        Also return the eigen-decomposition data, for reuse with `eigen`.
+
     Returns
     -------
 
     R, kets: :class:`qutip.qobj`, list of :class:`qutip.qobj`
 
         R is the Bloch-Redfield tensor and kets is a list eigenstates of the
-        Hamiltonian.
+        Hamiltonian. If `return_eigen` is True, the tuple
+        ``(evals, ekets, A)`` is returned as a third value.
+
+    Notes
+    -----
+    With the secular approximation the tensor only couples density-matrix
+    elements with (nearly) equal transition frequencies, so that it splits
+    into small blocks that :func:`bloch_redfield_solve` can propagate
+    separately with ``use_blocks=True``.
 
     """
 
     # Sanity checks for input parameters
     if not isinstance(H, Qobj):
-        raise "H must be a quantum object"
-
-    # use the eigenbasis
-    evals, ekets = H.eigenstates()
+        raise TypeError("H must be a quantum object")
+
+    if eigen is None:
+        # use the eigenbasis
+        evals, ekets = H.eigenstates()
+        N = len(evals)
+        A = np.zeros((len(c_ops), N, N), dtype=complex)
+        for k in range(len(c_ops)):
+            #A[k,n,m] = c_ops[k].matrix_element(ekets[n], ekets[m])
+            A[k, :, :] = c_ops[k].transform(ekets).full()
+    else:
+        evals, ekets, A = eigen
 
     N = len(evals)
-    K = len(c_ops)
-    A = np.zeros((K, N, N), dtype=complex)  # TODO: use sparse here
-    W = np.zeros((N, N))
+    K = len(A)
+    if len(spectra_cb) != K:
+        raise ValueError("Number of spectra and operators must agree")
+    S = np.zeros((K, N, N), dtype=complex)
 
     # pre-calculate matrix elements
-    for n in range(N):
-        for m in range(N):
-            W[m, n] = np.real(evals[m] - evals[n])
+    W = np.real(evals[:, np.newaxis] - evals[np.newaxis, :])
 
+    # evaluate each noise spectrum once per distinct frequency in W
+    w_unique, w_inv = np.unique(W, return_inverse=True)
     for k in range(K):
-        #A[k,n,m] = c_ops[k].matrix_element(ekets[n], ekets[m])
-        A[k, :, :] = c_ops[k].transform(ekets).full()
+        S_k = np.array([spectra_cb[k](w) for w in w_unique])
+        S[k] = S_k[w_inv].reshape(N, N)
 
     dw_min = abs(W[W.nonzero()]).min()
 
-    # unitary part
-    Heb = H.transform(ekets)
+    # unitary part, H is diagonal in its eigenbasis
+    Heb = Qobj(np.diag(evals), dims=H.dims)
     R = -1.0j * (spre(Heb) - spost(Heb))
-    R.data = R.data.tolil()
-    for I in range(N * N):
-        a, b = vec2mat_index(N, I)
-        for J in range(N * N):
-            c, d = vec2mat_index(N, J)
 
-            # unitary part: use spre and spost above, same as this:
-            # R[I,J] = -1j * W[a,b] * (a == c) * (b == d)
+    # dissipative part, for element (I,J)=((a,b),(c,d)) and each operator k:
+    #   A[a,c] A[d,b] (S[c,a] + S[d,b]) / 2
+    #   - delta(b,d) sum_n A[a,n] A[n,c] S[c,n] / 2
+    #   - delta(a,c) sum_n A[d,n] A[n,b] S[d,n] / 2
+    X = A * S.transpose(0, 2, 1)       # X[k,a,c] = A[k,a,c] S[k,c,a]
+    Y = A * S                          # Y[k,d,b] = A[k,d,b] S[k,d,b]
+    G = np.einsum('kan,knc->ac', A, X)
+    Gp = np.einsum('kdn,knb->db', Y, A)
+
+    if use_secular is False:
+        M = 0.5 * (np.einsum('kac,kdb->bacd', X, A) +
+                   np.einsum('kac,kdb->bacd', A, Y))
+        # row index I = a + N*b, column index J = c + N*d
+        D = M.transpose(0, 1, 3, 2).reshape(N * N, N * N)
+        D = D - 0.5 * np.kron(np.eye(N), G) - 0.5 * np.kron(Gp.T, np.eye(N))
+        D = sp.csr_matrix(D)
 
-            if use_secular is False or abs(W[a, b] - W[c, d]) < dw_min / 10.0:
+    else:
+        # secular approximation: only couple elements whose frequencies
+        # differ by less than dw_min/10. Sorting the frequencies splits them
+        # into clusters that no secular pair can cross.
+        W_I = W.ravel(order='F')  # W_I[a + N*b] = W[a,b]
+        order = np.argsort(W_I)
+        splits = np.nonzero(np.diff(W_I[order]) >= dw_min / 10.0)[0] + 1
+        rows, cols = [], []
+        for cluster in np.split(order, splits):
+            II, JJ = np.meshgrid(cluster, cluster, indexing='ij')
+            mask = abs(W_I[II] - W_I[JJ]) < dw_min / 10.0
+            rows.append(II[mask])
+            cols.append(JJ[mask])
+        I = np.concatenate(rows)
+        J = np.concatenate(cols)
+        a, b = I % N, I // N
+        c, d = J % N, J // N
+        vals = 0.5 * np.sum(X[:, a, c] * A[:, d, b] + A[:, a, c] * Y[:, d, b],
+                            axis=0)
+        vals -= 0.5 * (b == d) * G[a, c] + 0.5 * (a == c) * Gp[d, b]
+        D = sp.coo_matrix((vals, (I, J)), shape=(N * N, N * N)).tocsr()
+
+    R.data = R.data + D
+
+    if return_eigen:
+        return R, ekets, (evals, ekets, A)
+    return R, ekets
 
-                # dissipative part:
-                for k in range(K):
-                    # for each operator coupling the system to the environment
 
-                    R.data[I, J] += ((A[k, a, c] * A[k, d, b] / 2) *
-                                    (spectra_cb[k](W[c, a]) +
-                                     spectra_cb[k](W[d, b])))
-                    s1 = s2 = 0
-                    for n in range(N):
-                        s1 += A[k, a, n] * A[k, n, c] * spectra_cb[k](W[c, n])
-                        s2 += A[k, d, n] * A[k, n, b] * spectra_cb[k](W[d, n])
+def _br_blocks(R):
+    """
+    Private function returning the blocks of a Bloch-Redfield tensor, the
+    groups of vectorized density-matrix indices that R couples, i.e. the
+    connected components of its sparsity pattern.
+    """
+    n_blocks, labels = connected_components(R.data, directed=True,
+                                            connection='weak')
+    order = np.argsort(labels, kind='mergesort')
+    splits = np.nonzero(np.diff(labels[order]))[0] + 1
+    return np.split(order, splits)
 
-                    R.data[I, J] += - (b == d) * s1 / 2 - (a == c) * s2 / 2
 
-    R.data = R.data.tocsr()
-    return R, ekets
+def _br_block_propagator(R, dt):
+    """
+    Propagator exp(R*dt) of a Bloch-Redfield tensor, computed block by
+    block from :func:`_br_blocks` and assembled as a sparse matrix.
+    """
+    L = R.data.tocsr()
+    blocks = _br_blocks(R)
+    rows, cols, vals = [], [], []
+    singles = [idx[0] for idx in blocks if len(idx) == 1]
+    if len(singles):
+        # uncoupled coherences decay independently
+        singles = np.array(singles)
+        rows.append(singles)
+        cols.append(singles)
+        vals.append(np.exp(np.asarray(L[singles, singles]).ravel() * dt))
+    for idx in blocks:
+        if len(idx) > 1:
+            P = la.expm(L[idx, :][:, idx].toarray() * dt)
+            II, JJ = np.meshgrid(idx, idx, indexing='ij')
+            rows.append(II.ravel())
+            cols.append(JJ.ravel())
+            vals.append(P.ravel())
+    return sp.coo_matrix((np.concatenate(vals),
+                          (np.concatenate(rows), np.concatenate(cols))),
+                         shape=L.shape).tocsr()
@@ -20,18 +20,21 @@
 from qutip.superoperator import *
 from qutip.expect import expect
 from qutip.mesolve import mesolve
-from qutip.eseries import esval, esspec
+from qutip.eseries import esval, esspec, estidy
 from qutip.essolve import ode2es
 from qutip.mcsolve import mcsolve
-from qutip.steady import steady, steadystate
+from qutip.parfor import parfor
+from qutip.steady import steadystate, LiouvillianLU
 from qutip.odeoptions import Odeoptions
 import numpy as np
+import qutip.settings as qset
 
 
 #------------------------------------------------------------------------------
 # solver wrapers:
 #
-def correlation_ss(H, tlist, c_op_list, a_op, b_op, rho0=None, solver="me"):
+def correlation_ss(H, tlist, c_op_list, a_op, b_op, rho0=None, solver="me",
+                   lu=None):
     """
     Calculate a two-time correlation function
     :math:`\left<A(\\tau)B(0)\\right>` using the quantum regression
@@ -62,6 +65,11 @@ def correlation_ss(H, tlist, c_op_list, a_op, b_op, rho0=None, solver="me"):
         choice of solver (`me` for master-equation,
         `es` for exponential series and `mc` for Monte-carlo)
 
+    lu : :class:`qutip.steady.LiouvillianLU`
+        Optional factorized Liouvillian of `H` and `c_op_list`, shared between
+        calls with different operators so that the steady state is only
+        computed once.
+
     Returns
     -------
 
@@ -71,13 +79,13 @@ def correlation_ss(H, tlist, c_op_list, a_op, b_op, rho0=None, solver="me"):
     """
 
     if solver == "me":
-        return correlation_ss_ode(H, tlist, c_op_list, a_op, b_op, rho0)
+        return correlation_ss_ode(H, tlist, c_op_list, a_op, b_op, rho0, lu)
     elif solver == "es":
-        return correlation_ss_es(H, tlist, c_op_list, a_op, b_op, rho0)
+        return correlation_ss_es(H, tlist, c_op_list, a_op, b_op, rho0, lu)
     elif solver == "mc":
         print("Monte-Carlo solver is currently disabled, " +
               "using master equation.")
-        return correlation_ss_ode(H, tlist, c_op_list, a_op, b_op, rho0)
+        return correlation_ss_ode(H, tlist, c_op_list, a_op, b_op, rho0, lu)
     else:
         raise "Unrecognized choice of solver %s (use me, es or mc)." % solver
 
@@ -168,18 +176,19 @@ def correlation_ss_gtt(H, tlist, c_ops, a_op, b_op, c_op, d_op, rho0=None,
 # -----------------------------------------------------------------------------
 
 
-def correlation_ss_es(H, tlist, c_op_list, a_op, b_op, rho0=None):
+def correlation_ss_es(H, tlist, c_op_list, a_op, b_op, rho0=None, lu=None):
     """
     Internal function for calculating correlation functions using the
     exponential series solver. See :func:`correlation_ss` usage.
     """
 
     # contruct the Liouvillian
-    L = liouvillian(H, c_op_list)
+    lu = _liouvillian_lu(H, c_op_list, lu)
+    L = lu.L
 
     # find the steady state
     if rho0 is None:
-        rho0 = steady(L)
+        rho0 = lu.steady()
 
     # evaluate the correlation function
     solC_tau = ode2es(L, b_op * rho0)
@@ -187,17 +196,18 @@ def correlation_ss_es(H, tlist, c_op_list, a_op, b_op, rho0=None):
     return esval(expect(a_op, solC_tau), tlist)
 
 
-def correlation_es(H, rho0, tlist, taulist, c_op_list, a_op, b_op):
+def correlation_es(H, rho0, tlist, taulist, c_op_list, a_op, b_op, lu=None):
     """
     Internal function for calculating correlation functions using the
     exponential series solver. See :func:`correlation` usage.
     """
 
     # contruct the Liouvillian
-    L = liouvillian(H, c_op_list)
+    lu = _liouvillian_lu(H, c_op_list, lu)
+    L = lu.L
 
     if rho0 is None:
-        rho0 = steady(L)
+        rho0 = lu.steady()
 
     C_mat = np.zeros([np.size(tlist), np.size(taulist)], dtype=complex)
 
@@ -218,15 +228,14 @@ def correlation_es(H, rho0, tlist, taulist, c_op_list, a_op, b_op):
 # -----------------------------------------------------------------------------
 
 
-def correlation_ss_ode(H, tlist, c_op_list, a_op, b_op, rho0=None):
+def correlation_ss_ode(H, tlist, c_op_list, a_op, b_op, rho0=None, lu=None):
     """
     Internal function for calculating correlation functions using the master
     equation solver. See :func:`correlation_ss` usage.
     """
 
-    L = liouvillian(H, c_op_list)
     if rho0 is None:
-        rho0 = steady(L)
+        rho0 = _liouvillian_lu(H, c_op_list, lu).steady()
 
     return mesolve(H, b_op * rho0, tlist, c_op_list, [a_op]).expect[0]
 
@@ -340,7 +349,8 @@ def correlation_mc(H, psi0, tlist, taulist, c_op_list, a_op, b_op):
 # SPECTRUM
 # -----------------------------------------------------------------------------
 
-def spectrum_ss(H, wlist, c_op_list, a_op, b_op):
+def spectrum_ss(H, wlist, c_op_list, a_op, b_op, solver="es", lu=None,
+                parallel=False):
     """
     Calculate the spectrum corresponding to a correlation function
     :math:`\left<A(\\tau)B(0)\\right>`, i.e., the Fourier transform of the
@@ -369,6 +379,20 @@ def spectrum_ss(H, wlist, c_op_list, a_op, b_op):
     b_op : :class:`qutip.qobj`
         operator B.
 
+    solver : str
+        choice of solver (`es` for exponential series, which diagonalizes the
+        Liouvillian, and `pi` for the pseudo-inverse method, which solves a
+        sparse linear system for each frequency)
+
+    lu : :class:`qutip.steady.LiouvillianLU`
+        Optional factorized Liouvillian of `H` and `c_op_list`, shared between
+        calls with different operators so that the steady state is only
+        computed once.
+
+    parallel : bool {False, True}
+        Evaluate blocks of frequencies in parallel using the parfor function
+        (`pi` solver only).
+
     Returns
     -------
 
@@ -378,11 +402,27 @@ def spectrum_ss(H, wlist, c_op_list, a_op, b_op):
 
     """
 
+    if solver == "es":
+        return spectrum_ss_es(H, wlist, c_op_list, a_op, b_op, lu)
+    elif solver == "pi":
+        return spectrum_ss_pi(H, wlist, c_op_list, a_op, b_op, lu, parallel)
+    else:
+        raise ValueError("Unrecognized choice of solver %s (use es or pi)."
+                         % solver)
+
+
+def spectrum_ss_es(H, wlist, c_op_list, a_op, b_op, lu=None):
+    """
+    Internal function for calculating the spectrum using the exponential
+    series solver. See :func:`spectrum_ss` usage.
+    """
+
     # contruct the Liouvillian
-    L = liouvillian(H, c_op_list)
+    lu = _liouvillian_lu(H, c_op_list, lu)
+    L = lu.L
 
     # find the steady state density matrix and a_op and b_op expecation values
-    rho0 = steady(L)
+    rho0 = lu.steady()
 
     a_op_ss = expect(a_op, rho0)
     b_op_ss = expect(b_op, rho0)
@@ -393,10 +433,77 @@ def spectrum_ss(H, wlist, c_op_list, a_op, b_op):
     # correlation
     corr_es = expect(a_op, es)
 
-    # covarience
-    cov_es = corr_es - np.real(np.conjugate(a_op_ss) * b_op_ss)
+    # covarience, with the stationary limit <A><B> of the correlation
+    # removed, as in spectrum_ss_pi. estidy merges it with the rate-zero
+    # term of the correlation, which would otherwise diverge at w = 0
+    cov_es = estidy(corr_es - a_op_ss * b_op_ss)
 
     # spectrum
     spectrum = esspec(cov_es, wlist)
 
     return spectrum
+
+
+def spectrum_ss_pi(H, wlist, c_op_list, a_op, b_op, lu=None, parallel=False):
+    """
+    Internal function for calculating the spectrum using the pseudo-inverse
+    of the Liouvillian. See :func:`spectrum_ss` usage.
+
+    With the steady-state part removed, :math:`x_0 = B\\rho_{ss} -
+    \\left<B\\right>\\rho_{ss}`, the spectrum is
+
+    .. math::
+
+        S(\\omega) = -2 {\\rm Re}\\, {\\rm Tr}[A (L - i\\omega)^{-1} x_0],
+
+    which takes one sparse LU factorization per frequency instead of the full
+    diagonalization of L.
+    """
+
+    lu = _liouvillian_lu(H, c_op_list, lu)
+    rho0 = lu.steady()
+
+    x0 = mat2vec((b_op * rho0 - expect(b_op, rho0) * rho0).full()).ravel()
+    # Tr[A X] = vec(A^T) . vec(X)
+    a_vec = mat2vec(a_op.full().T).ravel()
+
+    wlist = np.asarray(wlist, dtype=float)
+    if parallel and len(wlist) > 1:
+        # the factorizations can not be pickled, workers redo their own
+        blocks = np.array_split(wlist, min(len(wlist), 4 * qset.num_cpus))
+        out = parfor(_spectrum_pi_block, blocks, chunksize=1, L=lu.L,
+                     a_vec=a_vec, x0=x0)
+        return np.concatenate(out)
+    else:
+        return _spectrum_pi_block(wlist, a_vec=a_vec, x0=x0, lu=lu)
+
+
+def _spectrum_pi_block(wlist, a_vec, x0, L=None, lu=None):
+    """
+    Private function evaluating the pseudo-inverse spectrum for a block of
+    frequencies. The factorizations are kept if `lu` has a cache, so that
+    the spectra of further operators reuse them.
+    """
+    if lu is None:
+        lu = LiouvillianLU(L)
+    spectrum = np.zeros(len(wlist))
+    for k, w in enumerate(wlist):
+        spectrum[k] = -2 * np.real(np.dot(a_vec, lu.solve(x0, w)))
+    return spectrum
+
+
+def _liouvillian_lu(H, c_op_list, lu=None):
+    """
+    Private function returning the factorized Liouvillian `lu`, or a new one
+    for `H` and `c_op_list` if none is given. A given `lu` is used as it is,
+    `H` is only checked for matching dimensions.
+    """
+    if lu is None:
+        lu = LiouvillianLU(liouvillian(H, c_op_list))
+    elif not isinstance(lu, LiouvillianLU):
+        raise TypeError('lu must be a LiouvillianLU instance.')
+    elif H is not None:
+        dims = H.dims if issuper(H) else [H.dims, H.dims]
+        if lu.L.dims != dims:
+            raise TypeError('The dimensions of lu do not match H.')
+    return lu
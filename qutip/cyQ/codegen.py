@@ -61,7 +61,7 @@ class Codegen():
         self.file=open(filename,"w")
     #----
     def generate(self,filename="rhs.pyx"):
-        """generate the file"""
+        """generate the file, or only return the code if filename is None"""
         self.time_vars()
         for line in cython_preamble():
             self.write(line)
@@ -99,10 +99,12 @@ class Codegen():
                 self.write(line)
             self.write(self.func_end_real())
             self.dedent()
-        self.file(filename)
-        self.file.writelines(self.code)
-        self.file.close()
+        if filename is not None:
+            self.file(filename)
+            self.file.writelines(self.code)
+            self.file.close()
         odeconfig.cgen_num+=1
+        return "".join(self.code)
     #----
     def indent(self):
         """increase indention level by one"""
@@ -18,7 +18,6 @@
 ###########################################################################
 
 import numpy as np
-import scipy.sparse as sp
 from qutip.qobj import Qobj
 
 
@@ -33,6 +32,11 @@ class eseries():
         Array of amplitudes for exponential series.
     rates : ndarray
         Array of rates for exponential series.
+    data : ndarray
+        Amplitudes as the rows of one dense array, with operator amplitudes
+        flattened in row-major order.
+    isqobj : bool
+        Whether the amplitudes are quantum objects or c numbers.
     dims : list
         Dimensions of exponential series components
     shape : list
@@ -51,87 +55,82 @@ class eseries():
     __array_priority__ = 101
 
     def __init__(self, q=np.array([]), s=np.array([])):
-        if isinstance(s, (int, float, complex)):
+        if isinstance(s, (int, float, complex, np.number)):
             s = np.array([s])
-        if (not np.any(q)) and (len(s) == 0):
-            self.ampl = np.array([])
-            self.rates = np.array([])
+        self.dims = [[1, 1]]
+        self.shape = [1, 1]
+        self.isqobj = False
+        self.data = np.zeros((0, 1), dtype=complex)
+        self.rates = np.array([])
+
+        if isinstance(q, eseries):
+            self.dims = q.dims
+            self.shape = q.shape
+            self.isqobj = q.isqobj
+            self.data = q.data
+            self.rates = q.rates
+            return
+        if isinstance(q, Qobj):
+            q = [q]
+        elif isinstance(q, (int, float, complex, np.number)):
+            q = [q]
+        if len(q) == 0:
+            return
+        if len(s) == 0 and not any([isinstance(x, Qobj) for x in q]) \
+                and not np.any(q):
+            # zero c-number amplitudes without rates give an empty series
+            return
+
+        self.ampl = q
+        if len(s) == 0:
+            self.rates = np.zeros(len(q))
+        else:
+            if len(s) != len(q):
+                raise TypeError('Number of rates must match number ' +
+                                'of members in object array.')
+            self.rates = np.array(s)
+        # sort rates from lowest to highest
+        idx = np.argsort(self.rates, kind='mergesort')
+        self.rates = self.rates[idx]
+        self.data = self.data[idx]
+
+    ######___END_INIT___######################
+
+    def _get_ampl(self):
+        if not self.isqobj:
+            return self.data[:, 0]
+        # fill an object array, so that numpy does not try to convert the
+        # Qobj amplitudes to arrays
+        ampl = np.empty(len(self.data), dtype=object)
+        for k in range(len(self.data)):
+            ampl[k] = Qobj(self.data[k].reshape(self.shape), dims=self.dims)
+        return ampl
+
+    def _set_ampl(self, q):
+        if len(q) and all([isinstance(x, Qobj) for x in q]):
+            if any([x.shape != q[0].shape for x in q]):
+                raise TypeError('All amplitudes must have same dimension.')
+            self.isqobj = True
+            self.dims = q[0].dims
+            self.shape = q[0].shape
+            self.data = np.array([np.asarray(x.full()).ravel() for x in q],
+                                 dtype=complex)
+        else:
+            self.isqobj = False
             self.dims = [[1, 1]]
             self.shape = [1, 1]
-        if np.any(q) and (len(s) == 0):
-            if isinstance(q, eseries):
-                self.ampl = q.ampl
-                self.rates = q.rates
-                self.dims = q.dims
-                self.shape = q.shape
-            elif isinstance(q, (np.ndarray, list)):
-                ind = np.shape(q)
-                num = ind[0]  # number of elements in q
-                sh = np.array([Qobj(x).shape for x in q])
-                if any(sh != sh[0]):
-                    raise TypeError('All amplitudes must have same dimension.')
-                self.ampl = np.array([x for x in q])
-                self.rates = np.zeros(ind)
-                self.dims = self.ampl[0].dims
-                self.shape = self.ampl[0].shape
-            elif isinstance(q, Qobj):
-                qo = Qobj(q)
-                self.ampl = np.array([qo])
-                self.rates = np.array([0])
-                self.dims = qo.dims
-                self.shape = qo.shape
-            else:
-                self.ampl = np.array([q])
-                self.rates = np.array([0])
-                self.dims = [[1, 1]]
-                self.shape = [1, 1]
-
-        if np.any(q) and len(s) != 0:
-            if isinstance(q, (np.ndarray, list)):
-                ind = np.shape(q)
-                num = ind[0]
-                sh = np.array([Qobj(q[x]).shape for x in range(0, num)])
-                if np.any(sh != sh[0]):
-                    raise TypeError('All amplitudes must have same dimension.')
-                self.ampl = np.array([Qobj(q[x]) for x in range(0, num)])
-                self.dims = self.ampl[0].dims
-                self.shape = self.ampl[0].shape
-            else:
-                num = 1
-                self.ampl = np.array([Qobj(q)])
-                self.dims = self.ampl[0].dims
-                self.shape = self.ampl[0].shape
-            if isinstance(s, (int, complex, float)):
-                if num != 1:
-                    raise TypeError('Number of rates must match number ' +
-                                    'of members in object array.')
-                self.rates = np.array([s])
-            elif isinstance(s, (np.ndarray, list)):
-                if len(s) != num:
-                    raise TypeError('Number of rates must match number ' +
-                                    ' of members in object array.')
-                self.rates = np.array(s)
-        if len(self.ampl) != 0:
-            #combine arrays so that they can be sorted together
-            zipped = list(zip(self.rates, self.ampl))
-            zipped.sort()  # sort rates from lowest to highest
-            rates, ampl = list(zip(*zipped))  # get back rates and ampl
-            self.ampl = np.array(ampl)
-            self.rates = np.array(rates)
+            self.data = np.array(q, dtype=complex).reshape((len(q), 1))
 
-    ######___END_INIT___######################
+    ampl = property(_get_ampl, _set_ampl)
 
     ##########################################
     def __str__(self):  # string of ESERIES information
-        self.tidy()
-        print("ESERIES object: " + str(len(self.ampl)) + " terms")
+        print("ESERIES object: " + str(len(self.rates)) + " terms")
         print("Hilbert space dimensions: " + str(self.dims))
-        for k in range(0, len(self.ampl)):
+        ampl = self.ampl
+        for k in range(0, len(ampl)):
             print("Exponent #" + str(k) + " = " + str(self.rates[k]))
-            if isinstance(self.ampl[k], sp.spmatrix):
-                print(self.ampl[k].full())
-            else:
-                print(self.ampl[k])
+            print(ampl[k])
         return ""
 
     def __repr__(self):
@@ -140,14 +139,15 @@ class eseries():
     # Addition with ESERIES on left (ex. ESERIES+5)
     def __add__(self, other):
         right = eseries(other)
-        if self.dims != right.dims:
+        if len(right.rates) == 0:
+            return eseries(self)
+        if len(self.rates) == 0:
+            return eseries(right)
+        if self.dims != right.dims or self.isqobj != right.isqobj:
             raise TypeError("Incompatible operands for ESERIES addition")
-        out = eseries()
-        out.dims = self.dims
-        out.shape = self.shape
-        out.ampl = np.append(self.ampl, right.ampl)
-        out.rates = np.append(self.rates, right.rates)
-        return out
+        return _eseries_from_data(np.vstack((self.data, right.data)),
+                                  np.append(self.rates, right.rates),
+                                  self.dims, self.shape, self.isqobj)
 
     # Addition with ESERIES on right(ex. 5+ESERIES)
     def __radd__(self, other):
@@ -155,12 +155,8 @@ class eseries():
 
     # define negation of ESERIES
     def __neg__(self):
-        out = eseries()
-        out.dims = self.dims
-        out.shape = self.shape
-        out.ampl = -self.ampl
-        out.rates = self.rates
-        return out
+        return _eseries_from_data(-self.data, self.rates, self.dims,
+                                  self.shape, self.isqobj)
 
     # Subtraction with ESERIES on left (ex. ESERIES-5)
     def __sub__(self, other):
@@ -174,32 +170,51 @@ class eseries():
     def __mul__(self, other):
 
         if isinstance(other, eseries):
-            out = eseries()
-            out.dims = self.dims
-            out.shape = self.shape
-
-            for i in range(len(self.rates)):
-                for j in range(len(other.rates)):
-                    out += eseries(self.ampl[i] * other.ampl[j],
-                                   self.rates[i] + other.rates[j])
-
-            return out
+            # every pair of terms, rates add
+            rates = np.add.outer(self.rates, other.rates).ravel()
+            n = len(rates)
+            if self.isqobj and other.isqobj:
+                A = self.data.reshape([len(self.rates)] + list(self.shape))
+                B = other.data.reshape([len(other.rates)] + list(other.shape))
+                data = np.einsum('iab,jbc->ijac', A, B).reshape((n, -1))
+                return _eseries_from_data(data, rates,
+                                          [self.dims[0], other.dims[1]],
+                                          [self.shape[0], other.shape[1]],
+                                          True)
+            data = (self.data[:, np.newaxis, :] *
+                    other.data[np.newaxis, :, :]).reshape((n, -1))
+            op = self if self.isqobj else other
+            return _eseries_from_data(data, rates, op.dims, op.shape,
+                                      op.isqobj)
+
+        elif isinstance(other, Qobj):
+            B = other.full()
+            if not self.isqobj:
+                return _eseries_from_data(self.data * B.ravel(), self.rates,
+                                          other.dims, other.shape, True)
+            A = self.data.reshape([len(self.rates)] + list(self.shape))
+            data = np.einsum('iab,bc->iac', A, B).reshape((len(A), -1))
+            return _eseries_from_data(data, self.rates,
+                                      [self.dims[0], other.dims[1]],
+                                      [self.shape[0], other.shape[1]], True)
         else:
-            out = eseries()
-            out.dims = self.dims
-            out.shape = self.shape
-            out.ampl = self.ampl * other
-            out.rates = self.rates
-            return out
+            return _eseries_from_data(self.data * other, self.rates,
+                                      self.dims, self.shape, self.isqobj)
 
     # Multiplication with ESERIES on right (ex. other*ESERIES)
     def __rmul__(self, other):
-        out = eseries()
-        out.dims = self.dims
-        out.shape = self.shape
-        out.ampl = other * self.ampl
-        out.rates = self.rates
-        return out
+        if isinstance(other, Qobj):
+            A = other.full()
+            if not self.isqobj:
+                return _eseries_from_data(self.data * A.ravel(), self.rates,
+                                          other.dims, other.shape, True)
+            B = self.data.reshape([len(self.rates)] + list(self.shape))
+            data = np.einsum('ab,ibc->iac', A, B).reshape((len(B), -1))
+            return _eseries_from_data(data, self.rates,
+                                      [other.dims[0], self.dims[1]],
+                                      [other.shape[0], self.shape[1]], True)
+        return _eseries_from_data(other * self.data, self.rates, self.dims,
+                                  self.shape, self.isqobj)
 
     #
     # todo:
@@ -227,36 +242,27 @@ class eseries():
 
         """
 
-        if self.ampl is None or len(self.ampl) == 0:
+        if len(self.rates) == 0:
             # no terms, evalue to zero
             return np.zeros(np.shape(tlist))
 
-        if isinstance(tlist, float) or isinstance(tlist, int):
+        if isinstance(tlist, (int, float, np.number)):
             tlist = [tlist]
+        tlist = np.asarray(tlist)
 
-        if isinstance(self.ampl[0], Qobj):
-            # amplitude vector contains quantum objects
-            val_list = []
-
-            for j in range(len(tlist)):
-                exp_factors = np.exp(np.array(self.rates) * tlist[j])
-
-                val = 0
-                for i in range(len(self.ampl)):
-                    val += self.ampl[i] * exp_factors[i]
-
-                val_list.append(val)
+        # amplitudes x exp(rates (x) tlist)
+        vals = np.dot(self.data.T, np.exp(np.outer(self.rates, tlist)))
 
+        if self.isqobj:
+            # amplitude vector contains quantum objects
+            val_list = [Qobj(vals[:, j].reshape(self.shape), dims=self.dims)
+                        for j in range(len(tlist))]
         else:
             # the amplitude vector contains c numbers
-            val_list = np.zeros(np.size(tlist), dtype=complex)
+            val_list = vals[0]
+            if all(np.imag(val_list) == 0):
+                val_list = np.real(val_list)
 
-            for j in range(len(tlist)):
-                exp_factors = np.exp(np.array(self.rates) * tlist[j])
-                val_list[j] = np.sum(np.dot(self.ampl, exp_factors))
-
-        if all(np.imag(val_list) == 0):
-            val_list = np.real(val_list)
         if len(tlist) == 1:
             return val_list[0]
         else:
@@ -278,13 +284,14 @@ class eseries():
             Values of exponential series at frequencies in ``wlist``.
 
         """
-        val_list = np.zeros(np.size(wlist))
-
-        for i in range(len(wlist)):
-            val_list[i] = 2 * np.real(
-                np.dot(self.ampl, 1. / (1.0j * wlist[i] - self.rates)))
-
-        return val_list
+        if self.isqobj:
+            raise TypeError('Spectrum requires an eseries of c numbers.')
+        if len(self.rates) == 0:
+            return np.zeros(np.size(wlist))
+        wlist = np.asarray(wlist).ravel()
+        return 2 * np.real(np.dot(
+            1. / (1.0j * wlist[:, np.newaxis] - self.rates[np.newaxis, :]),
+            self.data[:, 0]))
 
     def tidyup(self, *args):
         """ Returns a tidier version of exponential series.
@@ -297,47 +304,44 @@ class eseries():
         rate_tol = 1e-10
         ampl_tol = 1e-10
 
-        ampl_dict = {}
-        unique_rates = {}
-        ur_len = 0
-
-        for r_idx in range(len(self.rates)):
-
-            # look for a matching rate in the list of unique rates
-            idx = -1
-            for ur_key in unique_rates.keys():
-                if abs(self.rates[r_idx] - unique_rates[ur_key]) < rate_tol:
-                    idx = ur_key
-                    break
-
-            if idx == -1:
-                # no matching rate, add it
-                unique_rates[ur_len] = self.rates[r_idx]
-                ampl_dict[ur_len] = [self.ampl[r_idx]]
-                ur_len = len(unique_rates)
-            else:
-                # found matching rate, append amplitude to its list
-                ampl_dict[idx].append(self.ampl[r_idx])
-
-        # create new amplitude and rate list with only unique rates, and
-        # nonzero amplitudes
-        self.rates = np.array([])
-        self.ampl = np.array([])
-        for ur_key in unique_rates.keys():
-            total_ampl = np.sum(ampl_dict[ur_key])
-
-            if isinstance(total_ampl, float) or isinstance(total_ampl, complex):
-                if abs(total_ampl) > ampl_tol:
-                    self.rates = np.append(self.rates, unique_rates[ur_key])
-                    self.ampl = np.append(self.ampl, total_ampl)
-            else:
-                if abs(total_ampl.full()).max() > ampl_tol:
-                    self.rates = np.append(self.rates, unique_rates[ur_key])
-                    self.ampl = np.append(self.ampl, total_ampl)
+        if len(self.rates) == 0:
+            return self
+
+        rates = np.asarray(self.rates, dtype=complex)
+        # group rates whose real parts, and then imaginary parts, differ by
+        # less than rate_tol, with a sort along each
+        idx = np.argsort(rates.real, kind='mergesort')
+        re_group = np.empty(len(rates), dtype=int)
+        re_group[idx] = np.cumsum(np.r_[0, np.diff(rates.real[idx]) >= rate_tol])
+        idx = np.lexsort((rates.imag, re_group))
+        new = np.r_[True, (np.diff(re_group[idx]) != 0) |
+                    (np.diff(rates.imag[idx]) >= rate_tol)]
+        group = np.cumsum(new) - 1
+
+        data = np.zeros((group[-1] + 1, self.data.shape[1]), dtype=complex)
+        np.add.at(data, group, self.data[idx])
+        keep = np.abs(data).max(axis=1) > ampl_tol
+
+        self.data = data[keep]
+        self.rates = self.rates[idx][new][keep]
 
         return self
 
 
+def _eseries_from_data(data, rates, dims, shape, isqobj):
+    """
+    Private function that creates an eseries directly from the array of
+    amplitudes and the vector of rates.
+    """
+    out = eseries()
+    out.data = np.asarray(data, dtype=complex)
+    out.rates = np.asarray(rates)
+    out.dims = dims
+    out.shape = shape
+    out.isqobj = isqobj
+    return out
+
+
 #------------------------------------------------------------------------------
 #
 # wrapper functions for accessing the class methods (for compatibility with
@@ -19,9 +19,7 @@
 
 
 import numpy as np
-from qutip.qobj import Qobj
-from qutip.eseries import eseries, estidy, esval
-from qutip.expect import expect
+from qutip.eseries import estidy, esval, _eseries_from_data
 from qutip.superoperator import *
 
 
@@ -66,27 +64,65 @@ def essolve(H, rho0, tlist, c_op_list, expt_op_list):
     .. note:: This solver does not support time-dependent Hamiltonians.
 
     """
-    n_expt_op = len(expt_op_list)
-    n_tsteps = len(tlist)
-
     # Calculate the Liouvillian
     if c_op_list is None or len(c_op_list) == 0:
         L = H
     else:
         L = liouvillian(H, c_op_list)
 
-    es = ode2es(L, rho0)
+    if len(expt_op_list) == 0:
+        return esval(ode2es(L, rho0), tlist)
 
     # evaluate the expectation values
-    if n_expt_op == 0:
-        result_list = [Qobj() for k in range(n_tsteps)]
-    else:
-        result_list = np.zeros([n_expt_op, n_tsteps], dtype=complex)
+    return _essolve_expect(L, rho0, tlist, expt_op_list)
 
-    for n in range(0, n_expt_op):
-        result_list[n, :] = esval(expect(expt_op_list[n], es), tlist)
 
-    return result_list
+def _essolve_expect(L, rho0, tlist, expt_op_list):
+    """
+    Private function evaluating the expectation values of the operators in
+    `expt_op_list`, <O>(t) = sum_i c_i exp(w_i t), directly from the
+    eigendecomposition of `L`, without building the eseries of the state.
+    """
+    tlist = np.asarray(tlist)
+
+    if issuper(L):
+
+        if isket(rho0):
+            rho0 = rho0 * rho0.dag()
+
+        w, v = la.eig(L.full())
+        v0 = la.solve(v, mat2vec(np.asarray(rho0.full()))).ravel()
+
+        # Tr[O rho] = vec(O^T) . vec(rho), and vec(O^T) is O in row-major order
+        ops = np.array([np.asarray(op.full()).ravel() for op in expt_op_list])
+        c = np.dot(ops, v) * v0
+
+        return np.dot(c, np.exp(np.outer(w, tlist)))
+
+    elif isoper(L):
+
+        if not isket(rho0):
+            raise TypeError('Second argument must be a ket if first' +
+                            'is a Hamiltonian.')
+
+        if L.isherm:
+            w, v = la.eigh(L.full())
+        else:
+            w, v = la.eig(L.full())
+        v0 = la.solve(v, np.asarray(rho0.full())).ravel()
+
+        # the states at all times, one per column
+        psi_t = np.dot(v, v0[:, np.newaxis] *
+                       np.exp(-1.0j * np.outer(w, tlist)))
+
+        result_list = np.zeros([len(expt_op_list), len(tlist)], dtype=complex)
+        for n, op in enumerate(expt_op_list):
+            result_list[n, :] = np.sum(psi_t.conj() * (op.data * psi_t),
+                                       axis=0)
+        return result_list
+
+    else:
+        raise TypeError('First argument must be a Hamiltonian or Liouvillian.')
 
 
 # -----------------------------------------------------------------------------
@@ -119,23 +155,18 @@ def ode2es(L,rho0):
             # Got a wave function as initial state: convert to density matrix.
             rho0 = rho0 * rho0.dag()
 
-        w, v = L.eigenstates()
-        v = np.hstack([ket.full() for ket in v])
+        w, v = la.eig(L.full())
         # w[i]   = eigenvalue i
         # v[:,i] = eigenvector i
 
-        rlen = prod(rho0.shape)
+        N = rho0.shape[0]
         r0 = mat2vec(rho0.full())
         v0 = la.solve(v, r0)
-        vv = v * sp.spdiags(v0.T, 0, rlen, rlen)
-
-        out = None
-        for i in range(rlen):
-            qo = Qobj(vec2mat(vv[:, i]), dims=rho0.dims, shape=rho0.shape)
-            if out:
-                out += eseries(qo, w[i])
-            else:
-                out = eseries(qo, w[i])
+        # column i of vv is the (column-stacked) amplitude of rate w[i]
+        vv = v * v0.T
+        ampl = vv.T.reshape((len(w), N, N)).transpose((0, 2, 1))
+        out = _eseries_from_data(ampl.reshape((len(w), N * N)), w,
+                                 rho0.dims, rho0.shape, True)
 
     elif isoper(L):
 
@@ -143,23 +174,14 @@ def ode2es(L,rho0):
             raise TypeError('Second argument must be a ket if first' +
                             'is a Hamiltonian.')
 
-        w, v = L.eigenstates()
-        v = np.hstack([ket.full() for ket in v])
+        w, v = la.eig(L.full())
         # w[i]   = eigenvalue i
         # v[:,i] = eigenvector i
 
-        rlen = prod(rho0.shape)
         r0 = rho0.full()
         v0 = la.solve(v, r0)
-        vv = v * sp.spdiags(v0.T, 0, rlen, rlen)
-
-        out = None
-        for i in range(rlen):
-            qo = Qobj(matrix(vv[:, i]).T, dims=rho0.dims, shape=rho0.shape)
-            if out:
-                out += eseries(qo, -1.0j * w[i])
-            else:
-                out = eseries(qo, -1.0j * w[i])
+        vv = v * v0.T
+        out = _eseries_from_data(vv.T, -1.0j * w, rho0.dims, rho0.shape, True)
 
     else:
         raise TypeError('First argument must be a Hamiltonian or Liouvillian.')
@@ -18,9 +18,9 @@
 ###########################################################################
 
 from qutip.eseries import *
+from qutip.eseries import _eseries_from_data
 from qutip.qobj import *
 import numpy as np
-import scipy.sparse as sp
 
 
 def expect(oper,state):
@@ -84,34 +84,24 @@ def single_expect(oper, state):
     # eseries
     #
     elif isinstance(oper, Qobj) and isinstance(state, eseries):
-        out = eseries()
+        n = len(state.rates)
+        O = oper.full()
+        if n == 0:
+            return eseries()
 
-        if isoper(state.ampl[0]):
-
-            out.rates = state.rates
-            out.ampl = np.array([expect(oper, a) for a in state.ampl])
+        if state.isqobj and state.shape[0] == state.shape[1]:
+            # Tr[O A_i] for all amplitudes at once
+            ampl = np.dot(state.data, O.T.ravel())
+            rates = state.rates
 
         else:
+            # <A_m|O|A_n>, with rate r_n - r_m
+            A = state.data.T
+            ampl = np.dot(A.conj().T, np.dot(O, A)).ravel()
+            rates = np.add.outer(-state.rates, state.rates).ravel()
 
-            out.rates = np.array([])
-            out.ampl = np.array([])
-
-            for m in range(len(state.rates)):
-
-                op_m = state.ampl[m].data.conj().T * oper.data
-
-                for n in range(len(state.rates)):
-
-                    a = op_m * state.ampl[n].data
-
-                    if isinstance(a, sp.spmatrix):
-                        a = a.todense()
-
-                    out.rates = np.append(out.rates, state.rates[n] -
-                                          state.rates[m])
-                    out.ampl = np.append(out.ampl, a)
-
-        return out
+        return _eseries_from_data(ampl[:, np.newaxis], rates, [[1, 1]],
+                                  [1, 1], False)
     else:  # unsupported types
         raise TypeError('Arguments must be quantum objects or eseries')
 
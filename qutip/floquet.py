@@ -23,17 +23,203 @@ import scipy
 from scipy import angle, pi, exp, sqrt
 from types import FunctionType
 from qutip.qobj import Qobj, isket
-from qutip.superoperator import vec2mat_index, mat2vec, vec2mat
-from qutip.mesolve import mesolve
+from qutip.superoperator import mat2vec, vec2mat
 from qutip.steady import steadystate
 from qutip.states import ket2dm
 from qutip.states import projection
 from qutip.odeoptions import Odeoptions
-from qutip.propagator import propagator
+from qutip.propagator import _unitary_propagators
 from qutip.odedata import Odedata
 from qutip.cyQ.ode_rhs import cyq_ode_rhs
 
 
+#------------------------------------------------------------------------------
+# Propagator of a periodic Hamiltonian
+#
+class FloquetPropagator():
+    """
+    Propagator :math:`U(t)` for a Hamiltonian with period `T`.
+
+    The one-period propagator :math:`U(T)` and a table of :math:`U(t)` for
+    `n_t` + 1 equally spaced times in :math:`[0, T]` are computed once, in a
+    single integration. For a time :math:`t = nT + \\tau` the propagator is
+    then :math:`U(\\tau) U(T)^n`, where :math:`U(\\tau)` is looked up in the
+    table (or integrated from the closest earlier table time) and
+    :math:`U(T)^n` is evaluated from the Schur decomposition of :math:`U(T)`.
+    The cost per time point therefore does not grow with `t`.
+
+    Use :func:`floquet_propagator` to get a cached instance.
+
+    Parameters
+    ----------
+
+    H : :class:`qutip.qobj`
+        System Hamiltonian, time-dependent with period `T`.
+
+    T : float
+        The period of the time-dependence of the hamiltonian.
+
+    args : dictionary
+        Dictionary with variables required to evaluate H.
+
+    n_t : int
+        Number of intervals in the table of propagators over one period.
+
+    opt : :class:`qutip.Odeoptions`
+        Options for the ODE solver.
+
+    """
+    def __init__(self, H, T, args=None, n_t=100, opt=None):
+        self.H = H
+        self.T = T
+        self.args = args
+        self.opt = opt
+        self.tlist = np.linspace(0, T, n_t + 1)
+        self.table = _unitary_propagators(H, self.tlist, args, opt)
+
+        H0 = H
+        while isinstance(H0, list):
+            H0 = H0[0]
+        if isinstance(H0, FunctionType):
+            H0 = H0(0.0, args)
+        self.dims = H0.dims
+
+        # U(T) = Z diag(d) Z^+ for a unitary (normal) matrix
+        self.U_T = self.table[:, :, -1]
+        d, Z = la.schur(self.U_T, output='complex')
+        self._schur = (np.diag(d), Z)
+
+    def U_period(self, n):
+        """
+        The propagator :math:`U(T)^n` for `n` periods, as an array.
+        """
+        d, Z = self._schur
+        return np.dot(Z * d**n, Z.conj().T)
+
+    def U_tau(self, tau):
+        """
+        The propagator :math:`U(\\tau)` for :math:`0 \\le \\tau \\le T`, as an
+        array.
+        """
+        dt = self.tlist[1]
+        k = min(int(np.floor(tau / dt + 1e-9)), len(self.tlist) - 1)
+        if abs(tau - self.tlist[k]) <= 1e-9 * self.T:
+            return self.table[:, :, k]
+        # integrate the remainder from the closest earlier table time
+        U = _unitary_propagators(self.H, [self.tlist[k], tau], self.args,
+                                 self.opt)
+        return np.dot(U[:, :, 1], self.table[:, :, k])
+
+    def U(self, t):
+        """
+        The propagator :math:`U(t)` from time 0 to `t`.
+
+        Parameters
+        ----------
+
+        t : float
+            Time.
+
+        Returns
+        -------
+
+        U : :class:`qutip.qobj`
+            The propagator.
+
+        """
+        n = int(np.floor(t / self.T))
+        tau = t - n * self.T
+        U = self.U_tau(tau)
+        if n != 0:
+            U = np.dot(U, self.U_period(n))
+        return Qobj(U, dims=[self.dims[0], self.dims[0]])
+
+    __call__ = U
+
+
+# cache of FloquetPropagator instances, keyed on (H, T, args, opt)
+_floquet_propagator_cache = {}
+_floquet_propagator_cache_size = 10
+
+
+def _floquet_key(H, T, args, opt=None):
+    """
+    Private function that builds a hashable cache key for (H, T, args, opt)
+    from the contents of the values, or returns None if some value has no
+    reliable key.
+    """
+    def _key(v):
+        if isinstance(v, Qobj):
+            data = v.data.tocsr()
+            return ('Qobj', str(v.dims), data.data.tobytes(),
+                    data.indices.tobytes(), data.indptr.tobytes())
+        elif isinstance(v, np.ndarray):
+            # the repr of large arrays is abbreviated, use the content
+            if v.dtype.hasobject:
+                raise TypeError
+            return ('ndarray', v.dtype.str, v.shape, v.tobytes())
+        elif isinstance(v, (list, tuple)):
+            return (type(v).__name__,) + tuple(_key(x) for x in v)
+        elif isinstance(v, dict):
+            return ('dict',) + tuple(sorted((k, _key(x))
+                                            for k, x in v.items()))
+        elif v is None or isinstance(v, (bool, int, float, complex, str,
+                                         np.generic, FunctionType)):
+            return v
+        # other objects may change without changing their hash
+        raise TypeError
+
+    try:
+        key = (_key(H), float(T), _key(args),
+               _key(vars(opt)) if opt is not None else None)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def floquet_propagator(H, T, args=None, opt=None):
+    """
+    Return a :class:`FloquetPropagator` for `H` with period `T`. Instances
+    are cached on (H, T, args, opt), so repeated calls for the same periodic
+    Hamiltonian reuse the same one-period propagator table. Arguments that
+    cannot be compared by their contents disable the cache.
+
+    Parameters
+    ----------
+
+    H : :class:`qutip.qobj`
+        System Hamiltonian, time-dependent with period `T`.
+
+    T : float
+        The period of the time-dependence of the hamiltonian.
+
+    args : dictionary
+        Dictionary with variables required to evaluate H.
+
+    opt : :class:`qutip.Odeoptions`
+        Options for the ODE solver.
+
+    Returns
+    -------
+
+    U : :class:`FloquetPropagator`
+
+    """
+    key = _floquet_key(H, T, args, opt)
+    if key is not None and key in _floquet_propagator_cache:
+        return _floquet_propagator_cache[key]
+
+    U = FloquetPropagator(H, T, args, opt=opt)
+
+    if key is not None:
+        if len(_floquet_propagator_cache) >= _floquet_propagator_cache_size:
+            # drop the oldest entry
+            del _floquet_propagator_cache[next(iter(_floquet_propagator_cache))]
+        _floquet_propagator_cache[key] = U
+    return U
+
+
 def floquet_modes(H, T, args=None, sort=False):
     """
     Calculate the initial Floquet modes Phi_alpha(0) for a driven system with
@@ -67,7 +253,7 @@ def floquet_modes(H, T, args=None, sort=False):
     """
 
     # get the unitary propagator
-    U = propagator(H, T, [], args)
+    U = floquet_propagator(H, T, args).U(T)
 
     # find the eigenstates for the propagator
     evals, evecs = la.eig(U.full())
@@ -138,7 +324,7 @@ def floquet_modes_t(f_modes_0, f_energies, t, H, T, args=None):
 
     # get the unitary propagator from 0 to t
     if t > 0.0:
-        U = propagator(H, t, [], args)
+        U = floquet_propagator(H, T, args).U(t)
 
         for n in np.arange(len(f_modes_0)):
             f_modes_t.append(U * f_modes_0[n] * exp(1j * f_energies[n] * t))
@@ -188,16 +374,17 @@ def floquet_modes_table(f_modes_0, f_energies, tlist, H, T, args=None):
     # truncate tlist to the driving period
     tlist_period = tlist[np.where(tlist <= T)]
 
-    f_modes_table_t = [[] for t in tlist_period]
+    # sample the unitary propagator at all the table times in one
+    # integration over the period
+    U = _unitary_propagators(H, tlist_period, args)
 
-    opt = Odeoptions()
-    opt.rhs_reuse = True
-
-    for n, f_mode in enumerate(f_modes_0):
-        output = mesolve(H, f_mode, tlist_period, [], [], args, opt)
-        for t_idx, f_state_t in enumerate(output.states):
-            f_modes_table_t[t_idx].append(
-                f_state_t * exp(1j * f_energies[n] * tlist_period[t_idx]))
+    dims = f_modes_0[0].dims
+    Phi_0 = np.hstack([f_mode.full() for f_mode in f_modes_0])
+    f_modes_table_t = []
+    for t_idx, t in enumerate(tlist_period):
+        Phi_t = np.dot(U[:, :, t_idx], Phi_0) * exp(1j * f_energies * t)
+        f_modes_table_t.append([Qobj(Phi_t[:, n:n + 1], dims=dims)
+                                for n in range(len(f_modes_0))])
 
     return f_modes_table_t
 
@@ -417,10 +604,14 @@ def floquet_state_decomposition(f_states, f_energies, psi):
 
 # should be moved to a utility library?
 def _n_thermal(w, w_th):
-    if (w_th > 0) and exp(w / w_th) != 1.0:
-        return 1.0 / (exp(w / w_th) - 1.0)
-    else:
-        return 0.0 * np.ones(np.shape(w))
+    w = np.asarray(w, dtype=float)
+    n = np.zeros(np.shape(w))
+    if w_th > 0:
+        with np.errstate(over='ignore'):
+            x = exp(w / w_th)
+        mask = x != 1.0
+        n[mask] = 1.0 / (x[mask] - 1.0)
+    return n
 
 
 def floquet_master_equation_rates(f_modes_0, f_energies, c_op, H, T,
@@ -494,39 +685,37 @@ def floquet_master_equation_rates(f_modes_0, f_energies, c_op, H, T,
                                               np.linspace(0, T, nT + 1), H, T,
                                               args)
 
-    for t in tlist:
-        # TODO: repeated invocations of floquet_modes_t is
-        # inefficient...  make a and b outer loops and use the mesolve
-        # instead of the propagator.
-
-        #f_modes_t = floquet_modes_t(f_modes_0, f_energies, t, H, T, args)
+    # matrix elements of c_op between all pairs of modes, one time slice at
+    # a time: C[n,a,b] = <phi_a(t_n)| c_op |phi_b(t_n)>
+    c = c_op.full()
+    C = np.zeros((len(tlist), N, N), dtype=complex)
+    for n, t in enumerate(tlist):
         f_modes_t = floquet_modes_t_lookup(f_modes_table_t, t, T)
-        for a in range(N):
-            for b in range(N):
-                k_idx = 0
-                for k in range(-kmax, kmax + 1, 1):
-                    X[a, b, k_idx] += (dT / T) * exp(-1j * k * omega * t) * \
-                        (f_modes_t[a].dag() * c_op * f_modes_t[b])[0, 0]
-                    k_idx += 1
-
-    Heaviside = lambda x: ((np.sign(x) + 1) / 2.0)
-    for a in range(N):
-        for b in range(N):
-            k_idx = 0
-            for k in range(-kmax, kmax + 1, 1):
-                Delta[a, b, k_idx] = f_energies[a] - f_energies[b] + k * omega
-                Gamma[a, b, k_idx] = 2 * pi * Heaviside(Delta[a, b, k_idx]) * \
-                    J_cb(Delta[a, b, k_idx]) * abs(X[a, b, k_idx])**2
-                k_idx += 1
-
-    for a in range(N):
-        for b in range(N):
-            for k in range(-kmax, kmax + 1, 1):
-                k1_idx = k + kmax
-                k2_idx = -k + kmax
-                A[a, b] += Gamma[a, b, k1_idx] + \
-                    _n_thermal(abs(Delta[a, b, k1_idx]), w_th) * \
-                    (Gamma[a, b, k1_idx] + Gamma[b, a, k2_idx])
+        Phi = np.hstack([f_mode.full() for f_mode in f_modes_t])
+        C[n] = np.dot(Phi.conj().T, np.dot(c, Phi))
+
+    # sideband coefficients X[a,b,k] = 1/T int_0^T exp(-i k omega t) C(t) dt,
+    # as a DFT over the time grid: tlist[n] = (n+1)*dT, and t = T is
+    # equivalent to t = 0
+    Ck = np.fft.fft(np.roll(C, 1, axis=0), axis=0) / len(tlist)
+    k = np.arange(-kmax, kmax + 1)
+    X[:] = Ck[k % len(tlist)].transpose(1, 2, 0)
+
+    E = np.asarray(f_energies)
+    Delta[:] = (E[:, np.newaxis, np.newaxis] - E[np.newaxis, :, np.newaxis] +
+                k[np.newaxis, np.newaxis, :] * omega)
+
+    # evaluate the noise spectrum once per distinct sideband frequency
+    w_unique, w_inv = np.unique(Delta, return_inverse=True)
+    J = np.array([J_cb(w) for w in w_unique])[w_inv].reshape(Delta.shape)
+    Heaviside = (np.sign(Delta) + 1) / 2.0
+    Gamma[:] = 2 * pi * Heaviside * J * abs(X)**2
+
+    # A[a,b] = sum_k Gamma[a,b,k] + n_th(|Delta[a,b,k]|) *
+    #                               (Gamma[a,b,k] + Gamma[b,a,-k])
+    Gamma_rev = Gamma.transpose(1, 0, 2)[:, :, ::-1]
+    A[:] = np.sum(Gamma + _n_thermal(abs(Delta), w_th) * (Gamma + Gamma_rev),
+                  axis=2)
 
     return Delta, X, Gamma, A
 
@@ -593,32 +782,29 @@ def floquet_master_equation_tensor(Alist, f_energies):
         Alist = [Alist]
         N, M = np.shape(Alist[0])
 
-    R = Qobj(scipy.sparse.csr_matrix((N * N, N * N)), [[N, N], [N, N]],
-             [N * N, N * N])
-
-    R.data = R.data.tolil()
-    for I in range(N * N):
-        a, b = vec2mat_index(N, I)
-        for J in range(N * N):
-            c, d = vec2mat_index(N, J)
+    # the rates only enter through their sum over coupling operators
+    A = np.sum(Alist, axis=0)
+    A_out = np.sum(A, axis=0)  # A_out[a] = sum_n A[n,a]
+    E = np.asarray(f_energies)
 
-            R.data[I, J] = -1.0j * (f_energies[a] - f_energies[b]) * \
-                (a == c) * (b == d)
+    # element (a,b) of rho has the vectorized index I = a + N * b
+    a, b = np.arange(N * N) % N, np.arange(N * N) // N
 
-            for A in Alist:
-                s1 = s2 = 0
-                for n in range(N):
-                    s1 += A[a, n] * (n == c) * (n == d) - A[n, a] * \
-                        (a == c) * (a == d)
-                    s2 += (A[n, a] + A[n, b]) * (a == c) * (b == d)
+    # diagonal: unitary evolution and dephasing of the coherences
+    diag = -1.0j * (E[a] - E[b]) - 0.5 * (a != b) * (A_out[a] + A_out[b])
 
-                dR = (a == b) * s1 - 0.5 * (1 - (a == b)) * s2
+    # population transfer block between the elements (a,a) and (c,c)
+    P = A - np.diag(A_out)
+    pop = np.arange(N) * (N + 1)
+    rows = np.concatenate((np.arange(N * N), np.repeat(pop, N)))
+    cols = np.concatenate((np.arange(N * N), np.tile(pop, N)))
+    vals = np.concatenate((diag, P.ravel()))
 
-                if dR != 0.0:
-                    R.data[I, J] += dR
+    data = scipy.sparse.coo_matrix((vals, (rows, cols)),
+                                   shape=(N * N, N * N), dtype=complex).tocsr()
+    data.eliminate_zeros()
 
-    R.data = R.data.tocsr()
-    return R
+    return Qobj(data, [[N, N], [N, N]], [N * N, N * N])
 
 
 def floquet_master_equation_steadystate(H, A):
@@ -17,26 +17,28 @@
 #
 ###########################################################################
 
-import sys,os,time,numpy,datetime
+import sys,os,time,numpy,datetime,pickle,itertools,threading
 from numpy.random import RandomState,random_integers
 from scipy import arange,array,cumsum,mean,ndarray,setdiff1d,sort,zeros
 from scipy.integrate import ode
 from scipy.linalg import norm
+from scipy.sparse import csr_matrix
+from numpy import ceil,dot,log,nonzero,ones,real,sqrt
 from qutip.qobj import *
 from qutip.expect import *
 from qutip.states import ket2dm
-from qutip.parfor import parfor
+from qutip.parfor import parfor,pool_shutdown,_pool_get,_pool_broadcast,_pool_shared
 from qutip.odeoptions import Odeoptions
-import qutip.odeconfig as odeconfig
+from qutip.odeconfig import Odeconfig
 from multiprocessing import Pool,cpu_count
 from types import FunctionType
 from qutip.cyQ.cy_mc_funcs import mc_expect,spmv,spmv1d
 from qutip.cyQ.ode_rhs import cyq_ode_rhs
 from qutip.cyQ.codegen import Codegen
+from qutip.rhs_generate import rhs_compile
 from qutip.odedata import Odedata
 from qutip.odechecks import _ode_checks
 import qutip.settings
-from qutip._reset import _reset_odeconfig
 
 def mcsolve(H,psi0,tlist,c_ops,e_ops,ntraj=500,args={},options=Odeoptions()):
     """Monte-Carlo evolution of a state vector :math:`|\psi \\rangle` for a given
@@ -116,103 +118,101 @@ def mcsolve(H,psi0,tlist,c_ops,e_ops,ntraj=500,args={},options=Odeoptions()):
 
     if psi0.type!='ket':
         raise Exception("Initial state must be a state vector.")
-    odeconfig.options=options
+    if options.mc_engine not in ['zvode','block']:
+        raise ValueError("Odeoptions.mc_engine must be 'zvode' or 'block'.")
+    if options.mc_tol>0 and (isinstance(ntraj,(list,ndarray)) or not any(e_ops) or not options.mc_avg):
+        raise ValueError("Odeoptions.mc_tol requires expectation operators, a single ntraj and mc_avg=True.")
+    #solver data for this call, starting from the previously prepared data
+    #when reusing the RHS
+    config=Odeconfig()
+    if options.rhs_reuse:
+        config.load()
+    config.options=options
     #set num_cpus to the value given in qutip.settings if none in Odeoptions
-    if not odeconfig.options.num_cpus:
-        odeconfig.options.num_cpus=qutip.settings.num_cpus
+    if not config.options.num_cpus:
+        config.options.num_cpus=qutip.settings.num_cpus
     #set initial value data
     if options.tidy:
-        odeconfig.psi0=psi0.tidyup(options.atol).full()
+        config.psi0=psi0.tidyup(options.atol).full()
     else:
-        odeconfig.psi0=psi0.full()
-    odeconfig.psi0_dims=psi0.dims
-    odeconfig.psi0_shape=psi0.shape
+        config.psi0=psi0.full()
+    config.psi0_dims=psi0.dims
+    config.psi0_shape=psi0.shape
     #set general items
-    odeconfig.tlist=tlist
+    config.tlist=tlist
     if isinstance(ntraj,(list,ndarray)):
-        odeconfig.ntraj=sort(ntraj)[-1]
+        config.ntraj=sort(ntraj)[-1]
     else:
-        odeconfig.ntraj=ntraj
+        config.ntraj=ntraj
     #set norm finding constants
-    odeconfig.norm_tol=options.norm_tol
-    odeconfig.norm_steps=options.norm_steps
+    config.norm_tol=options.norm_tol
+    config.norm_steps=options.norm_steps
     #----
     
     #----------------------------------------------
     # SETUP ODE DATA IF NONE EXISTS OR NOT REUSING
     #----------------------------------------------
-    if (not options.rhs_reuse) or (not odeconfig.tdfunc):
-        #reset odeconfig collapse and time-dependence flags to default values
-        _reset_odeconfig()
-        
+    if (not options.rhs_reuse) or (not config.tdfunc):
         #check for type of time-dependence (if any)
         time_type,h_stuff,c_stuff=_ode_checks(H,c_ops,'mc')
         h_terms=len(h_stuff[0])+len(h_stuff[1])+len(h_stuff[2])
         c_terms=len(c_stuff[0])+len(c_stuff[1])+len(c_stuff[2])
         #set time_type for use in multiprocessing
-        odeconfig.tflag=time_type
+        config.tflag=time_type
         
         #-Check for PyObjC on Mac platforms
-        if sys.platform=='darwin' and odeconfig.options.gui:
+        if sys.platform=='darwin' and config.options.gui:
             try:
                 import Foundation
             except:
-                odeconfig.options.gui=False
+                config.options.gui=False
 
         #check if running in iPython and using Cython compiling (then no GUI to work around error)
-        if odeconfig.options.gui and odeconfig.tflag in array([1,10,11]):
+        if config.options.gui and config.tflag in array([1,10,11]):
             try:
                 __IPYTHON__
             except:
                 pass
             else:
-                odeconfig.options.gui=False    
+                config.options.gui=False    
         if qutip.settings.qutip_gui=="NONE":
-            odeconfig.options.gui=False
+            config.options.gui=False
 
         #check for collapse operators
         if c_terms>0:
-            odeconfig.cflag=1
+            config.cflag=1
         else:
-            odeconfig.cflag=0
+            config.cflag=0
     
         #Configure data
-        _mc_data_config(H,psi0,h_stuff,c_ops,c_stuff,args,e_ops,options)
-        if odeconfig.tflag in array([1,10,11]): #compile time-depdendent RHS code
-            os.environ['CFLAGS'] = '-O3 -w'
-            import pyximport
-            pyximport.install(setup_args={'include_dirs':[numpy.get_include()]})
-            if odeconfig.tflag in array([1,11]):
-                code = compile('from '+odeconfig.tdname+' import cyq_td_ode_rhs,col_spmv,col_expect', '<string>', 'exec')
-                exec(code, globals())
-                odeconfig.tdfunc=cyq_td_ode_rhs
-                odeconfig.colspmv=col_spmv
-                odeconfig.colexpect=col_expect
-            else:
-                code = compile('from '+odeconfig.tdname+' import cyq_td_ode_rhs', '<string>', 'exec')
-                exec(code, globals())
-                odeconfig.tdfunc=cyq_td_ode_rhs
-            try:
-                os.remove(odeconfig.tdname+".pyx")
-            except:
-                print("Error removing pyx file.  File not found.")
-        elif odeconfig.tflag==0:
-            odeconfig.tdfunc=cyq_ode_rhs
+        _mc_data_config(config,H,psi0,h_stuff,c_ops,c_stuff,args,e_ops,options)
+        if config.tflag in array([1,10,11]): #remove time-depdendent RHS code compiled outside the cache
+            if os.path.exists(config.tdname+".pyx"):
+                os.remove(config.tdname+".pyx")
+        elif config.tflag==0:
+            config.tdfunc=cyq_ode_rhs
+        #keep the prepared data for later calls with rhs_reuse=True
+        config.save()
     else:#setup args for new parameters when rhs_reuse=True and tdfunc is given
         #string based
-        if odeconfig.tflag in array([1,10,11]):
+        if config.tflag in array([1,10,11]):
             if any(args):
-                odeconfig.c_args=[]
-                arg_items=args.items()
+                config.c_args=[]
+                arg_items=list(args.items())
                 for k in range(len(args)):
-                    odeconfig.c_args.append(arg_items[k][1])
+                    config.c_args.append(arg_items[k][1])
         #function based
-        elif odeconfig.tflag in array([2,3,20,22]):
-            odeconfig.h_func_args=args
+        elif config.tflag in array([2,3,20,22]):
+            config.h_func_args=args
     
     
+    if config.options.mc_engine=='block' and config.tflag!=0 and config.c_num!=0:
+        raise ValueError("The 'block' engine of mcsolve requires a constant Hamiltonian and constant collapse operators.")
     #load monte-carlo class
-    mc=_MC_class()
+    if isinstance(ntraj,(list,ndarray)):
+        mc=_MC_class(config,avg_points=ntraj)
+    else:
+        mc=_MC_class(config)
     #RUN THE SIMULATION
     mc.run()
     
@@ -224,13 +224,28 @@ def mcsolve(H,psi0,tlist,c_ops,e_ops,ntraj=500,args={},options=Odeoptions()):
     #-------COLLECT AND RETURN OUTPUT DATA IN ODEDATA OBJECT --------------#
     output=Odedata()
     output.solver='mcsolve'
+    #averages accumulated while the trajectories arrived
+    if mc.stream:
+        if config.e_num==0:
+            dm_dims=[config.psi0_dims[0],config.psi0_dims[0]]
+            dm_shape=[config.psi0_shape[0],config.psi0_shape[0]]
+            output.states=array([Qobj(dm/mc.count,dims=dm_dims,shape=dm_shape) for dm in mc.dm_sum])
+        else:
+            expt_data=[[real(avg[k]) if config.e_ops_isherm[k] else avg[k] for k in range(config.e_num)] for avg in mc.expect_avgs]
+            expt_var=[[var[k] for k in range(config.e_num)] for var in mc.expect_vars]
+            if isinstance(ntraj,(list,ndarray)):
+                output.expect=expt_data
+                output.expect_var=expt_var
+            else:
+                output.expect=[real(mc.expect_mean[k]) if config.e_ops_isherm[k] else mc.expect_mean[k] for k in range(config.e_num)]
+                output.expect_var=[mc.expect_m2[k]/max(mc.count-1,1) for k in range(config.e_num)]
     #state vectors
-    if mc.psi_out is not None and odeconfig.options.mc_avg and odeconfig.cflag:
+    elif mc.psi_out is not None and config.options.mc_avg and config.cflag:
         output.states=parfor(_mc_dm_avg,mc.psi_out.T)
     elif mc.psi_out is not None:
         output.states=mc.psi_out
     #expectation values
-    elif mc.expect_out is not None and odeconfig.cflag and odeconfig.options.mc_avg:#averaging if multiple trajectories
+    elif mc.expect_out is not None and config.cflag and config.options.mc_avg:#averaging if multiple trajectories
         if isinstance(ntraj,int):
             output.expect=mean(mc.expect_out,axis=0)
         elif isinstance(ntraj,(list,ndarray)):
@@ -252,10 +267,14 @@ def mcsolve(H,psi0,tlist,c_ops,e_ops,ntraj=500,args={},options=Odeoptions()):
             output.expect=mc.expect_out
 
     #simulation parameters
-    output.times=odeconfig.tlist
-    output.num_expect=odeconfig.e_num
-    output.num_collapse=odeconfig.c_num
-    output.ntraj=odeconfig.ntraj
+    output.times=config.tlist
+    output.num_expect=config.e_num
+    output.num_collapse=config.c_num
+    if mc.stream and isinstance(ntraj,int):
+        #number of trajectories actually run
+        output.ntraj=mc.count
+    else:
+        output.ntraj=config.ntraj
     output.col_times=mc.collapse_times_out
     output.col_which=mc.which_op_out
     return output
@@ -264,24 +283,45 @@ def mcsolve(H,psi0,tlist,c_ops,e_ops,ntraj=500,args={},options=Odeoptions()):
 #--------------------------------------------------------------
 # MONTE-CARLO CLASS                                           #
 #--------------------------------------------------------------
+#Odeconfig instances of the running mcsolve calls, keyed by a unique token.
+#Worker processes forked by the pool look up their solver data here, workers
+#of the long-lived pool (see pool_start) receive it once by a broadcast and
+#unpickle it on first use.
+_mc_configs={}
+_mc_tokens=itertools.count()
+
 class _MC_class():
     """
     Private class for solving Monte-Carlo evolution from mcsolve
     
     """
-    def __init__(self):
+    def __init__(self,config,avg_points=None):
         
         #-----------------------------------#
         # INIT MC CLASS
         #-----------------------------------#
     
         #----MAIN OBJECT PROPERTIES--------------------#
+        ##holds the Odeconfig instance with the solver data
+        self.config=config
+        ##average trajectories as they arrive instead of storing them
+        self.stream=bool((config.options.mc_stream or config.options.mc_tol>0) and config.options.mc_avg and config.c_num!=0)
+        ##numbers of trajectories at which averages are recorded when streaming
+        if avg_points is None:
+            avg_points=[config.ntraj]
+        self.avg_points=sort(avg_points)
         ##holds instance of the ProgressBar class
         self.bar=None
         ##holds instance of the Pthread class
         self.thread=None
         #Number of completed trajectories
         self.count=0
+        ##number of submitted tasks that have not finished yet
+        self.pending=0
+        ##notified whenever a task finishes
+        self.done=threading.Condition()
+        ##first exception raised by a task
+        self.error=None
         ##step-size for count attribute
         self.step=1
         ##Percent of trajectories completed
@@ -290,13 +330,13 @@ class _MC_class():
         self.level=0.1
         ##times at which to output state vectors or expectation values
         ##number of time steps in tlist
-        self.num_times=len(odeconfig.tlist)
+        self.num_times=len(config.tlist)
         #holds seed for random number generator
         self.seed=None
         #holds expected time to completion
         self.st=None
         #number of cpus to be used 
-        self.cpus=odeconfig.options.num_cpus
+        self.cpus=config.options.num_cpus
         #set output variables, even if they are not used to simplify output code.
         self.psi_out=None
         self.expect_out=[]
@@ -304,90 +344,250 @@ class _MC_class():
         self.which_op_out=None
         
         #FOR EVOLUTION FOR NO COLLAPSE OPERATORS
-        if odeconfig.c_num==0:
-            if odeconfig.e_num==0:
+        if config.c_num==0:
+            if config.e_num==0:
                 ##Output array of state vectors calculated at times in tlist
                 self.psi_out=array([Qobj()]*self.num_times)#preallocate array of Qobjs
-            elif odeconfig.e_num!=0:#no collpase expectation values
+            elif config.e_num!=0:#no collpase expectation values
                 ##List of output expectation values calculated at times in tlist
                 self.expect_out=[]
-                for i in range(odeconfig.e_num):
-                    if odeconfig.e_ops_isherm[i]:#preallocate real array of zeros
+                for i in range(config.e_num):
+                    if config.e_ops_isherm[i]:#preallocate real array of zeros
                         self.expect_out.append(zeros(self.num_times))
                     else:#preallocate complex array of zeros
                         self.expect_out.append(zeros(self.num_times,dtype=complex))
-                    self.expect_out[i][0]=mc_expect(odeconfig.e_ops_data[i],odeconfig.e_ops_ind[i],odeconfig.e_ops_ptr[i],odeconfig.e_ops_isherm[i],odeconfig.psi0)
+                    self.expect_out[i][0]=mc_expect(config.e_ops_data[i],config.e_ops_ind[i],config.e_ops_ptr[i],config.e_ops_isherm[i],config.psi0)
+        
+        #FOR EVOLUTION WITH COLLAPSE OPERATORS, AVERAGED AS THEY ARRIVE
+        elif self.stream:
+            N=config.psi0_shape[0]
+            if config.e_num==0:#running sum of density matrices
+                self.dm_sum=zeros((self.num_times,N,N),dtype=complex)
+            else:#running mean and sum of squared deviations of expectation values
+                self.expect_mean=zeros((config.e_num,self.num_times),dtype=complex)
+                self.expect_m2=zeros((config.e_num,self.num_times))
+                ##averages recorded at each of avg_points
+                self.expect_avgs=[]
+                self.expect_vars=[]
         
         #FOR EVOLUTION WITH COLLAPSE OPERATORS
-        elif odeconfig.c_num!=0:
+        elif config.c_num!=0:
             #preallocate #ntraj arrays for state vectors, collapse times, and which operator
-            self.collapse_times_out=zeros((odeconfig.ntraj),dtype=ndarray)
-            self.which_op_out=zeros((odeconfig.ntraj),dtype=ndarray)
-            if odeconfig.e_num==0:# if no expectation operators, preallocate #ntraj arrays for state vectors
-                self.psi_out=array([zeros((self.num_times),dtype=object) for q in range(odeconfig.ntraj)])#preallocate array of Qobjs
+            self.collapse_times_out=zeros((config.ntraj),dtype=ndarray)
+            self.which_op_out=zeros((config.ntraj),dtype=ndarray)
+            if config.e_num==0:# if no expectation operators, preallocate #ntraj arrays for state vectors
+                self.psi_out=array([zeros((self.num_times),dtype=object) for q in range(config.ntraj)])#preallocate array of Qobjs
             else: #preallocate array of lists for expectation values
-                self.expect_out=[[] for x in range(odeconfig.ntraj)]    
+                self.expect_out=[[] for x in range(config.ntraj)]    
     
     #-------------------------------------------------#
     # CLASS METHODS
     #-------------------------------------------------#
     def callback(self,results):
+        config=self.config
         r=results[0]
-        if odeconfig.e_num==0:#output state-vector    
+        if config.e_num==0:#output state-vector    
             self.psi_out[r]=results[1]
         else:#output expectation values
             self.expect_out[r]=results[1]
         self.collapse_times_out[r]=results[2]
         self.which_op_out[r]=results[3]
-        self.count+=self.step
-        if (not odeconfig.options.gui): #do not use GUI
-            self.percent=self.count/(1.0*odeconfig.ntraj)
-            if self.count/float(odeconfig.ntraj)>=self.level:
+        self.progress(self.step)
+    #-----
+    def stream_callback(self,results):
+        """
+        Merges the partial averages of a chunk of trajectories, see
+        :func:`_mc_chunk_evolve`, into the running averages.
+        """
+        n_chunk,dm_sum,mean_chunk,m2_chunk=results
+        if dm_sum is not None:
+            self.dm_sum+=dm_sum
+        else:#combine means and squared deviations of the two sets
+            n=self.count+n_chunk
+            delta=mean_chunk-self.expect_mean
+            self.expect_mean+=delta*(n_chunk/float(n))
+            self.expect_m2+=m2_chunk+abs(delta)**2*(self.count*n_chunk/float(n))
+            if n in self.avg_points:
+                self.expect_avgs.append(self.expect_mean.copy())
+                self.expect_vars.append(self.expect_m2/max(n-1,1))
+        self.progress(n_chunk)
+    #-----
+    def progress(self,n):
+        """
+        Counts n completed trajectories and prints the progress.
+        """
+        config=self.config
+        self.count+=n
+        if (not config.options.gui): #do not use GUI
+            self.percent=self.count/(1.0*config.ntraj)
+            if self.count/float(config.ntraj)>=self.level:
                 #calls function to determine simulation time remaining
-                self.level=_time_remaining(self.st,odeconfig.ntraj,self.count,self.level)
+                self.level=_time_remaining(self.st,config.ntraj,self.count,self.level)
+    #-----
+    def block_callback(self,results):
+        for r in results:
+            self.callback(r)
+    #-----
+    def task_done(self,callback):
+        """
+        Wraps a task callback so that the finished task is counted.
+        """
+        def _done(results):
+            try:
+                callback(results)
+            finally:
+                with self.done:
+                    self.pending-=1
+                    self.done.notify()
+        return _done
+    #-----
+    def task_failed(self,error):
+        with self.done:
+            if self.error is None:
+                self.error=error
+            self.pending-=1
+            self.done.notify()
+    #-----
+    def submit(self,pl,start,stop,size,token,args,top):
+        """
+        Submits the trajectories start,...,stop-1 to the pool, in chunks
+        of size trajectories for the 'block' engine or when streaming. The
+        tasks are not kept, their results are only passed to the callbacks.
+        """
+        config=self.config
+        chunks=[(nt,min(nt+size,stop)) for nt in range(start,stop,size)]
+        if config.options.mc_engine=='block':
+            #blocks of trajectories advanced together
+            if self.stream:
+                tasks=[(_mc_block_evolve,(first,last,token,args,True),top.stream_callback) for first,last in chunks]
+            else:
+                tasks=[(_mc_block_evolve,(first,last,token,args),top.block_callback) for first,last in chunks]
+        elif self.stream:
+            #workers return partial averages of their chunk
+            tasks=[(_mc_chunk_evolve,(first,last,token,args),top.stream_callback) for first,last in chunks]
+        else:
+            tasks=[(_mc_alg_evolve,(nt,token,args),top.callback) for nt in range(start,stop)]
+        for func,task_args,callback in tasks:
+            with self.done:
+                self.pending+=1
+            pl.apply_async(func,args=task_args,callback=self.task_done(callback),error_callback=self.task_failed)
+    #-----
+    def wait(self):
+        """
+        Waits until all submitted tasks have finished.
+        """
+        with self.done:
+            while self.pending>0:
+                #time out regularly so that a KeyboardInterrupt gets through
+                self.done.wait(0.1)
+        if self.error is not None:
+            raise self.error
+    #-----
+    def converged(self):
+        """
+        Checks if the standard errors of all expectation values are below
+        Odeoptions.mc_tol.
+        """
+        if self.count<2:
+            return False
+        std_err=sqrt(self.expect_m2/((self.count-1)*self.count))
+        return std_err.max()<=self.config.options.mc_tol
     #-----
     def parallel(self,args,top=None): 
+        config=self.config
         self.st=datetime.datetime.now() #set simulation starting time
-        pl=Pool(processes=self.cpus)
-        [pl.apply_async(_mc_alg_evolve,args=(nt,args),callback=top.callback) for nt in range(0,odeconfig.ntraj)]
-        pl.close()
+        #use the long-lived worker pool if one was started
+        pl=_pool_get()
+        payload=None
+        if pl is not None:
+            try:
+                payload=pickle.dumps(config,-1)
+            except Exception:
+                pl=None
+        own_pool=pl is None
+        #register the solver data before forking so that the workers
+        #inherit it without pickling the RHS functions, the tasks only
+        #carry the token
+        token=(os.getpid(),next(_mc_tokens))
+        _mc_configs[token]=config
         try:
-            pl.join()
-        except KeyboardInterrupt:
-            print("Cancel all MC threads on keyboard interrupt")
-            pl.terminate()
-            pl.join()
+            if own_pool:
+                pl=Pool(processes=self.cpus)
+            else:
+                #send the solver data to each worker once
+                _pool_broadcast(('mcsolve',token),payload)
+            #streamed averages are recorded at each of avg_points
+            points=self.avg_points if self.stream else None
+            try:
+                if config.options.mc_tol>0:
+                    #submit batches of trajectories until the expectation
+                    #values have converged or ntraj is reached
+                    batch=max(int(ceil(0.1*config.ntraj)),self.cpus)
+                    size=_mc_chunk_size(config,self.cpus,batch,points)
+                    #whole chunks per batch, so that the averages are
+                    #recorded at the requested numbers of trajectories
+                    batch=int(ceil(batch/float(size)))*size
+                    for start in range(0,config.ntraj,batch):
+                        self.submit(pl,start,min(start+batch,config.ntraj),size,token,args,top)
+                        self.wait()
+                        if self.converged():
+                            break
+                else:
+                    size=_mc_chunk_size(config,self.cpus,config.ntraj,points)
+                    self.submit(pl,0,config.ntraj,size,token,args,top)
+                    self.wait()
+                if own_pool:
+                    pl.close()
+                    pl.join()
+            except KeyboardInterrupt:
+                print("Cancel all MC threads on keyboard interrupt")
+                pl.terminate()
+                if own_pool:
+                    pl.join()
+                else:
+                    pool_shutdown()
+            except Exception:
+                if own_pool:
+                    pl.terminate()
+                    pl.join()
+                raise
+        finally:
+            del _mc_configs[token]
+            if not own_pool and _pool_get() is pl:
+                #remove the solver data from the workers
+                _pool_broadcast(('mcsolve',token),None)
         return
     #-----
     def run(self):
-        if odeconfig.c_num==0:
-            if odeconfig.ntraj!=1:#check if ntraj!=1 which is pointless for no collapse operators
-                odeconfig.ntraj=1
+        config=self.config
+        if config.c_num==0:
+            if config.ntraj!=1:#check if ntraj!=1 which is pointless for no collapse operators
+                config.ntraj=1
                 print('No collapse operators specified.\nRunning a single trajectory only.\n')
-            if odeconfig.e_num==0:# return psi Qobj at each requested time 
-                self.psi_out=_no_collapse_psi_out(self.num_times,self.psi_out)
+            if config.e_num==0:# return psi Qobj at each requested time 
+                self.psi_out=_no_collapse_psi_out(config,self.num_times,self.psi_out)
             else:# return expectation values of requested operators
-                self.expect_out=_no_collapse_expect_out(self.num_times,self.expect_out)
-        elif odeconfig.c_num!=0:
-            self.seed=random_integers(1e8,size=odeconfig.ntraj)
-            if odeconfig.e_num==0:
+                self.expect_out=_no_collapse_expect_out(config,self.num_times,self.expect_out)
+        elif config.c_num!=0:
+            self.seed=random_integers(1e8,size=config.ntraj)
+            if config.e_num==0:
                 mc_alg_out=zeros((self.num_times),dtype=ndarray)
-                if odeconfig.options.mc_avg: #output is averaged states, so use dm
-                    mc_alg_out[0]=odeconfig.psi0*odeconfig.psi0.conj().T
+                if config.options.mc_avg: #output is averaged states, so use dm
+                    mc_alg_out[0]=config.psi0*config.psi0.conj().T
                 else: #output is not averaged, so write state vectors
-                    mc_alg_out[0]=odeconfig.psi0
+                    mc_alg_out[0]=config.psi0
             else:
                 #PRE-GENERATE LIST OF EXPECTATION VALUES
                 mc_alg_out=[]
-                for i in range(odeconfig.e_num):
-                    if odeconfig.e_ops_isherm[i]:#preallocate real array of zeros
+                for i in range(config.e_num):
+                    if config.e_ops_isherm[i]:#preallocate real array of zeros
                         mc_alg_out.append(zeros(self.num_times))
                     else:#preallocate complex array of zeros
                         mc_alg_out.append(zeros(self.num_times,dtype=complex))
-                    mc_alg_out[i][0]=mc_expect(odeconfig.e_ops_data[i],odeconfig.e_ops_ind[i],odeconfig.e_ops_ptr[i],odeconfig.e_ops_isherm[i],odeconfig.psi0)
+                    mc_alg_out[i][0]=mc_expect(config.e_ops_data[i],config.e_ops_ind[i],config.e_ops_ptr[i],config.e_ops_isherm[i],config.psi0)
             #set arguments for input to monte-carlo
-            args=(mc_alg_out,odeconfig.options,odeconfig.tlist,self.num_times,self.seed)
-            if not odeconfig.options.gui:
+            args=(mc_alg_out,config.options,config.tlist,self.num_times,self.seed)
+            if not config.options.gui:
                 self.parallel(args,self)
             else:
                 if qutip.settings.qutip_gui=="PYSIDE":
@@ -399,7 +599,7 @@ class _MC_class():
                 if not app:#create QApplication if it doesnt exist
                     app = QtGui.QApplication(sys.argv)
                 thread=Pthread(target=self.parallel,args=args,top=self)
-                self.bar=ProgressBar(self,thread,odeconfig.ntraj,self.cpus)
+                self.bar=ProgressBar(self,thread,config.ntraj,self.cpus)
                 QtCore.QTimer.singleShot(0,self.bar.run)
                 self.bar.show()
                 self.bar.activateWindow()
@@ -413,30 +613,30 @@ class _MC_class():
 # CODES FOR PYTHON FUNCTION BASED TIME-DEPENDENT RHS
 #----------------------------------------------------
 #RHS of ODE for time-dependent systems with no collapse operators
-def _tdRHS(t,psi):
-    h_data=odeconfig.h_func(t,odeconfig.h_func_args).data
+def _tdRHS(t,psi,config):
+    h_data=config.h_func(t,config.h_func_args).data
     return spmv1d(-1.0j*h_data.data,h_data.indices,h_data.indptr,psi)
 
 #RHS of ODE for constant Hamiltonian and at least one function based collapse operator
-def _cRHStd(t,psi):
-    sys=cyq_ode_rhs(t,psi,odeconfig.h_data,odeconfig.h_ind,odeconfig.h_ptr)
-    col=array([abs(odeconfig.c_funcs[j](t,odeconfig.c_func_args))**2*spmv1d(odeconfig.n_ops_data[j],odeconfig.n_ops_ind[j],odeconfig.n_ops_ptr[j],psi) for j in odeconfig.c_td_inds])
+def _cRHStd(t,psi,config):
+    sys=cyq_ode_rhs(t,psi,config.h_data,config.h_ind,config.h_ptr)
+    col=array([abs(config.c_funcs[j](t,config.c_func_args))**2*spmv1d(config.n_ops_data[j],config.n_ops_ind[j],config.n_ops_ptr[j],psi) for j in config.c_td_inds])
     return sys-0.5*sum(col,0)
 
 #RHS of ODE for function-list based Hamiltonian
-def _tdRHStd(t,psi):
-    const_term=spmv1d(odeconfig.h_data,odeconfig.h_ind,odeconfig.h_ptr,psi)
-    h_func_term=array([odeconfig.h_funcs[j](t,odeconfig.h_func_args)*spmv1d(odeconfig.h_td_data[j],odeconfig.h_td_ind[j],odeconfig.h_td_ptr[j],psi) for j in odeconfig.h_td_inds])
-    col_func_terms=array([abs(odeconfig.c_funcs[j](t,odeconfig.c_func_args))**2*spmv1d(odeconfig.n_ops_data[j],odeconfig.n_ops_ind[j],odeconfig.n_ops_ptr[j],psi) for j in odeconfig.c_td_inds])
+def _tdRHStd(t,psi,config):
+    const_term=spmv1d(config.h_data,config.h_ind,config.h_ptr,psi)
+    h_func_term=array([config.h_funcs[j](t,config.h_func_args)*spmv1d(config.h_td_data[j],config.h_td_ind[j],config.h_td_ptr[j],psi) for j in config.h_td_inds])
+    col_func_terms=array([abs(config.c_funcs[j](t,config.c_func_args))**2*spmv1d(config.n_ops_data[j],config.n_ops_ind[j],config.n_ops_ptr[j],psi) for j in config.c_td_inds])
     return const_term-1.0j*sum(h_func_term,0)-0.5*sum(col_func_terms,0)
 
 #RHS of ODE for python function Hamiltonian
-def _pyRHSc(t,psi):
-    h_func_data=odeconfig.h_funcs(t,odeconfig.h_func_args).data
+def _pyRHSc(t,psi,config):
+    h_func_data=config.h_funcs(t,config.h_func_args).data
     h_func_term=-1.0j*spmv1d(h_func_data.data,h_func_data.indices,h_func_data.indptr,psi)
     const_col_term=0
-    if len(odeconfig.c_const_inds)>0:    
-        const_col_term=spmv1d(odeconfig.h_data,odeconfig.h_ind,odeconfig.h_ptr,psi)
+    if len(config.c_const_inds)>0:    
+        const_col_term=spmv1d(config.h_data,config.h_ind,config.h_ptr,psi)
     return h_func_term+const_col_term
 #----------------------------------------------------
 # END PYTHON FUNCTION RHS
@@ -444,31 +644,34 @@ def _pyRHSc(t,psi):
 
 
 ######---return psi at requested times for no collapse operators---######
-def _no_collapse_psi_out(num_times,psi_out):
+def _no_collapse_psi_out(config,num_times,psi_out):
     ##Calculates state vectors at times tlist if no collapse AND no expectation values are given.
     #
-    opt=odeconfig.options
-    if odeconfig.tflag in array([1,10,11]):
-        ODE=ode(odeconfig.tdfunc)
-        code = compile('ODE.set_f_params('+odeconfig.string+')', '<string>', 'exec')
+    opt=config.options
+    if config.tflag in array([1,10,11]):
+        ODE=ode(config.tdfunc)
+        code = compile('ODE.set_f_params('+config.string+')', '<string>', 'exec')
         exec(code)
-    elif odeconfig.tflag==2:
+    elif config.tflag==2:
         ODE=ode(_cRHStd)
-    elif odeconfig.tflag in array([20,22]):
+        ODE.set_f_params(config)
+    elif config.tflag in array([20,22]):
         ODE=ode(_tdRHStd)
-    elif odeconfig.tflag==3:
+        ODE.set_f_params(config)
+    elif config.tflag==3:
         ODE=ode(_pyRHSc)
+        ODE.set_f_params(config)
     else:
         ODE = ode(cyq_ode_rhs)
-        ODE.set_f_params(odeconfig.h_data, odeconfig.h_ind, odeconfig.h_ptr)
+        ODE.set_f_params(config.h_data, config.h_ind, config.h_ptr)
         
     ODE.set_integrator('zvode',method=opt.method,order=opt.order,atol=opt.atol,rtol=opt.rtol,nsteps=opt.nsteps,first_step=opt.first_step,min_step=opt.min_step,max_step=opt.max_step) #initialize ODE solver for RHS
-    ODE.set_initial_value(odeconfig.psi0,odeconfig.tlist[0]) #set initial conditions
-    psi_out[0]=Qobj(odeconfig.psi0,odeconfig.psi0_dims,odeconfig.psi0_shape,'ket')
+    ODE.set_initial_value(config.psi0,config.tlist[0]) #set initial conditions
+    psi_out[0]=Qobj(config.psi0,config.psi0_dims,config.psi0_shape,'ket')
     for k in range(1,num_times):
-        ODE.integrate(odeconfig.tlist[k],step=0) #integrate up to tlist[k]
+        ODE.integrate(config.tlist[k],step=0) #integrate up to tlist[k]
         if ODE.successful():
-            psi_out[k]=Qobj(ODE.y/norm(ODE.y,2),odeconfig.psi0_dims,odeconfig.psi0_shape,'ket')
+            psi_out[k]=Qobj(ODE.y/norm(ODE.y,2),config.psi0_dims,config.psi0_shape,'ket')
         else:
             raise ValueError('Error in ODE solver')
     return psi_out
@@ -476,47 +679,68 @@ def _no_collapse_psi_out(num_times,psi_out):
 
 
 ######---return expectation values at requested times for no collapse operators---######
-def _no_collapse_expect_out(num_times,expect_out):
+def _no_collapse_expect_out(config,num_times,expect_out):
     ##Calculates xpect.values at times tlist if no collapse ops. given
     #  
     #------------------------------------
-    opt=odeconfig.options
-    if odeconfig.tflag in array([1,10,11]):
-        ODE=ode(odeconfig.tdfunc)
-        code = compile('ODE.set_f_params('+odeconfig.string+')', '<string>', 'exec')
+    opt=config.options
+    if config.tflag in array([1,10,11]):
+        ODE=ode(config.tdfunc)
+        code = compile('ODE.set_f_params('+config.string+')', '<string>', 'exec')
         exec(code)
-    elif odeconfig.tflag==2:
+    elif config.tflag==2:
         ODE=ode(_cRHStd)
-    elif odeconfig.tflag in array([20,22]):
+        ODE.set_f_params(config)
+    elif config.tflag in array([20,22]):
         ODE=ode(_tdRHStd)
-    elif odeconfig.tflag==3:
+        ODE.set_f_params(config)
+    elif config.tflag==3:
         ODE=ode(_pyRHSc)
+        ODE.set_f_params(config)
     else:
         ODE = ode(cyq_ode_rhs)
-        ODE.set_f_params(odeconfig.h_data, odeconfig.h_ind, odeconfig.h_ptr)
+        ODE.set_f_params(config.h_data, config.h_ind, config.h_ptr)
     
     ODE.set_integrator('zvode',method=opt.method,order=opt.order,atol=opt.atol,rtol=opt.rtol,nsteps=opt.nsteps,first_step=opt.first_step,min_step=opt.min_step,max_step=opt.max_step) #initialize ODE solver for RHS
-    ODE.set_initial_value(odeconfig.psi0,odeconfig.tlist[0]) #set initial conditions
-    for jj in range(odeconfig.e_num):
-        expect_out[jj][0]=mc_expect(odeconfig.e_ops_data[jj],odeconfig.e_ops_ind[jj],odeconfig.e_ops_ptr[jj],odeconfig.e_ops_isherm[jj],odeconfig.psi0)
+    ODE.set_initial_value(config.psi0,config.tlist[0]) #set initial conditions
+    for jj in range(config.e_num):
+        expect_out[jj][0]=mc_expect(config.e_ops_data[jj],config.e_ops_ind[jj],config.e_ops_ptr[jj],config.e_ops_isherm[jj],config.psi0)
     for k in range(1,num_times):
-        ODE.integrate(odeconfig.tlist[k],step=0) #integrate up to tlist[k]
+        ODE.integrate(config.tlist[k],step=0) #integrate up to tlist[k]
         if ODE.successful():
             state=ODE.y/norm(ODE.y)
-            for jj in range(odeconfig.e_num):
-                expect_out[jj][k]=mc_expect(odeconfig.e_ops_data[jj],odeconfig.e_ops_ind[jj],odeconfig.e_ops_ptr[jj],odeconfig.e_ops_isherm[jj],state)
+            for jj in range(config.e_num):
+                expect_out[jj][k]=mc_expect(config.e_ops_data[jj],config.e_ops_ind[jj],config.e_ops_ptr[jj],config.e_ops_isherm[jj],state)
         else:
             raise ValueError('Error in ODE solver')
     return expect_out #return times and expectiation values
 #------------------------------------------------------------------------
 
 
+def _mc_config(token):
+    """
+    Returns the Odeconfig instance of a running mcsolve call inside a worker.
+    """
+    if token not in _mc_configs:
+        #worker of the long-lived pool, the data of each running call is
+        #broadcast under its own token
+        payload=_pool_shared.get(('mcsolve',token))
+        if payload is None:
+            raise Exception("Solver data of the Monte-Carlo run was not sent to this worker.")
+        #drop the solver data of calls that have finished
+        for old in [t for t in _mc_configs if ('mcsolve',t) not in _pool_shared]:
+            del _mc_configs[old]
+        _mc_configs[token]=pickle.loads(payload)
+    return _mc_configs[token]
+
+
 #---single-trajectory for monte-carlo---          
-def _mc_alg_evolve(nt,args):
+def _mc_alg_evolve(nt,token,args):
     """
     Monte-Carlo algorithm returning state-vector or expectation values at times tlist for a single trajectory.
     """
     #get input data
+    config=_mc_config(token)
     mc_alg_out,opt,tlist,num_times,seeds=args
     
     collapse_times=[] #times at which collapse occurs
@@ -527,28 +751,31 @@ def _mc_alg_evolve(nt,args):
     rand_vals=prng.rand(2)#first rand is collapse norm, second is which operator
     
     #CREATE ODE OBJECT CORRESPONDING TO DESIRED TIME-DEPENDENCE
-    if odeconfig.tflag in array([1,10,11]):
-        ODE=ode(odeconfig.tdfunc)
-        code = compile('ODE.set_f_params('+odeconfig.string+')', '<string>', 'exec')
+    if config.tflag in array([1,10,11]):
+        ODE=ode(config.tdfunc)
+        code = compile('ODE.set_f_params('+config.string+')', '<string>', 'exec')
         exec(code)
-    elif odeconfig.tflag==2:
+    elif config.tflag==2:
         ODE=ode(_cRHStd)
-    elif odeconfig.tflag in array([20,22]):
+        ODE.set_f_params(config)
+    elif config.tflag in array([20,22]):
         ODE=ode(_tdRHStd)
-    elif odeconfig.tflag==3:
+        ODE.set_f_params(config)
+    elif config.tflag==3:
         ODE=ode(_pyRHSc)
+        ODE.set_f_params(config)
     else:
         ODE = ode(cyq_ode_rhs)
-        ODE.set_f_params(odeconfig.h_data, odeconfig.h_ind, odeconfig.h_ptr)
+        ODE.set_f_params(config.h_data, config.h_ind, config.h_ptr)
 
     #initialize ODE solver for RHS
     ODE.set_integrator('zvode',method=opt.method,order=opt.order,atol=opt.atol,rtol=opt.rtol,nsteps=opt.nsteps,
                         first_step=opt.first_step,min_step=opt.min_step,max_step=opt.max_step)
     
     #set initial conditions
-    ODE.set_initial_value(odeconfig.psi0,tlist[0])
+    ODE.set_initial_value(config.psi0,tlist[0])
     #make array for collapse operator inds
-    cinds=arange(odeconfig.c_num)
+    cinds=arange(config.c_num)
     
     #RUN ODE UNTIL EACH TIME IN TLIST
     for k in range(1,num_times):
@@ -570,7 +797,7 @@ def _mc_alg_evolve(nt,args):
                 #---------------------------------------------------
                 ii=0
                 t_final=ODE.t
-                while ii < odeconfig.norm_steps:
+                while ii < config.norm_steps:
                     ii+=1
                     #t_guess=t_prev+(rand_vals[0]-norm2_prev)/(norm2_psi-norm2_prev)*(t_final-t_prev)
                     t_guess=t_prev+log(norm2_prev/rand_vals[0])/log(norm2_prev/norm2_psi)*(t_final-t_prev)
@@ -579,7 +806,7 @@ def _mc_alg_evolve(nt,args):
                     if not ODE.successful():
                         raise Exception("ZVODE failed after adjusting step size!")
                     norm2_guess=norm(ODE.y,2)**2
-                    if abs(rand_vals[0]-norm2_guess) < odeconfig.norm_tol*rand_vals[0]:
+                    if abs(rand_vals[0]-norm2_guess) < config.norm_tol*rand_vals[0]:
                         break
                     elif (norm2_guess < rand_vals[0]):
                         # t_guess is still > t_jump
@@ -590,39 +817,39 @@ def _mc_alg_evolve(nt,args):
                         t_prev=t_guess
                         y_prev=ODE.y
                         norm2_prev=norm2_guess
-                if ii > odeconfig.norm_steps:
+                if ii > config.norm_steps:
                     raise Exception("Norm tolerance not reached. Increase accuracy of ODE solver or Odeoptions.norm_steps.")
                 #---------------------------------------------------
                 collapse_times.append(ODE.t)
                 #some string based collapse operators
-                if odeconfig.tflag in array([1,11]):
-                    n_dp=[mc_expect(odeconfig.n_ops_data[i],odeconfig.n_ops_ind[i],odeconfig.n_ops_ptr[i],1,ODE.y) for i in odeconfig.c_const_inds]
+                if config.tflag in array([1,11]):
+                    n_dp=[mc_expect(config.n_ops_data[i],config.n_ops_ind[i],config.n_ops_ptr[i],1,ODE.y) for i in config.c_const_inds]
                     _locals = locals()
-                    exec(odeconfig.col_expect_code, globals(), _locals) #calculates the expectation values for time-dependent norm collapse operators
+                    exec(config.col_expect_code, globals(), _locals) #calculates the expectation values for time-dependent norm collapse operators
                     n_dp=array(_locals['n_dp'])
                 
                 #some Python function based collapse operators
-                elif odeconfig.tflag in array([2,20,22]):
-                    n_dp=[mc_expect(odeconfig.n_ops_data[i],odeconfig.n_ops_ind[i],odeconfig.n_ops_ptr[i],1,ODE.y) for i in odeconfig.c_const_inds]
-                    n_dp+=[abs(odeconfig.c_funcs[i](ODE.t,odeconfig.c_func_args))**2*mc_expect(odeconfig.n_ops_data[i],odeconfig.n_ops_ind[i],odeconfig.n_ops_ptr[i],1,ODE.y) for i in odeconfig.c_td_inds]
+                elif config.tflag in array([2,20,22]):
+                    n_dp=[mc_expect(config.n_ops_data[i],config.n_ops_ind[i],config.n_ops_ptr[i],1,ODE.y) for i in config.c_const_inds]
+                    n_dp+=[abs(config.c_funcs[i](ODE.t,config.c_func_args))**2*mc_expect(config.n_ops_data[i],config.n_ops_ind[i],config.n_ops_ptr[i],1,ODE.y) for i in config.c_td_inds]
                     n_dp=array(n_dp)
                 #all constant collapse operators.
                 else:    
-                    n_dp=array([mc_expect(odeconfig.n_ops_data[i],odeconfig.n_ops_ind[i],odeconfig.n_ops_ptr[i],1,ODE.y) for i in range(odeconfig.c_num)])
+                    n_dp=array([mc_expect(config.n_ops_data[i],config.n_ops_ind[i],config.n_ops_ptr[i],1,ODE.y) for i in range(config.c_num)])
                 
                 #determine which operator does collapse
                 kk=cumsum(n_dp/sum(n_dp))
                 j=cinds[kk>=rand_vals[1]][0]
                 which_oper.append(j) #record which operator did collapse
-                if j in odeconfig.c_const_inds:
-                    state=spmv(odeconfig.c_ops_data[j],odeconfig.c_ops_ind[j],odeconfig.c_ops_ptr[j],ODE.y)
+                if j in config.c_const_inds:
+                    state=spmv(config.c_ops_data[j],config.c_ops_ind[j],config.c_ops_ptr[j],ODE.y)
                 else:
-                    if odeconfig.tflag in array([1,11]):
+                    if config.tflag in array([1,11]):
                         _locals = locals()
-                        exec(odeconfig.col_spmv_code, globals(), _locals)#calculates the state vector for  collapse by a time-dependent collapse operator
+                        exec(config.col_spmv_code, globals(), _locals)#calculates the state vector for  collapse by a time-dependent collapse operator
                         state = _locals['state']
                     else:
-                        state=odeconfig.c_funcs[j](ODE.t,odeconfig.c_func_args)*spmv(odeconfig.c_ops_data[j],odeconfig.c_ops_ind[j],odeconfig.c_ops_ptr[j],ODE.y)
+                        state=config.c_funcs[j](ODE.t,config.c_func_args)*spmv(config.c_ops_data[j],config.c_ops_ind[j],config.c_ops_ptr[j],ODE.y)
                 state=state/norm(state,2)
                 ODE.set_initial_value(state,ODE.t)
                 rand_vals=prng.rand(2)
@@ -630,27 +857,285 @@ def _mc_alg_evolve(nt,args):
         
         ###--after while loop--####
         out_psi=ODE.y/norm(ODE.y,2)
-        if odeconfig.e_num==0:
-            if odeconfig.options.mc_avg:            
+        if config.e_num==0:
+            if config.options.mc_avg:            
                 mc_alg_out[k]=out_psi*out_psi.conj().T
             else:			
                 mc_alg_out[k]=out_psi
         else:
-            for jj in range(odeconfig.e_num):
-                mc_alg_out[jj][k]=mc_expect(odeconfig.e_ops_data[jj],odeconfig.e_ops_ind[jj],odeconfig.e_ops_ptr[jj],odeconfig.e_ops_isherm[jj],out_psi)
+            for jj in range(config.e_num):
+                mc_alg_out[jj][k]=mc_expect(config.e_ops_data[jj],config.e_ops_ind[jj],config.e_ops_ptr[jj],config.e_ops_isherm[jj],out_psi)
     
     #RETURN VALUES
-    if odeconfig.e_num==0:
-        if odeconfig.options.mc_avg:		
-            mc_alg_out=array([Qobj(k,[odeconfig.psi0_dims[0],odeconfig.psi0_dims[0]],[odeconfig.psi0_shape[0],odeconfig.psi0_shape[0]],fast='mc-dm') for k in mc_alg_out])		
+    if config.e_num==0:
+        if config.options.mc_avg:		
+            mc_alg_out=array([Qobj(k,[config.psi0_dims[0],config.psi0_dims[0]],[config.psi0_shape[0],config.psi0_shape[0]],fast='mc-dm') for k in mc_alg_out])		
         else:        
-            mc_alg_out=array([Qobj(k,odeconfig.psi0_dims,odeconfig.psi0_shape,fast='mc') for k in mc_alg_out])
+            mc_alg_out=array([Qobj(k,config.psi0_dims,config.psi0_shape,fast='mc') for k in mc_alg_out])
         return nt,mc_alg_out,array(collapse_times),array(which_oper)
     else:
         return nt,mc_alg_out,array(collapse_times),array(which_oper)
 #------------------------------------------------------------------------------------------
 
 
+#---chunk of trajectories for streamed monte-carlo---
+def _mc_chunk_evolve(first,last,token,args):
+    """
+    Runs the trajectories first,...,last-1 with :func:`_mc_alg_evolve` and
+    returns their partial averages instead of the trajectories.
+
+    Returns the number of trajectories together with either the sum of
+    their density matrices at each time, or the mean and the sum of squared
+    deviations from the mean of the expectation values (None otherwise).
+    """
+    config=_mc_config(token)
+    num_times=args[3]
+    if config.e_num==0:
+        N=config.psi0_shape[0]
+        dm_sum=zeros((num_times,N,N),dtype=complex)
+        for nt in range(first,last):
+            states=_mc_alg_evolve(nt,token,args)[1]
+            for k in range(num_times):
+                dm_sum[k]+=states[k].full()
+        return last-first,dm_sum,None,None
+    #running mean and squared deviations, updated per trajectory
+    expect_mean=zeros((config.e_num,num_times),dtype=complex)
+    expect_m2=zeros((config.e_num,num_times))
+    for n,nt in enumerate(range(first,last),1):
+        expt=array(_mc_alg_evolve(nt,token,args)[1],dtype=complex)
+        delta=expt-expect_mean
+        expect_mean+=delta/n
+        expect_m2+=real(delta*(expt-expect_mean).conj())
+    return last-first,None,expect_mean,expect_m2
+
+
+#---block of trajectories for monte-carlo---
+def _mc_chunk_size(config,cpus,ntraj,avg_points=None):
+    """
+    Number of trajectories in each task of the 'block' engine and of
+    streamed runs, when ntraj trajectories are shared by cpus workers.
+    """
+    if config.options.mc_block_size>0:
+        size=int(config.options.mc_block_size)
+    else:
+        size=max(1,int(ceil(ntraj/float(max(cpus,1)))))
+    if avg_points is not None and len(avg_points)>1:
+        #averages are recorded at each of avg_points, which must therefore
+        #be multiples of the chunk size
+        g=0
+        for p in avg_points:
+            p=int(p)
+            while p:
+                g,p=p,g%p
+        reduced=max([d for d in range(1,min(size,g)+1) if g%d==0])
+        if config.options.mc_block_size>0 and reduced<size:
+            print('mc_block_size='+str(size)+' does not divide the numbers of trajectories '+
+                  'in ntraj.\nUsing chunks of '+str(reduced)+' trajectories instead.\n')
+        size=reduced
+    return size
+
+
+#Dormand-Prince 5(4) coefficients used by the 'block' engine: stage
+#coefficients, weights of the 5th order solution and error weights
+_dp_a=[[],[1/5.],[3/40.,9/40.],[44/45.,-56/15.,32/9.],
+       [19372/6561.,-25360/2187.,64448/6561.,-212/729.],
+       [9017/3168.,-355/33.,46732/5247.,49/176.,-5103/18656.],
+       [35/384.,0.,500/1113.,125/192.,-2187/6784.,11/84.]]
+_dp_e=[71/57600.,0.,-71/16695.,71/1920.,-17253/339200.,22/525.,-1/40.]
+
+
+def _block_rk_step(A,Y,F,h):
+    """
+    One Dormand-Prince step of dY/dt=AY for all columns of Y at once, with
+    F=AY and the step sizes h of the columns. Returns the new states, their
+    derivatives and the local error estimate.
+    """
+    K=[F]
+    for i in range(1,7):
+        Yi=Y+h*sum([a*k for a,k in zip(_dp_a[i],K) if a!=0])
+        K.append(A*Yi)
+    #the last stage is evaluated at the 5th order solution
+    err=h*sum([e*k for e,k in zip(_dp_e,K) if e!=0])
+    return Yi,K[6],err
+
+
+def _block_hermite(Y0,F0,Y1,F1,h,theta):
+    """
+    Cubic Hermite interpolation of the columns of a step of size h at the
+    fractions theta of the step.
+    """
+    theta2=theta**2;theta3=theta2*theta
+    return ((2*theta3-3*theta2+1)*Y0+(theta3-2*theta2+theta)*h*F0+
+            (3*theta2-2*theta3)*Y1+(theta3-theta2)*h*F1)
+
+
+def _block_jump_times(Y0,F0,Y1,F1,h,rand_norm,norm_tol):
+    """
+    Fractions of the step at which the squared norms of the columns reach
+    rand_norm, found together for all columns on the interpolated states.
+    Returns the fractions and the interpolated states.
+    """
+    lo=zeros(len(h));hi=ones(len(h))
+    norm2_lo=(abs(Y0)**2).sum(axis=0);norm2_hi=(abs(Y1)**2).sum(axis=0)
+    for ii in range(50):
+        #the norm decays close to exponentially, so interpolate its log,
+        #with a bisection every third iteration to shrink the bracket
+        if ii%3==2:
+            theta=0.5*(lo+hi)
+        else:
+            theta=lo+(hi-lo)*log(norm2_lo/rand_norm)/log(norm2_lo/numpy.maximum(norm2_hi,1e-300))
+        Y_guess=_block_hermite(Y0,F0,Y1,F1,h,theta)
+        norm2_guess=(abs(Y_guess)**2).sum(axis=0)
+        if (abs(norm2_guess-rand_norm)<norm_tol*rand_norm).all():
+            break
+        below=norm2_guess<rand_norm
+        hi=numpy.where(below,theta,hi);norm2_hi=numpy.where(below,norm2_guess,norm2_hi)
+        lo=numpy.where(below,lo,theta);norm2_lo=numpy.where(below,norm2_lo,norm2_guess)
+    return theta,Y_guess
+
+
+def _mc_block_evolve(first,last,token,args,stream=False):
+    """
+    Monte-Carlo algorithm for a constant Hamiltonian and constant collapse
+    operators that advances the trajectories first,...,last-1 together.
+
+    The states of the block are the columns of a dense N x K array that is
+    advanced with adaptive Dormand-Prince steps shared by all columns. Since
+    the norm of every column decreases monotonically, the columns whose norm
+    fell below their random threshold during a step are the ones that jumped.
+    Their collapse times are found together on the interpolated states, the
+    collapses are applied with column masks, and these columns continue from
+    their collapse times until they catch up with the others.
+
+    Returns a list with one entry per trajectory in the same format as
+    :func:`_mc_alg_evolve`, or the partial averages of the block in the
+    format of :func:`_mc_chunk_evolve` when stream is True.
+    """
+    #get input data
+    config=_mc_config(token)
+    mc_alg_out,opt,tlist,num_times,seeds=args
+    trajs=arange(first,last)
+    ntr=len(trajs)
+    N=config.psi0_shape[0]
+    
+    #SEED AND RNG AND GENERATE
+    #one stream per trajectory, as in _mc_alg_evolve, so that the results
+    #do not depend on how the trajectories are split into blocks
+    prngs=[RandomState(seeds[nt]) for nt in trajs]
+    rand_vals=array([prng.rand(2) for prng in prngs]).T#first row is collapse norm, second is which operator
+    
+    #generator of the non-Hermitian evolution (-iH_eff) and collapse operators
+    A=csr_matrix((config.h_data,config.h_ind,config.h_ptr),shape=(N,N))
+    c_ops=[csr_matrix((config.c_ops_data[j],config.c_ops_ind[j],config.c_ops_ptr[j]),shape=(N,N)) for j in range(config.c_num)]
+    n_ops=[csr_matrix((config.n_ops_data[j],config.n_ops_ind[j],config.n_ops_ptr[j]),shape=(N,N)) for j in range(config.c_num)]
+    e_ops=[csr_matrix((config.e_ops_data[j],config.e_ops_ind[j],config.e_ops_ptr[j]),shape=(N,N)) for j in range(config.e_num)]
+    
+    #collapses of the block as (column,time,operator) events
+    col_events=[];time_events=[];oper_events=[]
+    #averaged states are summed over the block instead of being stored
+    dm_stream=config.e_num==0 and stream
+    if dm_stream:
+        dm_sum=zeros((num_times,N,N),dtype=complex)
+    elif config.e_num==0:
+        states_out=zeros((num_times,N,ntr),dtype=complex)
+    else:
+        expect_out=zeros((config.e_num,num_times,ntr),dtype=complex)
+    
+    Y=dot(array(config.psi0,dtype=complex).reshape((N,1)),ones((1,ntr)))
+    F=A*Y
+    #time of each column, columns that jumped lag behind the others
+    T=zeros(ntr)+tlist[0]
+    #initial step from the largest rate of the generator
+    h=opt.first_step if opt.first_step>0 else 0.1/max(abs(A).sum(axis=1).max(),1e-10)
+    for k in range(num_times):
+        steps=0
+        while k>0:
+            cols=nonzero(T<tlist[k])[0]
+            if len(cols)==0:
+                break
+            steps+=1
+            if steps>opt.nsteps:
+                raise Exception("Block engine exceeded nsteps, increase Odeoptions.nsteps.")
+            if opt.max_step>0:
+                h=min(h,opt.max_step)
+            #columns only step up to the output time
+            h_cols=numpy.minimum(h,tlist[k]-T[cols])
+            Y0=Y[:,cols];F0=F[:,cols]
+            Y1,F1,err=_block_rk_step(A,Y0,F0,h_cols)
+            scale=opt.atol+opt.rtol*numpy.maximum(abs(Y0),abs(Y1))
+            err_norm=sqrt(((abs(err)/scale)**2).mean(axis=0)).max()
+            factor=min(5.0,max(0.2,0.9*err_norm**-0.2)) if err_norm>0 else 5.0
+            if err_norm>1:
+                h*=factor
+                continue
+            if h_cols.max()>=h:
+                h*=factor
+            T_new=numpy.where(h_cols<tlist[k]-T[cols],T[cols]+h_cols,tlist[k])
+            #columns whose norm fell below their threshold have jumped
+            jumped=nonzero((abs(Y1)**2).sum(axis=0)<=rand_vals[0,cols])[0]
+            if len(jumped)>0:
+                jcols=cols[jumped]
+                theta,Y_jump=_block_jump_times(Y0[:,jumped],F0[:,jumped],Y1[:,jumped],F1[:,jumped],h_cols[jumped],rand_vals[0,jcols],config.norm_tol)
+                T_new[jumped]=T[jcols]+theta*h_cols[jumped]
+                #determine which operator does collapse
+                n_dp=array([real((Y_jump.conj()*(n_op*Y_jump)).sum(axis=0)) for n_op in n_ops])
+                kk=cumsum(n_dp,axis=0)/n_dp.sum(axis=0)
+                which=numpy.minimum((kk<rand_vals[1,jcols]).sum(axis=0),config.c_num-1)
+                for jj in range(config.c_num):
+                    mask=which==jj
+                    if mask.any():
+                        Y_jump[:,mask]=c_ops[jj]*Y_jump[:,mask]
+                Y_jump=Y_jump/sqrt((abs(Y_jump)**2).sum(axis=0))
+                Y1[:,jumped]=Y_jump
+                F1[:,jumped]=A*Y_jump
+                col_events.append(jcols);time_events.append(T_new[jumped]);oper_events.append(which)
+                for j in jcols:
+                    rand_vals[:,j]=prngs[j].rand(2)
+            Y[:,cols]=Y1;F[:,cols]=F1;T[cols]=T_new
+        #output normalized states or expectation values
+        Y_out=Y/sqrt((abs(Y)**2).sum(axis=0))
+        if dm_stream:
+            dm_sum[k]=dot(Y_out,Y_out.conj().T)
+        elif config.e_num==0:
+            states_out[k]=Y_out
+        else:
+            for jj in range(config.e_num):
+                expect_out[jj,k]=(Y_out.conj()*(e_ops[jj]*Y_out)).sum(axis=0)
+    
+    #RETURN VALUES
+    if dm_stream:
+        return ntr,dm_sum,None,None
+    elif stream:
+        expect_mean=expect_out.mean(axis=2)
+        expect_m2=(abs(expect_out-expect_mean[:,:,None])**2).sum(axis=2)
+        return ntr,None,expect_mean,expect_m2
+    #split the collapse events by trajectory, keeping their order in time
+    if len(col_events)>0:
+        col_events=numpy.concatenate(col_events)
+        time_events=numpy.concatenate(time_events)
+        oper_events=numpy.concatenate(oper_events)
+    else:
+        col_events=zeros(0,dtype=int);time_events=zeros(0);oper_events=zeros(0,dtype=int)
+    order=numpy.argsort(col_events,kind='mergesort')
+    bounds=numpy.searchsorted(col_events[order],arange(ntr+1))
+    results=[]
+    for j in range(ntr):
+        if config.e_num==0:
+            if config.options.mc_avg:
+                traj_out=array([Qobj(dot(states_out[k][:,j:j+1],states_out[k][:,j:j+1].conj().T),[config.psi0_dims[0],config.psi0_dims[0]],[config.psi0_shape[0],config.psi0_shape[0]],fast='mc-dm') for k in range(num_times)])
+            else:
+                traj_out=array([Qobj(states_out[k][:,j:j+1],config.psi0_dims,config.psi0_shape,fast='mc') for k in range(num_times)])
+        else:
+            traj_out=[]
+            for jj in range(config.e_num):
+                if config.e_ops_isherm[jj]:
+                    traj_out.append(real(expect_out[jj,:,j]))
+                else:
+                    traj_out.append(expect_out[jj,:,j].copy())
+        events=order[bounds[j]:bounds[j+1]]
+        results.append((trajs[j],traj_out,time_events[events],oper_events[events]))
+    return results
+#------------------------------------------------------------------------------------------
 
 
 def _time_remaining(st,ntraj,count,level):
@@ -667,105 +1152,105 @@ def _time_remaining(st,ntraj,count,level):
     return level
 
 
-def _mc_data_config(H,psi0,h_stuff,c_ops,c_stuff,args,e_ops,options):
+def _mc_data_config(config,H,psi0,h_stuff,c_ops,c_stuff,args,e_ops,options):
     """Creates the appropriate data structures for the monte carlo solver
     based on the given time-dependent, or indepdendent, format.
     """
     
     #take care of expectation values, if any
     if any(e_ops):
-        odeconfig.e_num=len(e_ops)
+        config.e_num=len(e_ops)
         for op in e_ops:
             if isinstance(op,list):
                 op=op[0]
-            odeconfig.e_ops_data.append(op.data.data)
-            odeconfig.e_ops_ind.append(op.data.indices)
-            odeconfig.e_ops_ptr.append(op.data.indptr)
-            odeconfig.e_ops_isherm.append(op.isherm)
+            config.e_ops_data.append(op.data.data)
+            config.e_ops_ind.append(op.data.indices)
+            config.e_ops_ptr.append(op.data.indptr)
+            config.e_ops_isherm.append(op.isherm)
         
-        odeconfig.e_ops_data=array(odeconfig.e_ops_data)
-        odeconfig.e_ops_ind=array(odeconfig.e_ops_ind)
-        odeconfig.e_ops_ptr=array(odeconfig.e_ops_ptr)
-        odeconfig.e_ops_isherm=array(odeconfig.e_ops_isherm)
+        config.e_ops_data=array(config.e_ops_data)
+        config.e_ops_ind=array(config.e_ops_ind)
+        config.e_ops_ptr=array(config.e_ops_ptr)
+        config.e_ops_isherm=array(config.e_ops_isherm)
     #----
     
     #take care of collapse operators, if any
     if any(c_ops):
-        odeconfig.c_num=len(c_ops)
+        config.c_num=len(c_ops)
         for c_op in c_ops:
             if isinstance(c_op,list):
                 c_op=c_op[0]
             n_op=c_op.dag()*c_op
-            odeconfig.c_ops_data.append(c_op.data.data)
-            odeconfig.c_ops_ind.append(c_op.data.indices)
-            odeconfig.c_ops_ptr.append(c_op.data.indptr)
+            config.c_ops_data.append(c_op.data.data)
+            config.c_ops_ind.append(c_op.data.indices)
+            config.c_ops_ptr.append(c_op.data.indptr)
             #norm ops
-            odeconfig.n_ops_data.append(n_op.data.data)
-            odeconfig.n_ops_ind.append(n_op.data.indices)
-            odeconfig.n_ops_ptr.append(n_op.data.indptr)
+            config.n_ops_data.append(n_op.data.data)
+            config.n_ops_ind.append(n_op.data.indices)
+            config.n_ops_ptr.append(n_op.data.indptr)
         #to array
-        odeconfig.c_ops_data=array(odeconfig.c_ops_data)
-        odeconfig.c_ops_ind=array(odeconfig.c_ops_ind)
-        odeconfig.c_ops_ptr=array(odeconfig.c_ops_ptr)
+        config.c_ops_data=array(config.c_ops_data)
+        config.c_ops_ind=array(config.c_ops_ind)
+        config.c_ops_ptr=array(config.c_ops_ptr)
         
-        odeconfig.n_ops_data=array(odeconfig.n_ops_data)
-        odeconfig.n_ops_ind=array(odeconfig.n_ops_ind)
-        odeconfig.n_ops_ptr=array(odeconfig.n_ops_ptr)
+        config.n_ops_data=array(config.n_ops_data)
+        config.n_ops_ind=array(config.n_ops_ind)
+        config.n_ops_ptr=array(config.n_ops_ptr)
     #----
     
     
     #--------------------------------------------
     # START CONSTANT H & C_OPS CODE
     #--------------------------------------------
-    if odeconfig.tflag==0:
-        if odeconfig.cflag:
-            odeconfig.c_const_inds=arange(len(c_ops))
+    if config.tflag==0:
+        if config.cflag:
+            config.c_const_inds=arange(len(c_ops))
             for c_op in c_ops:
                 n_op=c_op.dag()*c_op
                 H -= 0.5j * n_op #combine Hamiltonian and collapse terms into one
         #construct Hamiltonian data structures
         if options.tidy:
             H=H.tidyup(options.atol)
-        odeconfig.h_data=-1.0j*H.data.data
-        odeconfig.h_ind=H.data.indices
-        odeconfig.h_ptr=H.data.indptr  
+        config.h_data=-1.0j*H.data.data
+        config.h_ind=H.data.indices
+        config.h_ptr=H.data.indptr  
     #----
     
     #--------------------------------------------
     # START STRING BASED TIME-DEPENDENCE
     #--------------------------------------------
-    elif odeconfig.tflag in array([1,10,11]):
+    elif config.tflag in array([1,10,11]):
         #take care of arguments for collapse operators, if any
         if any(args):
             for item in args.items():
-                odeconfig.c_args.append(item[1])
+                config.c_args.append(item[1])
         #constant Hamiltonian / string-type collapse operators
-        if odeconfig.tflag==1:
+        if config.tflag==1:
             H_inds=arange(1)
             H_tdterms=0
             len_h=1
-            C_inds=arange(odeconfig.c_num)
+            C_inds=arange(config.c_num)
             C_td_inds=array(c_stuff[2]) #find inds of time-dependent terms
             C_const_inds=setdiff1d(C_inds,C_td_inds) #find inds of constant terms
             C_tdterms=[c_ops[k][1] for k in C_td_inds] #extract time-dependent coefficients (strings)
-            odeconfig.c_const_inds=C_const_inds#store indicies of constant collapse terms
-            odeconfig.c_td_inds=C_td_inds#store indicies of time-dependent collapse terms
+            config.c_const_inds=C_const_inds#store indicies of constant collapse terms
+            config.c_td_inds=C_td_inds#store indicies of time-dependent collapse terms
             
-            for k in odeconfig.c_const_inds:
+            for k in config.c_const_inds:
                 H-=0.5j*(c_ops[k].dag()*c_ops[k])
             if options.tidy:
                 H=H.tidyup(options.atol)
-            odeconfig.h_data=[H.data.data]
-            odeconfig.h_ind=[H.data.indices]
-            odeconfig.h_ptr=[H.data.indptr]
-            for k in odeconfig.c_td_inds:
+            config.h_data=[H.data.data]
+            config.h_ind=[H.data.indices]
+            config.h_ptr=[H.data.indptr]
+            for k in config.c_td_inds:
                 op=c_ops[k][0].dag()*c_ops[k][0]
-                odeconfig.h_data.append(-0.5j*op.data.data)
-                odeconfig.h_ind.append(op.data.indices)
-                odeconfig.h_ptr.append(op.data.indptr)
-            odeconfig.h_data=-1.0j*array(odeconfig.h_data)
-            odeconfig.h_ind=array(odeconfig.h_ind)
-            odeconfig.h_ptr=array(odeconfig.h_ptr)
+                config.h_data.append(-0.5j*op.data.data)
+                config.h_ind.append(op.data.indices)
+                config.h_ptr.append(op.data.indptr)
+            config.h_data=-1.0j*array(config.h_data)
+            config.h_ind=array(config.h_ind)
+            config.h_ptr=array(config.h_ptr)
             #--------------------------------------------
             # END OF IF STATEMENT
             #--------------------------------------------
@@ -780,29 +1265,29 @@ def _mc_data_config(H,psi0,h_stuff,c_ops,c_stuff,args,e_ops,options):
             H=array([sum(H[k] for k in H_const_inds)]+[H[k][0] for k in H_td_inds]) #combine time-INDEPENDENT terms into one.
             len_h=len(H)
             H_inds=arange(len_h)
-            odeconfig.h_td_inds=arange(1,len_h)#store indicies of time-dependent Hamiltonian terms
+            config.h_td_inds=arange(1,len_h)#store indicies of time-dependent Hamiltonian terms
             #if there are any collpase operators
-            if odeconfig.c_num>0:
-                if odeconfig.tflag==10: #constant collapse operators
-                    odeconfig.c_const_inds=arange(odeconfig.c_num)
-                    for k in odeconfig.c_const_inds:
+            if config.c_num>0:
+                if config.tflag==10: #constant collapse operators
+                    config.c_const_inds=arange(config.c_num)
+                    for k in config.c_const_inds:
                         H[0]-=0.5j*(c_ops[k].dag()*c_ops[k])
-                    C_inds=arange(odeconfig.c_num)
+                    C_inds=arange(config.c_num)
                     C_tdterms=array([])
                 #-----
                 else:#some time-dependent collapse terms
-                    C_inds=arange(odeconfig.c_num)
+                    C_inds=arange(config.c_num)
                     C_td_inds=array(c_stuff[2]) #find inds of time-dependent terms
                     C_const_inds=setdiff1d(C_inds,C_td_inds) #find inds of constant terms
                     C_tdterms=[c_ops[k][1] for k in C_td_inds] #extract time-dependent coefficients (strings)
-                    odeconfig.c_const_inds=C_const_inds#store indicies of constant collapse terms
-                    odeconfig.c_td_inds=C_td_inds#store indicies of time-dependent collapse terms
-                    for k in odeconfig.c_const_inds:
+                    config.c_const_inds=C_const_inds#store indicies of constant collapse terms
+                    config.c_td_inds=C_td_inds#store indicies of time-dependent collapse terms
+                    for k in config.c_const_inds:
                         H[0]-=0.5j*(c_ops[k].dag()*c_ops[k])
             else:#set empty objects if no collapse operators
-                C_const_inds=arange(odeconfig.c_num)
-                odeconfig.c_const_inds=arange(odeconfig.c_num)
-                odeconfig.c_td_inds=array([])
+                C_const_inds=arange(config.c_num)
+                config.c_const_inds=arange(config.c_num)
+                config.c_td_inds=array([])
                 C_tdterms=array([])
                 C_inds=array([])
             
@@ -810,48 +1295,50 @@ def _mc_data_config(H,psi0,h_stuff,c_ops,c_stuff,args,e_ops,options):
             if options.tidy:
                 H=array([H[k].tidyup(options.atol) for k in range(len_h)])
             #construct data sets
-            odeconfig.h_data=[H[k].data.data for k in range(len_h)]
-            odeconfig.h_ind=[H[k].data.indices for k in range(len_h)]
-            odeconfig.h_ptr=[H[k].data.indptr for k in range(len_h)]
-            for k in odeconfig.c_td_inds:
-                odeconfig.h_data.append(-0.5j*odeconfig.n_ops_data[k])
-                odeconfig.h_ind.append(odeconfig.n_ops_ind[k])
-                odeconfig.h_ptr.append(odeconfig.n_ops_ptr[k])
-            odeconfig.h_data=-1.0j*array(odeconfig.h_data)
-            odeconfig.h_ind=array(odeconfig.h_ind)
-            odeconfig.h_ptr=array(odeconfig.h_ptr)
+            config.h_data=[H[k].data.data for k in range(len_h)]
+            config.h_ind=[H[k].data.indices for k in range(len_h)]
+            config.h_ptr=[H[k].data.indptr for k in range(len_h)]
+            for k in config.c_td_inds:
+                config.h_data.append(-0.5j*config.n_ops_data[k])
+                config.h_ind.append(config.n_ops_ind[k])
+                config.h_ptr.append(config.n_ops_ptr[k])
+            config.h_data=-1.0j*array(config.h_data)
+            config.h_ind=array(config.h_ind)
+            config.h_ptr=array(config.h_ptr)
             #--------------------------------------------
             # END OF ELSE STATEMENT
             #--------------------------------------------
         
         #set execuatble code for collapse expectation values and spmv
-        col_spmv_code="state=odeconfig.colspmv(j,ODE.t,odeconfig.c_ops_data[j],odeconfig.c_ops_ind[j],odeconfig.c_ops_ptr[j],ODE.y"
-        col_expect_code="for i in odeconfig.c_td_inds: n_dp.append(odeconfig.colexpect(i,ODE.t,odeconfig.n_ops_data[i],odeconfig.n_ops_ind[i],odeconfig.n_ops_ptr[i],ODE.y"
-        for kk in range(len(odeconfig.c_args)):
-            col_spmv_code+=",odeconfig.c_args["+str(kk)+"]"
-            col_expect_code+=",odeconfig.c_args["+str(kk)+"]"
+        col_spmv_code="state=config.colspmv(j,ODE.t,config.c_ops_data[j],config.c_ops_ind[j],config.c_ops_ptr[j],ODE.y"
+        col_expect_code="for i in config.c_td_inds: n_dp.append(config.colexpect(i,ODE.t,config.n_ops_data[i],config.n_ops_ind[i],config.n_ops_ptr[i],ODE.y"
+        for kk in range(len(config.c_args)):
+            col_spmv_code+=",config.c_args["+str(kk)+"]"
+            col_expect_code+=",config.c_args["+str(kk)+"]"
         col_spmv_code+=")"
         col_expect_code+="))"
-        odeconfig.col_spmv_code=compile(col_spmv_code,'<string>', 'exec')
-        odeconfig.col_expect_code=compile(col_expect_code,'<string>', 'exec')    
+        config.col_spmv_code=compile(col_spmv_code,'<string>', 'exec')
+        config.col_expect_code=compile(col_expect_code,'<string>', 'exec')    
         #----
         
         #setup ode args string
-        odeconfig.string=""
-        data_range=range(len(odeconfig.h_data))
+        config.string=""
+        data_range=range(len(config.h_data))
         for k in data_range:
-            odeconfig.string+="odeconfig.h_data["+str(k)+"],odeconfig.h_ind["+str(k)+"],odeconfig.h_ptr["+str(k)+"]"
+            config.string+="config.h_data["+str(k)+"],config.h_ind["+str(k)+"],config.h_ptr["+str(k)+"]"
             if k!=data_range[-1]:
-                odeconfig.string+="," 
+                config.string+="," 
         #attach args to ode args string
-        if len(odeconfig.c_args)>0:
-            for kk in range(len(odeconfig.c_args)):
-                odeconfig.string+=","+"odeconfig.c_args["+str(kk)+"]"
+        if len(config.c_args)>0:
+            for kk in range(len(config.c_args)):
+                config.string+=","+"config.c_args["+str(kk)+"]"
         #----
-        name="rhs"+str(odeconfig.cgen_num)
-        odeconfig.tdname=name
-        cgen=Codegen(H_inds,H_tdterms,odeconfig.h_td_inds,args,C_inds,C_tdterms,odeconfig.c_td_inds,type='mc')
-        cgen.generate(name+".pyx")
+        cgen=Codegen(H_inds,H_tdterms,config.h_td_inds,args,C_inds,C_tdterms,config.c_td_inds,type='mc')
+        config.tdname,rhs_module=rhs_compile(cgen,options.rhs_filename)
+        config.tdfunc=rhs_module.cyq_td_ode_rhs
+        if config.tflag in array([1,11]):
+            config.colspmv=rhs_module.col_spmv
+            config.colexpect=rhs_module.col_expect
         #----
     #--------------------------------------------
     # END OF STRING TYPE TIME DEPENDENT CODE
@@ -860,10 +1347,10 @@ def _mc_data_config(H,psi0,h_stuff,c_ops,c_stuff,args,e_ops,options):
     #--------------------------------------------
     # START PYTHON FUNCTION BASED TIME-DEPENDENCE
     #--------------------------------------------
-    elif odeconfig.tflag in array([2,20,22]):
+    elif config.tflag in array([2,20,22]):
         
         #take care of Hamiltonian
-        if odeconfig.tflag==2:# constant Hamiltonian, at least one function based collapse operators
+        if config.tflag==2:# constant Hamiltonian, at least one function based collapse operators
             H_inds=array([0])
             H_tdterms=0
             len_h=1
@@ -871,38 +1358,38 @@ def _mc_data_config(H,psi0,h_stuff,c_ops,c_stuff,args,e_ops,options):
             H_inds=arange(len(H))
             H_td_inds=array(h_stuff[1]) #find inds of time-dependent terms
             H_const_inds=setdiff1d(H_inds,H_td_inds) #find inds of constant terms    
-            odeconfig.h_funcs=array([H[k][1] for k in H_td_inds])
-            odeconfig.h_func_args=args
+            config.h_funcs=array([H[k][1] for k in H_td_inds])
+            config.h_func_args=args
             Htd=array([H[k][0] for k in H_td_inds])
-            odeconfig.h_td_inds=arange(len(Htd))
+            config.h_td_inds=arange(len(Htd))
             H=sum(H[k] for k in H_const_inds)
         
         #take care of collapse operators
-        C_inds=arange(odeconfig.c_num)
+        C_inds=arange(config.c_num)
         C_td_inds=array(c_stuff[1]) #find inds of time-dependent terms
         C_const_inds=setdiff1d(C_inds,C_td_inds) #find inds of constant terms
-        odeconfig.c_const_inds=C_const_inds#store indicies of constant collapse terms
-        odeconfig.c_td_inds=C_td_inds#store indicies of time-dependent collapse terms    
-        odeconfig.c_funcs=zeros(odeconfig.c_num,dtype=FunctionType)
-        for k in odeconfig.c_td_inds:
-            odeconfig.c_funcs[k]=c_ops[k][1]
-        odeconfig.c_func_args=args
+        config.c_const_inds=C_const_inds#store indicies of constant collapse terms
+        config.c_td_inds=C_td_inds#store indicies of time-dependent collapse terms    
+        config.c_funcs=zeros(config.c_num,dtype=FunctionType)
+        for k in config.c_td_inds:
+            config.c_funcs[k]=c_ops[k][1]
+        config.c_func_args=args
             
         #combine constant collapse terms with constant H and construct data
-        for k in odeconfig.c_const_inds:
+        for k in config.c_const_inds:
             H-=0.5j*(c_ops[k].dag()*c_ops[k])
         if options.tidy:
             H=H.tidyup(options.atol)
-            Htd=array([Htd[j].tidyup(options.atol) for j in odeconfig.h_td_inds])
+            Htd=array([Htd[j].tidyup(options.atol) for j in config.h_td_inds])
             #setup cosntant H terms data
-        odeconfig.h_data=-1.0j*H.data.data
-        odeconfig.h_ind=H.data.indices
-        odeconfig.h_ptr=H.data.indptr     
+        config.h_data=-1.0j*H.data.data
+        config.h_ind=H.data.indices
+        config.h_ptr=H.data.indptr     
         
         #setup td H terms data
-        odeconfig.h_td_data=array([-1.0j*Htd[k].data.data for k in odeconfig.h_td_inds])
-        odeconfig.h_td_ind=array([Htd[k].data.indices for k in odeconfig.h_td_inds])
-        odeconfig.h_td_ptr=array([Htd[k].data.indptr for k in odeconfig.h_td_inds])
+        config.h_td_data=array([-1.0j*Htd[k].data.data for k in config.h_td_inds])
+        config.h_td_ind=array([Htd[k].data.indices for k in config.h_td_inds])
+        config.h_td_ptr=array([Htd[k].data.indptr for k in config.h_td_inds])
         #--------------------------------------------
         # END PYTHON FUNCTION BASED TIME-DEPENDENCE
         #--------------------------------------------
@@ -911,23 +1398,23 @@ def _mc_data_config(H,psi0,h_stuff,c_ops,c_stuff,args,e_ops,options):
     #--------------------------------------------
     # START PYTHON FUNCTION BASED HAMILTONIAN
     #--------------------------------------------
-    elif odeconfig.tflag==3:
+    elif config.tflag==3:
          #take care of Hamiltonian
-         odeconfig.h_funcs=H
-         odeconfig.h_func_args=args
+         config.h_funcs=H
+         config.h_func_args=args
          
          #take care of collapse operators
-         odeconfig.c_const_inds=arange(odeconfig.c_num)
-         odeconfig.c_td_inds=array([]) #find inds of time-dependent terms 
-         if len(odeconfig.c_const_inds)>0:
+         config.c_const_inds=arange(config.c_num)
+         config.c_td_inds=array([]) #find inds of time-dependent terms 
+         if len(config.c_const_inds)>0:
              H=0
-             for k in odeconfig.c_const_inds:
+             for k in config.c_const_inds:
                  H-=0.5j*(c_ops[k].dag()*c_ops[k])
              if options.tidy:
                  H=H.tidyup(options.atol)
-             odeconfig.h_data=-1.0j*H.data.data
-             odeconfig.h_ind=H.data.indices
-             odeconfig.h_ptr=H.data.indptr
+             config.h_data=-1.0j*H.data.data
+             config.h_ind=H.data.indices
+             config.h_ptr=H.data.indptr
         
          
          
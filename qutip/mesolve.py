@@ -21,6 +21,7 @@ import types
 import numpy as np
 from scipy.linalg import norm
 import scipy.integrate
+from scipy.sparse.linalg import LinearOperator
 
 from qutip.qobj import Qobj
 from qutip.superoperator import *
@@ -28,14 +29,14 @@ from qutip.expect import expect
 from qutip.odeoptions import Odeoptions
 from qutip.cyQ.ode_rhs import cyq_ode_rhs
 from qutip.cyQ.codegen import Codegen
-from qutip.rhs_generate import rhs_generate
+from qutip.rhs_generate import rhs_compile, _rhs_generate_config
 from qutip.odedata import Odedata
 from qutip.states import ket2dm
 from qutip.odechecks import _ode_checks
+from qutip.sparse import _sp_expm_multiply
 import os
 import numpy
-import qutip.odeconfig as odeconfig
-from qutip._reset import _reset_odeconfig
+from qutip.odeconfig import Odeconfig
 
 
 # -----------------------------------------------------------------------------
@@ -107,8 +108,11 @@ def mesolve(H, rho0, tlist, c_ops, expt_ops, args={}, options=None):
         system Hamiltonian, or a callback function for time-dependent
         Hamiltonians.
 
-    rho0 : :class:`qutip.qobj`
-        initial density matrix or state vector (ket).
+    rho0 : :class:`qutip.qobj` / list of :class:`qutip.qobj`
+        initial density matrix or state vector (ket), or a list of initial
+        states. For a list of initial states with constant Hamiltonian and
+        collapse operators, all states are evolved together in a single
+        integration.
 
     tlist : *list* / *array*
         list of times for :math:`t`.
@@ -137,7 +141,9 @@ def mesolve(H, rho0, tlist, c_ops, expt_ops, args={}, options=None):
         an *array* or state vectors or density matrices corresponding to the
         times in `tlist` [if `expt_ops` is an empty list], or
         nothing if a callback function was given inplace of operators for
-        which to calculate the expectation values.
+        which to calculate the expectation values. If `rho0` is a list of
+        initial states, a list with one :class:`qutip.odedata` instance per
+        initial state is returned.
 
     """
 
@@ -155,9 +161,19 @@ def mesolve(H, rho0, tlist, c_ops, expt_ops, args={}, options=None):
     if options is None:
         options = Odeoptions()
 
-    if (not options.rhs_reuse) or (not odeconfig.tdfunc):
-        # reset odeconfig collapse and time-dependence flags to default values
-        _reset_odeconfig()
+    if options.method == 'krylov' and (n_func > 0 or n_str > 0
+                                       or not isinstance(H, Qobj)):
+        raise TypeError("Odeoptions.method='krylov' requires a constant " +
+                        "Hamiltonian and constant collapse operators.")
+
+    # solver data of this call, starting from the previously compiled RHS
+    # when reusing it
+    config = Odeconfig()
+    if options.rhs_reuse:
+        config.load()
+
+    if isinstance(rho0, list):
+        return _mesolve_batch(H, rho0, tlist, c_ops, expt_ops, args, options)
 
     #
     # dispatch the appropriate solver
@@ -187,7 +203,7 @@ def mesolve(H, rho0, tlist, c_ops, expt_ops, args={}, options=None):
                 # constant hamiltonian but time-dependent collapse
                 # operators in list string format
                 return _mesolve_list_str_td([H], rho0, tlist, c_ops,
-                                            expt_ops, args, options)
+                                            expt_ops, args, options, config)
             elif n_func > 0:
                 # constant hamiltonian but time-dependent collapse
                 # operators in list function format
@@ -213,7 +229,7 @@ def mesolve(H, rho0, tlist, c_ops, expt_ops, args={}, options=None):
                                              expt_ops, args, options)
             else:
                 return _mesolve_list_str_td(H, rho0, tlist, c_ops,
-                                            expt_ops, args, options)
+                                            expt_ops, args, options, config)
 
         raise TypeError("Incorrect specification of Hamiltonian " +
                         "or collapse operators.")
@@ -227,7 +243,7 @@ def mesolve(H, rho0, tlist, c_ops, expt_ops, args={}, options=None):
                                          expt_ops, args, options)
         elif n_str > 0:
             return _wfsolve_list_str_td(H, rho0, tlist,
-                                        expt_ops, args, options)
+                                        expt_ops, args, options, config)
         elif isinstance(H, types.FunctionType):
             return _wfsolve_func_td(H, rho0, tlist,
                                     expt_ops, args, options)
@@ -236,6 +252,93 @@ def mesolve(H, rho0, tlist, c_ops, expt_ops, args={}, options=None):
                                   expt_ops, args, options)
 
 
+# -----------------------------------------------------------------------------
+# Evolution of a list of initial states
+#
+def _mesolve_batch(H, rho0_list, tlist, c_ops, expt_ops, args, opt):
+    """
+    Internal function for evolving a list of initial states. For a constant
+    Hamiltonian and constant collapse operators all the states are integrated
+    together as the columns of one block, otherwise the states are evolved
+    one by one. See mesolve for usage.
+    """
+    n_const, n_func, n_str = _ode_checks(H, c_ops)
+
+    if (isinstance(H, Qobj) and n_func == 0 and n_str == 0
+            and isinstance(expt_ops, list) and opt.method != 'krylov'):
+        return _mesolve_const_batch(H, rho0_list, tlist, c_ops,
+                                    expt_ops, args, opt)
+
+    return [mesolve(H, rho0, tlist, c_ops, expt_ops, args, opt)
+            for rho0 in rho0_list]
+
+
+# -----------------------------------------------------------------------------
+# Master equation solver for a block of initial states
+#
+def _mesolve_const_batch(H, rho0_list, tlist, c_op_list, expt_ops, args, opt):
+    """!
+    Evolve a list of initial states using a single ODE solver, for constant
+    hamiltonian and collapse operators. The states are stored as the columns
+    of a dense block so that the RHS is one sparse-dense matrix product.
+    """
+
+    if len(c_op_list) == 0 and isoper(H) and \
+            all([isket(psi0) for psi0 in rho0_list]):
+        #
+        # unitary evolution of a batch of state vectors
+        #
+        L = -1.0j * H
+        initial_vectors = [psi0.full() for psi0 in rho0_list]
+        state_vectorize = lambda x: x
+        state_norm_func = norm
+
+    else:
+        rho0_list = [ket2dm(rho0) if isket(rho0) else rho0
+                     for rho0 in rho0_list]
+
+        if opt.tidy:
+            H = H.tidyup(opt.atol)
+
+        if issuper(H):
+            L = H + liouvillian(None, c_op_list)
+        elif opt.matrix_free:
+            L = liouvillian_operator(H, c_op_list)
+        else:
+            L = liouvillian(H, c_op_list)
+
+        initial_vectors = [mat2vec(rho0.full()) for rho0 in rho0_list]
+        state_vectorize = vec2mat
+        state_norm_func = None
+
+    #
+    # setup integrator
+    #
+    n_states = len(initial_vectors)
+    initial_block = np.hstack(initial_vectors)
+    r = scipy.integrate.ode(_ode_block_rhs)
+    r.set_f_params(L if isinstance(L, LinearOperator) else L.data, n_states)
+    r.set_integrator('zvode', method=opt.method, order=opt.order,
+                              atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
+                              first_step=opt.first_step, min_step=opt.min_step,
+                              max_step=opt.max_step)
+    r.set_initial_value(initial_block.ravel('F'), tlist[0])
+
+    #
+    # call generic ODE code
+    #
+    return _generic_ode_solve_batch(r, rho0_list, tlist, expt_ops, opt,
+                                    state_vectorize, state_norm_func)
+
+
+#
+# evaluate d(psi_1, ..., psi_n)/dt for a block of state vectors stacked
+# column-wise into a single vector.
+#
+def _ode_block_rhs(t, y, L, n_states):
+    return (L * y.reshape((-1, n_states), order='F')).ravel('F')
+
+
 # -----------------------------------------------------------------------------
 # A time-dependent disipative master equation on the list-function format
 #
@@ -273,7 +376,7 @@ def _mesolve_list_func_td(H_list, rho0, tlist, c_list, expt_ops, args, opt):
                             "Hamiltonian (expected callback function)")
 
         if isoper(h):
-            L_list.append([(-1j * (spre(h) - spost(h))).data, h_coeff])
+            L_list.append([liouvillian(h, []).data, h_coeff])
 
         elif issuper(h):
             L_list.append([h.data, h_coeff])
@@ -298,9 +401,7 @@ def _mesolve_list_func_td(H_list, rho0, tlist, c_list, expt_ops, args, opt):
                             "collapse operators (expected callback function)")
 
         if isoper(c):
-            cdc = c.dag() * c
-            L_list.append([(spre(c) * spost(c.dag()) - 0.5 * spre(cdc)
-                                                     - 0.5 * spost(cdc)).data,
+            L_list.append([liouvillian(None, [c]).data,
                            lambda t, args: (c_coeff(t, args)) ** 2])
 
         elif issuper(c):
@@ -431,7 +532,8 @@ def psi_list_td(t, psi, H_list_and_args):
 # A time-dependent disipative master equation on the list-string format for
 # cython compilation
 #
-def _mesolve_list_str_td(H_list, rho0, tlist, c_list, expt_ops, args, opt):
+def _mesolve_list_str_td(H_list, rho0, tlist, c_list, expt_ops, args, opt,
+                         config):
     """
     Internal function for solving the master equation. See mesolve for usage.
     """
@@ -462,7 +564,7 @@ def _mesolve_list_str_td(H_list, rho0, tlist, c_list, expt_ops, args, opt):
             h = h_spec
 
             if isoper(h):
-                Lconst += -1j * (spre(h) - spost(h))
+                Lconst += liouvillian(h, [])
             elif issuper(h):
                 Lconst += h
             else:
@@ -474,7 +576,7 @@ def _mesolve_list_str_td(H_list, rho0, tlist, c_list, expt_ops, args, opt):
             h_coeff = h_spec[1]
 
             if isoper(h):
-                L = -1j * (spre(h) - spost(h))
+                L = liouvillian(h, [])
             elif issuper(h):
                 L = h
             else:
@@ -497,9 +599,7 @@ def _mesolve_list_str_td(H_list, rho0, tlist, c_list, expt_ops, args, opt):
             c = c_spec
 
             if isoper(c):
-                cdc = c.dag() * c
-                Lconst += spre(c) * spost(c.dag()) - 0.5 * spre(cdc) \
-                                                   - 0.5 * spost(cdc)
+                Lconst += liouvillian(None, [c])
             elif issuper(c):
                 Lconst += c
             else:
@@ -511,9 +611,7 @@ def _mesolve_list_str_td(H_list, rho0, tlist, c_list, expt_ops, args, opt):
             c_coeff = c_spec[1]
 
             if isoper(c):
-                cdc = c.dag() * c
-                L = spre(c) * spost(c.dag()) - 0.5 * spre(cdc) \
-                                             - 0.5 * spost(cdc)
+                L = liouvillian(None, [c])
                 c_coeff = "(" + c_coeff + ")**2"
             elif issuper(c):
                 L = c
@@ -556,26 +654,19 @@ def _mesolve_list_str_td(H_list, rho0, tlist, c_list, expt_ops, args, opt):
     #
     # generate and compile new cython code if necessary
     #
-    if not opt.rhs_reuse or odeconfig.tdfunc is None:
-        if opt.rhs_filename is None:
-            odeconfig.tdname = "rhs" + str(odeconfig.cgen_num)
-        else:
-            odeconfig.tdname = opt.rhs_filename
+    if not opt.rhs_reuse or config.tdfunc is None:
         cgen = Codegen(h_terms=n_L_terms, h_tdterms=Lcoeff, args=args)
-        cgen.generate(odeconfig.tdname + ".pyx")
-        os.environ['CFLAGS'] = '-O3 -w'
-        import pyximport
-        pyximport.install(setup_args={'include_dirs': [numpy.get_include()]})
-        code = compile('from ' + odeconfig.tdname + ' import cyq_td_ode_rhs',
-                       '<string>', 'exec')
-        exec(code, globals())
-        odeconfig.tdfunc = cyq_td_ode_rhs
+        config.tdname, rhs_module = rhs_compile(cgen, opt.rhs_filename)
+        config.tdfunc = rhs_module.cyq_td_ode_rhs
+        # keep the compiled RHS for later calls with rhs_reuse=True
+        config.save()
+    tdname, tdfunc = config.tdname, config.tdfunc
 
     #
     # setup integrator
     #
     initial_vector = mat2vec(rho0.full())
-    r = scipy.integrate.ode(odeconfig.tdfunc)
+    r = scipy.integrate.ode(tdfunc)
     r.set_integrator('zvode', method=opt.method, order=opt.order,
                               atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
                               first_step=opt.first_step, min_step=opt.min_step,
@@ -588,14 +679,15 @@ def _mesolve_list_str_td(H_list, rho0, tlist, c_list, expt_ops, args, opt):
     #
     # call generic ODE code
     #
-    return _generic_ode_solve(r, rho0, tlist, expt_ops, opt, vec2mat)
+    return _generic_ode_solve(r, rho0, tlist, expt_ops, opt, vec2mat,
+                              tdname=tdname)
 
 
 # -----------------------------------------------------------------------------
 # A time-dependent disipative master equation on the list-string format for
 # cython compilation
 #
-def _wfsolve_list_str_td(H_list, psi0, tlist, expt_ops, args, opt):
+def _wfsolve_list_str_td(H_list, psi0, tlist, expt_ops, args, opt, config):
     """
     Internal function for solving the master equation. See mesolve for usage.
     """
@@ -656,26 +748,19 @@ def _wfsolve_list_str_td(H_list, psi0, tlist, expt_ops, args, opt):
     #
     # generate and compile new cython code if necessary
     #
-    if not opt.rhs_reuse or odeconfig.tdfunc is None:
-        if opt.rhs_filename is None:
-            odeconfig.tdname = "rhs" + str(odeconfig.cgen_num)
-        else:
-            odeconfig.tdname = opt.rhs_filename
+    if not opt.rhs_reuse or config.tdfunc is None:
         cgen = Codegen(h_terms=n_L_terms, h_tdterms=Lcoeff, args=args)
-        cgen.generate(odeconfig.tdname + ".pyx")
-        os.environ['CFLAGS'] = '-O3 -w'
-        import pyximport
-        pyximport.install(setup_args={'include_dirs': [numpy.get_include()]})
-        code = compile('from ' + odeconfig.tdname + ' import cyq_td_ode_rhs',
-                       '<string>', 'exec')
-        exec(code, globals())
-        odeconfig.tdfunc = cyq_td_ode_rhs
+        config.tdname, rhs_module = rhs_compile(cgen, opt.rhs_filename)
+        config.tdfunc = rhs_module.cyq_td_ode_rhs
+        # keep the compiled RHS for later calls with rhs_reuse=True
+        config.save()
+    tdname, tdfunc = config.tdname, config.tdfunc
 
     #
     # setup integrator
     #
     initial_vector = psi0.full()
-    r = scipy.integrate.ode(odeconfig.tdfunc)
+    r = scipy.integrate.ode(tdfunc)
     r.set_integrator('zvode', method=opt.method, order=opt.order,
                               atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
                               first_step=opt.first_step, min_step=opt.min_step,
@@ -688,7 +773,8 @@ def _wfsolve_list_str_td(H_list, psi0, tlist, expt_ops, args, opt):
     #
     # call generic ODE code
     #
-    return _generic_ode_solve(r, psi0, tlist, expt_ops, opt, lambda x: x)
+    return _generic_ode_solve(r, psi0, tlist, expt_ops, opt, lambda x: x,
+                              tdname=tdname)
 
 
 # -----------------------------------------------------------------------------
@@ -707,13 +793,16 @@ def _wfsolve_const(H, psi0, tlist, expt_ops, args, opt):
     # setup integrator.
     #
     initial_vector = psi0.full()
-    r = scipy.integrate.ode(cyq_ode_rhs)
     L = -1.0j * H
-    r.set_f_params(L.data.data, L.data.indices, L.data.indptr)  # cython RHS
-    r.set_integrator('zvode', method=opt.method, order=opt.order,
-                              atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
-                              first_step=opt.first_step, min_step=opt.min_step,
-                              max_step=opt.max_step)
+    if opt.method == 'krylov':
+        r = _KrylovIntegrator(L.data, opt)
+    else:
+        r = scipy.integrate.ode(cyq_ode_rhs)
+        r.set_f_params(L.data.data, L.data.indices, L.data.indptr)  # cython RHS
+        r.set_integrator('zvode', method=opt.method, order=opt.order,
+                                  atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
+                                  first_step=opt.first_step, min_step=opt.min_step,
+                                  max_step=opt.max_step)
 
     r.set_initial_value(initial_vector, tlist[0])
 
@@ -734,7 +823,8 @@ def _ode_psi_func(t, psi, H):
 # Wave function evolution using a ODE solver (unitary quantum evolution), for
 # time dependent hamiltonians
 #
-def _wfsolve_list_td(H_func, psi0, tlist, expt_ops, args, opt):
+def _wfsolve_list_td(H_func, psi0, tlist, expt_ops, args, opt,
+                     config=None):
     """!
     Evolve the wave function using an ODE solver with time-dependent
     Hamiltonian.
@@ -757,10 +847,15 @@ def _wfsolve_list_td(H_func, psi0, tlist, expt_ops, args, opt):
         raise TypeError('Time-dependent coefficients must be list with ' +
                       'length N-1 where N is the number of Hamiltonian terms.')
     tflag = 1
-    if opt.rhs_reuse and odeconfig.tdfunc is None:
+    if config is None:
+        config = Odeconfig()
+        if opt.rhs_reuse:
+            config.load()
+    if opt.rhs_reuse and config.tdfunc is None:
         print("No previous time-dependent RHS found.")
         print("Generating one for you...")
-        rhs_generate(H_func, args)
+        config = _rhs_generate_config(H_func, [], args)
+        config.save()
     lenh = len(H_func[0])
     if opt.tidy:
         H_func[0] = [(H_func[0][k]).tidyup() for k in range(lenh)]
@@ -782,25 +877,18 @@ def _wfsolve_list_td(H_func, psi0, tlist, expt_ops, args, opt):
                 string += (",")
 
     # run code generator
-    if not opt.rhs_reuse or odeconfig.tdfunc is None:
-        if opt.rhs_filename is None:
-            odeconfig.tdname = "rhs" + str(odeconfig.cgen_num)
-        else:
-            odeconfig.tdname = opt.rhs_filename
+    if not opt.rhs_reuse or config.tdfunc is None:
         cgen = Codegen(h_terms=n_L_terms, h_tdterms=Lcoeff, args=args)
-        cgen.generate(odeconfig.tdname + ".pyx")
-        os.environ['CFLAGS'] = '-O3 -w'
-        import pyximport
-        pyximport.install(setup_args={'include_dirs': [numpy.get_include()]})
-        code = compile('from ' + odeconfig.tdname + ' import cyq_td_ode_rhs',
-                       '<string>', 'exec')
-        exec(code, globals())
-        odeconfig.tdfunc = cyq_td_ode_rhs
+        config.tdname, rhs_module = rhs_compile(cgen, opt.rhs_filename)
+        config.tdfunc = rhs_module.cyq_td_ode_rhs
+        # keep the compiled RHS for later calls with rhs_reuse=True
+        config.save()
+    tdname, tdfunc = config.tdname, config.tdfunc
     #
     # setup integrator
     #
     initial_vector = psi0.full()
-    r = scipy.integrate.ode(odeconfig.tdfunc)
+    r = scipy.integrate.ode(tdfunc)
     r.set_integrator('zvode', method=opt.method, order=opt.order,
                               atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
                               first_step=opt.first_step, min_step=opt.min_step,
@@ -812,7 +900,8 @@ def _wfsolve_list_td(H_func, psi0, tlist, expt_ops, args, opt):
     #
     # call generic ODE code
     #
-    return _generic_ode_solve(r, psi0, tlist, expt_ops, opt, lambda x: x)
+    return _generic_ode_solve(r, psi0, tlist, expt_ops, opt, lambda x: x,
+                              tdname=tdname)
 
 
 # -----------------------------------------------------------------------------
@@ -896,6 +985,8 @@ def _mesolve_const(H, rho0, tlist, c_op_list, expt_ops, args, opt):
 
     if issuper(H):
         L = H + liouvillian(None, c_op_list)
+    elif opt.matrix_free:
+        L = liouvillian_operator(H, c_op_list)
     else:
         L = liouvillian(H, c_op_list)
 
@@ -903,12 +994,23 @@ def _mesolve_const(H, rho0, tlist, c_op_list, expt_ops, args, opt):
     # setup integrator
     #
     initial_vector = mat2vec(rho0.full())
-    r = scipy.integrate.ode(cyq_ode_rhs)
-    r.set_f_params(L.data.data, L.data.indices, L.data.indptr)
-    r.set_integrator('zvode', method=opt.method, order=opt.order,
-                              atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
-                              first_step=opt.first_step, min_step=opt.min_step,
-                              max_step=opt.max_step)
+    if opt.method == 'krylov':
+        r = _KrylovIntegrator(L if isinstance(L, LinearOperator) else L.data,
+                              opt)
+    elif isinstance(L, LinearOperator):
+        r = scipy.integrate.ode(_ode_rho_func)
+        r.set_f_params(L)
+        r.set_integrator('zvode', method=opt.method, order=opt.order,
+                                  atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
+                                  first_step=opt.first_step, min_step=opt.min_step,
+                                  max_step=opt.max_step)
+    else:
+        r = scipy.integrate.ode(cyq_ode_rhs)
+        r.set_f_params(L.data.data, L.data.indices, L.data.indptr)
+        r.set_integrator('zvode', method=opt.method, order=opt.order,
+                                  atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
+                                  first_step=opt.first_step, min_step=opt.min_step,
+                                  max_step=opt.max_step)
     r.set_initial_value(initial_vector, tlist[0])
 
     #
@@ -919,7 +1021,7 @@ def _mesolve_const(H, rho0, tlist, c_op_list, expt_ops, args, opt):
 
 #
 # evaluate drho(t)/dt according to the master eqaution
-# [no longer used, replaced by cython function]
+# [replaced by cython function, except for matrix-free Liouvillians]
 #
 def _ode_rho_func(t, rho, L):
     return L * rho
@@ -929,7 +1031,8 @@ def _ode_rho_func(t, rho, L):
 # Master equation solver: deprecated in 2.0.0. No support for time-dependent
 # collapse operators. Only used by the deprecated odesolve function.
 #
-def _mesolve_list_td(H_func, rho0, tlist, c_op_list, expt_ops, args, opt):
+def _mesolve_list_td(H_func, rho0, tlist, c_op_list, expt_ops, args, opt,
+                     config=None):
     """!
     Evolve the density matrix using an ODE solver with time dependent
     Hamiltonian.
@@ -943,7 +1046,8 @@ def _mesolve_list_td(H_func, rho0, tlist, c_op_list, expt_ops, args, opt):
         # if initial state is a ket and no collapse operator where given,
         # fallback on the unitary schrodinger equation solver
         if n_op == 0:
-            return _wfsolve_list_td(H_func, rho0, tlist, expt_ops, args, opt)
+            return _wfsolve_list_td(H_func, rho0, tlist, expt_ops, args, opt,
+                                    config)
 
         # Got a wave function as initial state: convert to density matrix.
         rho0 = ket2dm(rho0)
@@ -960,10 +1064,15 @@ def _mesolve_list_td(H_func, rho0, tlist, c_op_list, expt_ops, args, opt):
        (len(H_func[1]) != (len(H_func[0]) - 1)):
         raise TypeError('Time-dependent coefficients must be list with ' +
                     'length N-1 where N is the number of Hamiltonian terms.')
-    if opt.rhs_reuse and odeconfig.tdfunc is None:
+    if config is None:
+        config = Odeconfig()
+        if opt.rhs_reuse:
+            config.load()
+    if opt.rhs_reuse and config.tdfunc is None:
         print("No previous time-dependent RHS found.")
         print("Generating one for you...")
-        rhs_generate(H_func, args)
+        config = _rhs_generate_config(H_func, c_op_list, args)
+        config.save()
     lenh = len(H_func[0])
     if opt.tidy:
         H_func[0] = [(H_func[0][k]).tidyup() for k in range(lenh)]
@@ -988,26 +1097,19 @@ def _mesolve_list_td(H_func, rho0, tlist, c_op_list, expt_ops, args, opt):
                 string += (",")
 
     # run code generator
-    if not opt.rhs_reuse or odeconfig.tdfunc is None:
-        if opt.rhs_filename is None:
-            odeconfig.tdname = "rhs" + str(odeconfig.cgen_num)
-        else:
-            odeconfig.tdname = opt.rhs_filename
+    if not opt.rhs_reuse or config.tdfunc is None:
         cgen = Codegen(h_terms=n_L_terms, h_tdterms=Lcoeff, args=args)
-        cgen.generate(odeconfig.tdname + ".pyx")
-        os.environ['CFLAGS'] = '-O3 -w'
-        import pyximport
-        pyximport.install(setup_args={'include_dirs': [numpy.get_include()]})
-        code = compile('from ' + odeconfig.tdname + ' import cyq_td_ode_rhs',
-                       '<string>', 'exec')
-        exec(code, globals())
-        odeconfig.tdfunc = cyq_td_ode_rhs
+        config.tdname, rhs_module = rhs_compile(cgen, opt.rhs_filename)
+        config.tdfunc = rhs_module.cyq_td_ode_rhs
+        # keep the compiled RHS for later calls with rhs_reuse=True
+        config.save()
+    tdname, tdfunc = config.tdname, config.tdfunc
 
     #
     # setup integrator
     #
     initial_vector = mat2vec(rho0.full())
-    r = scipy.integrate.ode(odeconfig.tdfunc)
+    r = scipy.integrate.ode(tdfunc)
     r.set_integrator('zvode', method=opt.method, order=opt.order,
                               atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
                               first_step=opt.first_step, min_step=opt.min_step,
@@ -1019,7 +1121,8 @@ def _mesolve_list_td(H_func, rho0, tlist, c_op_list, expt_ops, args, opt):
     #
     # call generic ODE code
     #
-    return _generic_ode_solve(r, rho0, tlist, expt_ops, opt, vec2mat)
+    return _generic_ode_solve(r, rho0, tlist, expt_ops, opt, vec2mat,
+                              tdname=tdname)
 
 
 # -----------------------------------------------------------------------------
@@ -1047,10 +1150,7 @@ def _mesolve_func_td(L_func, rho0, tlist, c_op_list, expt_ops, args, opt):
     #
 
     if len(c_op_list) > 0:
-        L = 0
-        for c in c_op_list:
-            cdc = c.dag() * c
-            L += spre(c) * spost(c.dag()) - 0.5 * spre(cdc) - 0.5 * spost(cdc)
+        L = liouvillian(None, c_op_list)
 
         L_func_and_args = [L_func, L.data]
 
@@ -1061,7 +1161,7 @@ def _mesolve_func_td(L_func, rho0, tlist, c_op_list, expt_ops, args, opt):
     for arg in args:
         if isinstance(arg, Qobj):
             if isoper(arg):
-                L_func_and_args.append((-1j * (spre(arg) - spost(arg))).data)
+                L_func_and_args.append(liouvillian(arg, []).data)
             else:
                 L_func_and_args.append(arg.data)
         else:
@@ -1104,12 +1204,48 @@ def _ode_rho_func_td(t, rho, L_func_and_args):
 # -----------------------------------------------------------------------------
 
 
+# -----------------------------------------------------------------------------
+# Propagation with a constant generator by the action of the matrix exponential
+# (Odeoptions.method='krylov'). Offers the parts of the scipy.integrate.ode
+# interface that are used by _generic_ode_solve.
+#
+class _KrylovIntegrator():
+    """
+    Evolves y(t) = exp(A*t) y(0) for a constant sparse generator A using
+    Krylov subspaces. The Krylov dimension needed for one output step is
+    used as the starting dimension of the next one.
+    """
+    def __init__(self, A, opt):
+        self.A = A if isinstance(A, LinearOperator) else A.tocsr()
+        self.tol = opt.atol
+        self.m = 10
+        self.y = None
+        self.t = 0.0
+
+    def set_initial_value(self, y, t=0.0):
+        self.y = np.array(y, dtype=complex)
+        self.t = t
+        return self
+
+    def successful(self):
+        return True
+
+    def integrate(self, t):
+        y, m = _sp_expm_multiply(self.A, self.y, t - self.t, self.m,
+                                 self.tol)
+        self.y = y.reshape(self.y.shape)
+        # allow the subspace to shrink again if fewer vectors are needed
+        self.m = max(m - 2, 2)
+        self.t = t
+        return self.y
+
+
 # -----------------------------------------------------------------------------
 # Solve an ODE which solver parameters already setup (r). Calculate the
 # required expectation values or invoke callback function at each time step.
 #
 def _generic_ode_solve(r, psi0, tlist, expt_ops, opt,
-                       state_vectorize, state_norm_func=None):
+                       state_vectorize, state_norm_func=None, tdname=None):
     """
     Internal function for solving ODEs.
     """
@@ -1180,14 +1316,80 @@ def _generic_ode_solve(r, psi0, tlist, expt_ops, opt,
         r.integrate(r.t + dt)
         t_idx += 1
 
-    if not opt.rhs_reuse and odeconfig.tdname is not None:
+    if not opt.rhs_reuse and tdname is not None:
         try:
-            os.remove(odeconfig.tdname + ".pyx")
+            os.remove(tdname + ".pyx")
         except:
             pass
 
     return output
 
+# -----------------------------------------------------------------------------
+# Solve an ODE for a block of initial states stacked column-wise into a single
+# vector (r). Returns one Odedata instance per initial state.
+#
+def _generic_ode_solve_batch(r, psi0_list, tlist, expt_ops, opt,
+                             state_vectorize, state_norm_func=None):
+    """
+    Internal function for solving ODEs for a block of initial states.
+    """
+
+    #
+    # prepare output arrays
+    #
+    n_tsteps = len(tlist)
+    n_states = len(psi0_list)
+    n_expt_op = len(expt_ops)
+
+    outputs = []
+    for psi0 in psi0_list:
+        output = Odedata()
+        output.solver = "mesolve"
+        output.times = tlist
+
+        if n_expt_op == 0:
+            output.states = []
+        else:
+            output.expect = []
+            output.num_expect = n_expt_op
+            for op in expt_ops:
+                if op.isherm and psi0.isherm:
+                    output.expect.append(np.zeros(n_tsteps))
+                else:
+                    output.expect.append(np.zeros(n_tsteps, dtype=complex))
+
+        outputs.append(output)
+
+    #
+    # start evolution
+    #
+    psi_list = [Qobj(psi0) for psi0 in psi0_list]
+
+    for t_idx, t in enumerate(tlist):
+        if t_idx > 0:
+            r.integrate(t)
+
+        if not r.successful():
+            break
+
+        y = r.y.reshape((-1, n_states), order='F')
+
+        if state_norm_func:
+            y = y / np.array([state_norm_func(y[:, m])
+                              for m in range(n_states)])
+            r.set_initial_value(y.ravel('F'), r.t)
+
+        for m, psi in enumerate(psi_list):
+            psi.data = state_vectorize(y[:, m:m + 1])
+
+            if n_expt_op == 0:
+                outputs[m].states.append(Qobj(psi))  # copy psi/rho
+            else:
+                for n in range(0, n_expt_op):
+                    outputs[m].expect[n][t_idx] = expect(expt_ops[n], psi)
+
+    return outputs
+
 # -----------------------------------------------------------------------------
 # Old style API below.
 # -----------------------------------------------------------------------------
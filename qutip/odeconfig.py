@@ -16,77 +16,133 @@
 # Copyright (C) 2011-2013, Paul D. Nation & Robert J. Johansson
 #
 ###########################################################################
-
-#General stuff
-tlist=None          #evaluations times
-ntraj=None          #number / list of trajectories
-options=None        #options for odesolvers
-norm_tol=None       #tolerance for wavefunction norm
-norm_steps=None     #max. number of steps to take in finding wavefunction norm within tolerance norm_tol.
-
-#Initial state stuff
-psi0=None           #initial state
-psi0_dims=None      #initial state dims
-psi0_shape=None     #initial state shape
-
-#flags for setting time-dependence, collapse ops, and number of times codegen has been run
-cflag=0             #Flag signaling collapse operators
-tflag=0             #Flag signaling time-dependent problem
-cgen_num=0          #Number of times codegen function has been called in current Python session.
-
-#time-dependent function stuff
-tdfunc=None         #Placeholder for time-dependent RHS function.
-colspmv=None        #Placeholder for time-dependent col-spmv function.
-colexpect=None      #Placeholder for time-dependent col_expect function.
-string=None         #Holds string of variables to be passed onto time-depdendent ODE solver.
-tdname=None         #Name of td .pyx file (used in parallel mc code)
-
-#Hamiltonian stuff
-h_td_inds=[]        #indicies of time-dependent Hamiltonian operators
-h_data=None          #List of sparse matrix data
-h_ind=None          #List of sparse matrix indices
-h_ptr=None          #List of sparse matrix ptrs
-
-#Expectation operator stuff
-e_num=0             #number of expect ops
-e_ops_data=[]       #expect op data
-e_ops_ind=[]        #expect op indices
-e_ops_ptr=[]        #expect op indptrs
-e_ops_isherm=[]     #expect op isherm
-
-#Collapse operator stuff
-c_num=0             #number of collapse ops
-c_const_inds=[]     #indicies of constant collapse operators
-c_td_inds=[]        #indicies of time-dependent collapse operators
-c_ops_data=[]       #collapse op data
-c_ops_ind=[]        #collapse op indices
-c_ops_ptr=[]        #collapse op indptrs
-c_args=[]           #store args for time-dependent collapse functions
-
-#Norm collapse operator stuff
-n_ops_data=[]       #norm collapse op data
-n_ops_ind=[]        #norm collapse op indices
-n_ops_ptr=[]        #norm collapse op indptrs
-
-#holds executable strings for time-dependent collapse evaluation
-col_expect_code=None
-col_spmv_code=None
-
-#hold stuff for function list based time dependence
-h_td_inds=[]
-h_td_data=[]
-h_td_ind=[]
-h_td_ptr=[]
-h_funcs=None
-h_func_args=None
-c_funcs=None
-c_func_args=None
-
-
-
-
-
-
-
-
-
+import sys,marshal,importlib
+
+#Number of times codegen function has been called in current Python session.
+cgen_num=0
+
+
+class Odeconfig():
+    """
+    Class holding the data of a single solver run: the Hamiltonian and
+    collapse operator data, the time-dependent RHS functions and the flags
+    used by :func:`qutip.mcsolve` and :func:`qutip.mesolve`.
+
+    Every call to a solver works on its own instance, so that several
+    differently configured solvers can run at the same time in one process.
+    The instance of the most recently prepared solver is kept in
+    :data:`last`, which is what ``Odeoptions.rhs_reuse`` reuses.
+    """
+    def __init__(self):
+        #General stuff
+        self.tlist=None          #evaluations times
+        self.ntraj=None          #number / list of trajectories
+        self.options=None        #options for odesolvers
+        self.norm_tol=None       #tolerance for wavefunction norm
+        self.norm_steps=None     #max. number of steps to take in finding wavefunction norm within tolerance norm_tol.
+
+        #Initial state stuff
+        self.psi0=None           #initial state
+        self.psi0_dims=None      #initial state dims
+        self.psi0_shape=None     #initial state shape
+
+        #flags for setting time-dependence and collapse ops
+        self.cflag=0             #Flag signaling collapse operators
+        self.tflag=0             #Flag signaling time-dependent problem
+
+        #time-dependent function stuff
+        self.tdfunc=None         #Placeholder for time-dependent RHS function.
+        self.colspmv=None        #Placeholder for time-dependent col-spmv function.
+        self.colexpect=None      #Placeholder for time-dependent col_expect function.
+        self.string=None         #Holds string of variables to be passed onto time-depdendent ODE solver.
+        self.tdname=None         #Name of td .pyx file (used in parallel mc code)
+
+        #Hamiltonian stuff
+        self.h_td_inds=[]        #indicies of time-dependent Hamiltonian operators
+        self.h_data=None         #List of sparse matrix data
+        self.h_ind=None          #List of sparse matrix indices
+        self.h_ptr=None          #List of sparse matrix ptrs
+
+        #Expectation operator stuff
+        self.e_num=0             #number of expect ops
+        self.e_ops_data=[]       #expect op data
+        self.e_ops_ind=[]        #expect op indices
+        self.e_ops_ptr=[]        #expect op indptrs
+        self.e_ops_isherm=[]     #expect op isherm
+
+        #Collapse operator stuff
+        self.c_num=0             #number of collapse ops
+        self.c_const_inds=[]     #indicies of constant collapse operators
+        self.c_td_inds=[]        #indicies of time-dependent collapse operators
+        self.c_ops_data=[]       #collapse op data
+        self.c_ops_ind=[]        #collapse op indices
+        self.c_ops_ptr=[]        #collapse op indptrs
+        self.c_args=[]           #store args for time-dependent collapse functions
+
+        #Norm collapse operator stuff
+        self.n_ops_data=[]       #norm collapse op data
+        self.n_ops_ind=[]        #norm collapse op indices
+        self.n_ops_ptr=[]        #norm collapse op indptrs
+
+        #holds executable strings for time-dependent collapse evaluation
+        self.col_expect_code=None
+        self.col_spmv_code=None
+
+        #hold stuff for function list based time dependence
+        self.h_td_data=[]
+        self.h_td_ind=[]
+        self.h_td_ptr=[]
+        self.h_funcs=None
+        self.h_func_args=None
+        self.c_funcs=None
+        self.c_func_args=None
+
+    def __getstate__(self):
+        #the RHS functions are stored by module and name and the compiled
+        #collapse code is marshalled, so that instances can be sent to
+        #worker processes
+        state=self.__dict__.copy()
+        for name in ['tdfunc','colspmv','colexpect']:
+            func=state[name]
+            if func is not None:
+                state[name]=(func.__module__,func.__name__) if self.tflag in [1,10,11] else None
+        for name in ['col_spmv_code','col_expect_code']:
+            if state[name] is not None:
+                state[name]=marshal.dumps(state[name])
+        return state
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        for name in ['tdfunc','colspmv','colexpect']:
+            if isinstance(state[name],tuple):
+                from qutip.rhs_generate import _rhs_cache_dir
+                if _rhs_cache_dir() not in sys.path:
+                    sys.path.insert(0,_rhs_cache_dir())
+                module=importlib.import_module(state[name][0])
+                setattr(self,name,getattr(module,state[name][1]))
+        if self.tflag==0:
+            from qutip.cyQ.ode_rhs import cyq_ode_rhs
+            self.tdfunc=cyq_ode_rhs
+        for name in ['col_spmv_code','col_expect_code']:
+            if state[name] is not None:
+                setattr(self,name,marshal.loads(state[name]))
+
+    def load(self):
+        """Copies the data of the most recently prepared solver into this
+        instance."""
+        self.__dict__.update(last.__dict__)
+        return self
+
+    def save(self):
+        """Stores a copy of this instance as the most recently prepared
+        solver, so that it can be used with ``Odeoptions.rhs_reuse``."""
+        global last
+        saved=Odeconfig()
+        saved.__dict__.update(self.__dict__)
+        last=saved
+        return self
+
+
+#Odeconfig instance of the most recently prepared solver, replaced as a whole
+#by Odeconfig.save so that running solvers never see a partial update
+last=Odeconfig()
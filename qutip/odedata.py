@@ -43,6 +43,9 @@ class Odedata():
         Times at which state collpase occurred.  Only for Monte-Carlo solver.
     col_which : list
         Which collapse operator was responsible for each collapse in ``col_times``. mcsolver only.
+    expect_var : list
+        Variance of the expectation values over the trajectories.  Only for
+        Monte-Carlo solver with ``Odeoptions.mc_stream``.
     
     """
     def __init__(self):
@@ -55,6 +58,7 @@ class Odedata():
         self.ntraj=None
         self.col_times=None
         self.col_which=None
+        self.expect_var=None
     def __str__(self):
         s="Odedata object "
         if self.solver:
@@ -41,8 +41,10 @@ class Odeoptions():
         Absolute tolerance.
     rtol : float {1e-6}
         Relative tolerance.
-    method : str {'adams','bdf'}
-        Integration method.
+    method : str {'adams','bdf','krylov'}
+        Integration method. 'krylov' propagates with the action of the 
+        matrix exponential of a constant Hamiltonian or Liouvillian
+        (mesolve only), evaluated in Krylov subspaces to tolerance atol.
     order : int {12}
         Order of integrator (<=12 'adams', <=5 'bdf')
     nsteps : int {2500}
@@ -65,19 +67,46 @@ class Odeoptions():
         Use progress bar GUI for mcsolver.
     mc_avg : bool {True,False}
         Avg. expectation values in mcsolver.
+    mc_stream : bool {False,True}
+        Average the trajectories in mcsolve as they arrive instead of storing
+        all of them (requires mc_avg). Each worker runs a chunk of
+        trajectories and returns only their partial averages. Collapse
+        times are not kept.
+    mc_tol : float {0}
+        Target standard error of the expectation values in mcsolve. If
+        nonzero, trajectories are run in batches until every expectation
+        value reaches it, with ntraj as the maximum number of trajectories.
+        Requires averaged output (mc_avg=True).
+    mc_engine : str {'zvode','block'}
+        Trajectory engine used by mcsolve. 'block' advances blocks of
+        trajectories together as one dense array with a shared adaptive
+        Runge-Kutta step. It requires a constant Hamiltonian and constant
+        collapse operators, otherwise mcsolve raises a ValueError.
+    mc_block_size : int {0}
+        Number of trajectories per block for the 'block' engine, and per
+        chunk when streaming (0 = ntraj divided evenly over the cpus).
+        When streaming averages at a list of ntraj, the chunk size must
+        divide every entry of the list, so a larger value is reduced to the
+        largest such divisor and a message is printed.
+    matrix_free : bool {False,True}
+        Apply the Liouvillian of constant problems in mesolve as a
+        matrix-free operator (see :func:`qutip.liouvillian_operator`)
+        instead of forming the N^2 x N^2 superoperator.
     rhs_reuse : bool {False,True}
         Reuse Hamiltonian data.
     rhs_filename : str
-        Name for compiled Cython file. 
+        Name for compiled Cython file. If None, the compiled file is taken
+        from the on-disk RHS cache (see ``qutip.settings.rhs_cache``).
     
     """
     def __init__(self,atol=1e-8,rtol=1e-6,method='adams',order=12,nsteps=1000,first_step=0,max_step=0,min_step=0,
-                mc_avg=True,tidy=True,num_cpus=0,norm_tol=1e-3,norm_steps=5,rhs_reuse=False,rhs_filename=None,gui=True):
+                mc_avg=True,tidy=True,num_cpus=0,norm_tol=1e-3,norm_steps=5,rhs_reuse=False,rhs_filename=None,gui=True,
+                mc_stream=False,mc_tol=0,mc_engine='zvode',mc_block_size=0,matrix_free=False):
         #Absolute tolerance (default = 1e-8)
         self.atol=atol
         #Relative tolerance (default = 1e-6)
         self.rtol=rtol
-        #Integration method (default = 'adams', for stiff 'bdf')
+        #Integration method (default = 'adams', for stiff 'bdf', constant generators 'krylov')
         self.method=method
         #Max. number of internal steps/call
         self.nsteps=nsteps
@@ -110,6 +139,16 @@ class Odeoptions():
         self.norm_steps=norm_steps
         #Use Progressbar (mcsolve only)
         self.gui=gui
+        #Average trajectories as they arrive (mcsolve only)
+        self.mc_stream=mc_stream
+        #Target standard error of expectation values, 0 = run all ntraj (mcsolve only)
+        self.mc_tol=mc_tol
+        #Trajectory engine, 'zvode' or 'block' (mcsolve only)
+        self.mc_engine=mc_engine
+        #Number of trajectories per block for the 'block' engine (mcsolve only)
+        self.mc_block_size=mc_block_size
+        #Apply constant Liouvillians without forming the superoperator (mesolve only)
+        self.matrix_free=matrix_free
     def __str__(self):
         print("Odeoptions properties:")
         print("----------------------")
@@ -129,5 +168,10 @@ class Odeoptions():
         print('rhs_reuse:    ',self.rhs_reuse)
         print('gui:          ',self.gui)
         print('mc_avg:       ',self.mc_avg)
+        print('mc_stream:    ',self.mc_stream)
+        print('mc_tol:       ',self.mc_tol)
+        print('mc_engine:    ',self.mc_engine)
+        print('mc_block_size:',self.mc_block_size)
+        print('matrix_free:  ',self.matrix_free)
         return ''
 
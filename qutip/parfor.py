@@ -17,18 +17,141 @@
 #
 ###########################################################################
 from scipy import array
-from multiprocessing import Pool
-import os,sys,signal
+from numpy import ceil
+from functools import partial
+from multiprocessing import Pool,Barrier
+import os,sys,signal,threading
 import qutip.settings as qset
 
+__all__=['parfor','parfor_iter','pool_start','pool_shutdown','pool_data']
+
+#long-lived pool started with pool_start, shared by parfor and mcsolve
+_pool=None
+#number of worker processes in the long-lived pool
+_pool_procs=0
+#static data preloaded into the workers of the long-lived pool
+_pool_data={}
+#data broadcast to the workers of the long-lived pool while it is running
+_pool_shared={}
+#lets every worker of the long-lived pool take exactly one broadcast task
+_pool_barrier=None
+#serializes broadcasts, so that their tasks do not interleave on the barrier
+_pool_lock=threading.Lock()
+
+def _pool_init(data,barrier):
+    global _pool_data,_pool_barrier
+    _pool_data=data
+    _pool_barrier=barrier
+
+
+def _pool_store(args):
+    key,value=args
+    if value is None:
+        _pool_shared.pop(key,None)
+    else:
+        _pool_shared[key]=value
+    #block until all workers hold the data, so that no worker takes two tasks
+    _pool_barrier.wait()
+
+
+def _pool_broadcast(key,value):
+    """Sends value once to every worker of the long-lived pool, where it is
+    stored in _pool_shared[key]. A value of None removes the key.
+    """
+    with _pool_lock:
+        _pool.map(_pool_store,[(key,value)]*_pool_procs,chunksize=1)
+
+
+def pool_start(num_cpus=0,data=None):
+    """Starts a long-lived pool of worker processes.
+    
+    Until :func:`pool_shutdown` is called, :func:`parfor` and 
+    :func:`qutip.mcsolve` run their tasks on this pool instead of creating
+    a new one on every call.
+    
+    Parameters
+    ----------
+    num_cpus : int
+        Number of worker processes (default = qutip.settings.num_cpus).
+    data : dict
+        Static data, e.g. operators shared by all tasks, that is sent to 
+        every worker once when the pool starts. Inside the tasks it is 
+        returned by :func:`pool_data`.
+    
+    Notes
+    -----
+    The workers are created when the pool starts, so the functions given
+    to :func:`parfor` must be importable by the workers, i.e. defined in a
+    module or before the pool was started.
+    
+    """
+    global _pool,_pool_procs,_pool_data
+    if _pool is not None:
+        raise Exception("Worker pool already running, call pool_shutdown first.")
+    if data is None:
+        data={}
+    _pool_data=data
+    _pool_procs=num_cpus if num_cpus else qset.num_cpus
+    _pool=Pool(processes=_pool_procs,initializer=_pool_init,initargs=(data,Barrier(_pool_procs)))
+
+
+def pool_shutdown():
+    """Stops the long-lived pool of worker processes started by
+    :func:`pool_start`.
+    """
+    global _pool,_pool_data
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+    _pool=None
+    _pool_data={}
+
+
+def pool_data():
+    """Returns the static data given to :func:`pool_start`.
+    
+    Returns
+    -------
+    data : dict
+        The data preloaded into the workers (empty if no pool was started).
+    
+    """
+    return _pool_data
+
+
+def _pool_get():
+    """Returns the long-lived pool, or None if none is running."""
+    return _pool
+
+
 def _task_wrapper(args):
     try:
         return args[0](args[1])
     except KeyboardInterrupt:
         os.kill(args[2], signal.SIGINT)
         os.exit(1)
-        
-def parfor(func,frange):
+
+
+def _task_func(func,kwargs):
+    #bind the shared keyword arguments once, so that they are pickled once
+    #per chunk of tasks rather than once per task
+    if kwargs:
+        return partial(func,**kwargs)
+    return func
+
+
+def _task_chunksize(frange,chunksize,num_procs):
+    #chunksize=None splits frange into about four chunks per process
+    if chunksize is None:
+        try:
+            num_tasks=len(frange)
+        except TypeError:
+            return 1
+        return max(1,int(ceil(num_tasks/(4.0*num_procs))))
+    return max(1,int(chunksize))
+
+
+def parfor(func,frange,chunksize=None,**kwargs):
     """Executes a single-variable function in parallel.
     
     Parallel execution of a for-loop over function `func` 
@@ -40,24 +163,38 @@ def parfor(func,frange):
         A single-variable function.
     frange: array_type
         An ``array`` of values to be passed on to `func`.
+    chunksize: int
+        Number of values of `frange` sent to a worker at a time.  The 
+        default splits `frange` into about four chunks per worker, which 
+        keeps the communication overhead low for cheap functions.
+    kwargs:
+        Keyword arguments passed on to every call of `func`, e.g. constant 
+        operators shared by all values of `frange`.
     
     Returns
     ------- 
     ans : list
         A ``list`` with length equal to number of input parameters
-        containting the output from `func`.  In general, the ordering
-        of the output variables will not be in the same order as `frange`.
+        containting the output from `func`, in the same order as `frange`.
     
     Notes
     -----
     Multiple values can be passed into the parfor function using Pythons
     builtin 'zip' command, or using multidimensional `lists` or `arrays`.
+    
+    If a worker pool was started with :func:`pool_start`, the function
+    is evaluated on that pool.
          
     """
     
-    pool=Pool(processes=qset.num_cpus)
+    if _pool is not None:
+        pool,num_procs=_pool,_pool_procs
+    else:
+        pool,num_procs=Pool(processes=qset.num_cpus),qset.num_cpus
     try:
-        par_return=list(pool.map(_task_wrapper,((func,f,os.getpid()) for f in frange)))
+        task_func=_task_func(func,kwargs)
+        tasks=[(task_func,f,os.getpid()) for f in frange]
+        par_return=list(pool.map(_task_wrapper,tasks,_task_chunksize(tasks,chunksize,num_procs)))
         if isinstance(par_return[0],tuple):
             par_return=[elem for elem in par_return]
             num_elems=len(par_return[0])
@@ -66,4 +203,67 @@ def parfor(func,frange):
             return list(par_return)
     except KeyboardInterrupt:
         pool.terminate()
+        if pool is _pool:
+            pool_shutdown()
+    finally:
+        if pool is not _pool:
+            pool.close()
+
+
+def parfor_iter(func,frange,chunksize=None,**kwargs):
+    """Executes a single-variable function in parallel and iterates over
+    the results as they become available.
+    
+    Like :func:`parfor`, but returns an iterator that yields the output of
+    `func` for each value of `frange`, in the same order as `frange`, as 
+    soon as it is done.  This allows large sweeps to be processed or 
+    written out incrementally.
+    
+    Parameters
+    ----------
+    func: function_type
+        A single-variable function.
+    frange: array_type
+        An ``array``, or any iterable, of values to be passed on to `func`.
+    chunksize: int
+        Number of values of `frange` sent to a worker at a time.  The 
+        default splits `frange` into about four chunks per worker, or sends
+        one value at a time if the length of `frange` is unknown.
+    kwargs:
+        Keyword arguments passed on to every call of `func`.
+    
+    Returns
+    -------
+    ans : iterator
+        Iterator over the output from `func`.
 
+    Notes
+    -----
+    If the iterator is closed before it is exhausted, the remaining tasks
+    are cancelled.  On a pool started with :func:`pool_start` they are left
+    to finish, since cancelling them would stop the pool.
+
+    """
+    if _pool is not None:
+        pool,num_procs=_pool,_pool_procs
+    else:
+        pool,num_procs=Pool(processes=qset.num_cpus),qset.num_cpus
+    finished=False
+    try:
+        task_func=_task_func(func,kwargs)
+        pid=os.getpid()
+        chunksize=_task_chunksize(frange,chunksize,num_procs)
+        for out in pool.imap(_task_wrapper,((task_func,f,pid) for f in frange),chunksize):
+            yield out
+        finished=True
+    except KeyboardInterrupt:
+        pool.terminate()
+        if pool is _pool:
+            pool_shutdown()
+    finally:
+        if pool is not _pool:
+            if finished:
+                pool.close()
+            else:
+                #iteration stopped early, cancel the remaining tasks
+                pool.terminate()
@@ -18,11 +18,13 @@
 ###########################################################################
 
 import types
+import copy
 import numpy as np
 import scipy.linalg as la
+import scipy.integrate
 
 from qutip.qobj import Qobj
-from qutip.superoperator import vec2mat, mat2vec
+from qutip.superoperator import vec2mat, mat2vec, spre
 from qutip.mesolve import mesolve
 from qutip.essolve import essolve
 from qutip.steady import steadystate
@@ -80,19 +82,18 @@ def propagator(H, t, c_op_list, H_args=None, opt=None):
             N = H.shape[0]
             dims = H.dims
 
-        u = np.zeros([N, N, len(tlist)], dtype=complex)
-
-        for n in range(0, N):
-            psi0 = basis(N, n)
-            output = mesolve(H, psi0, tlist, [], [], H_args, opt)
-            for k, t in enumerate(tlist):
-                u[:, n, k] = output.states[k].full().T
+        if isinstance(H, Qobj):
+            u = np.zeros([N, N, len(tlist)], dtype=complex)
 
-        # todo: evolving a batch of wave functions:
-        #psi_0_list = [basis(N, n) for n in range(N)]
-        #psi_t_list = mesolve(H, psi_0_list, [0, t], [], [], H_args, opt)
-        #for n in range(0, N):
-        #    u[:,n] = psi_t_list[n][1].full().T
+            # evolve all basis states as one batch
+            psi0_list = [basis(N, n) for n in range(0, N)]
+            output_list = mesolve(H, psi0_list, tlist, [], [], H_args, opt)
+            for n, output in enumerate(output_list):
+                for k, t in enumerate(tlist):
+                    u[:, n, k] = output.states[k].full().T
+        else:
+            # time-dependent: integrate the full unitary in one go
+            u = _unitary_propagators(H, tlist, H_args, opt)
 
     else:
         # calculate the propagator for the vector representation of the
@@ -112,10 +113,11 @@ def propagator(H, t, c_op_list, H_args=None, opt=None):
 
         u = np.zeros([N * N, N * N, len(tlist)], dtype=complex)
 
-        for n in range(0, N * N):
-            psi0 = basis(N * N, n)
-            rho0 = Qobj(vec2mat(psi0.full()))
-            output = mesolve(H, rho0, tlist, c_op_list, [], H_args, opt)
+        # evolve all basis density matrices as one batch
+        rho0_list = [Qobj(vec2mat(basis(N * N, n).full()))
+                     for n in range(0, N * N)]
+        output_list = mesolve(H, rho0_list, tlist, c_op_list, [], H_args, opt)
+        for n, output in enumerate(output_list):
             for k, t in enumerate(tlist):
                 u[:, n, k] = mat2vec(output.states[k].full()).T
 
@@ -125,6 +127,74 @@ def propagator(H, t, c_op_list, H_args=None, opt=None):
         return [Qobj(u[:, :, k], dims=dims) for k in range(len(tlist))]
 
 
+def _unitary_propagators(H, tlist, H_args=None, opt=None):
+    """
+    Private function that integrates dU/dt = -i H(t) U for the full unitary
+    as a single ODE, starting from U = 1 at tlist[0], and samples U at every
+    time in `tlist`. H can be a Qobj, a callback function H(t, args) or a
+    list in the list-function or list-string format (see
+    :func:`qutip.mesolve`).
+
+    Returns an array of shape (N, N, len(tlist)).
+    """
+    if opt is None:
+        opt = Odeoptions()
+
+    if not isinstance(H, types.FunctionType):
+        # vec(H U) = spre(H) vec(U), so mesolve evolves U as a density
+        # matrix under the superoperators -i spre(H_k), with the same
+        # (compiled) time-dependent coefficients
+        if isinstance(H, Qobj):
+            H0 = H
+            L = -1.0j * spre(H)
+        else:
+            H0 = H[0] if isinstance(H[0], Qobj) else H[0][0]
+            L = [-1.0j * spre(h) if isinstance(h, Qobj)
+                 else [-1.0j * spre(h[0]), h[1]] for h in H]
+        N = H0.shape[0]
+        # the RHS acts on vec(U), so a previously compiled RHS does not
+        # apply, the RHS cache avoids compiling it again
+        opt = copy.copy(opt)
+        opt.rhs_reuse = False
+        U0 = Qobj(np.eye(N, dtype=complex), dims=H0.dims)
+        output = mesolve(L, U0, tlist, [], [],
+                         H_args if H_args is not None else {}, opt)
+        u = np.zeros([N, N, len(tlist)], dtype=complex)
+        for k, U in enumerate(output.states):
+            u[:, :, k] = U.full()
+        return u
+
+    # same calling convention as the callback format in mesolve
+    func_args = [arg.data if isinstance(arg, Qobj) else arg
+                 for arg in (H_args if H_args is not None else [])]
+
+    def H_t(t):
+        h = H(t, func_args)
+        return h.data if isinstance(h, Qobj) else h
+
+    N = H_t(0.0).shape[0]
+
+    def rhs(t, y):
+        U = y.reshape((N, N), order='F')
+        return (-1.0j * (H_t(t) * U)).ravel('F')
+
+    r = scipy.integrate.ode(rhs)
+    r.set_integrator('zvode', method=opt.method, order=opt.order,
+                     atol=opt.atol, rtol=opt.rtol, nsteps=opt.nsteps,
+                     first_step=opt.first_step, min_step=opt.min_step,
+                     max_step=opt.max_step)
+    r.set_initial_value(np.eye(N, dtype=complex).ravel('F'), tlist[0])
+
+    u = np.zeros([N, N, len(tlist)], dtype=complex)
+    for k, t in enumerate(tlist):
+        if k > 0:
+            r.integrate(t)
+        if not r.successful():
+            raise ValueError('Error in ODE solver')
+        u[:, :, k] = r.y.reshape((N, N), order='F')
+    return u
+
+
 def _get_min_and_index(lst):
     """
     Private function for obtaining min and max indicies.
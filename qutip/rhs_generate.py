@@ -17,16 +17,16 @@
 #
 ###########################################################################
 from qutip.cyQ.codegen import Codegen
-import os,platform,numpy
-from qutip._reset import _reset_odeconfig
+import os,sys,platform,numpy,hashlib,shutil,tempfile,importlib
 from qutip.odeoptions import Odeoptions
 from scipy import ndarray, array
 from qutip.odechecks import _ode_checks
 import qutip.settings
 import qutip.odeconfig as odeconfig
+from qutip.odeconfig import Odeconfig
 from types import FunctionType
 from qutip.qobj import Qobj
-from qutip.superoperator import spre,spost
+from qutip.superoperator import liouvillian
 
 def rhs_clear():
     """
@@ -40,12 +40,7 @@ def rhs_clear():
     Nothing, just clears data from internal odeconfig module.
     
     """
-    #time-dependent function stuff
-    odeconfig.tdfunc=None         #Placeholder for time-dependent RHS function.
-    odeconfig.colspmv=None        #Placeholder for time-dependent col-spmv function.
-    odeconfig.colexpect=None      #Placeholder for time-dependent col_expect function.
-    odeconfig.string=None         #Holds string of variables to be passed onto time-depdendent ODE solver.
-    odeconfig.tdname=None         #Name of td .pyx file (used in parallel mc code)
+    odeconfig.last=Odeconfig()
 
 
 def rhs_generate(H,c_ops,args={},options=Odeoptions(),name=None):
@@ -72,12 +67,15 @@ def rhs_generate(H,c_ops,args={},options=Odeoptions(),name=None):
     will result in an error.
     
     """
-    _reset_odeconfig() #clear odeconfig
-    if name:
-        odeconfig.tdname=name
-    else:
-        odeconfig.tdname="rhs"+str(odeconfig.cgen_num)
-    
+    _rhs_generate_config(H,c_ops,args,name).save()
+
+
+def _rhs_generate_config(H,c_ops,args={},name=None):
+    """
+    Private function that generates the Cython RHS of rhs_generate and
+    returns it in a new Odeconfig instance.
+    """
+    config=Odeconfig()
     n_op = len(c_ops)
 
     Lconst = 0        
@@ -92,13 +90,13 @@ def rhs_generate(H,c_ops,args={},options=Odeoptions(),name=None):
     for h_spec in H:
         if isinstance(h_spec, Qobj):
             h = h_spec
-            Lconst += -1j*(spre(h) - spost(h)) 
+            Lconst += liouvillian(h, [])
         
         elif isinstance(h_spec, list): 
             h = h_spec[0]
             h_coeff = h_spec[1]
 
-            L = -1j*(spre(h) - spost(h))
+            L = liouvillian(h, [])
 
             Ldata.append(L.data.data)
             Linds.append(L.data.indices)
@@ -113,15 +111,13 @@ def rhs_generate(H,c_ops,args={},options=Odeoptions(),name=None):
     for c_spec in c_ops:
         if isinstance(c_spec, Qobj):
             c = c_spec
-            cdc = c.dag() * c
-            Lconst += spre(c) * spost(c.dag()) - 0.5 * spre(cdc) - 0.5 * spost(cdc) 
+            Lconst += liouvillian(None, [c])
 
         elif isinstance(c_spec, list): 
             c = c_spec[0]
             c_coeff = c_spec[1]
 
-            cdc = c.dag() * c
-            L = spre(c) * spost(c.dag()) - 0.5 * spre(cdc) - 0.5 * spost(cdc) 
+            L = liouvillian(None, [c])
 
             Ldata.append(L.data.data)
             Linds.append(L.data.indices)
@@ -144,17 +140,125 @@ def rhs_generate(H,c_ops,args={},options=Odeoptions(),name=None):
     n_L_terms = len(Ldata)
     
     cgen=Codegen(h_terms=n_L_terms,h_tdterms=Lcoeff, args=args)
-    cgen.generate(odeconfig.tdname+".pyx")
-    os.environ['CFLAGS'] = '-O3 -w'
-    import pyximport
-    pyximport.install(setup_args={'include_dirs':[numpy.get_include()]})
-    code = compile('from '+odeconfig.tdname+' import cyq_td_ode_rhs', '<string>', 'exec')
-    exec(code)
-    odeconfig.tdfunc=cyq_td_ode_rhs
+    config.tdname,rhs_module=rhs_compile(cgen,name)
+    config.tdfunc=rhs_module.cyq_td_ode_rhs
     try:
-        os.remove(odeconfig.tdname+".pyx")
+        os.remove(config.tdname+".pyx")
     except:
         pass
+    return config
+
+
+def rhs_compile(cgen,name=None):
+    """
+    Generates and compiles the Cython code of a Codegen instance, and 
+    imports the resulting module.
+    
+    If no name is given and ``qutip.settings.rhs_cache`` is True, the module
+    is looked up in an on-disk cache keyed on a hash of the generated code,
+    the Cython version and the compiler flags. The compiled module is reused
+    between calls and between Python processes, so the code only has to be
+    compiled the first time a given RHS is encountered. Otherwise the code is
+    written to ``name.pyx`` in the current directory and compiled with 
+    pyximport.
+    
+    Parameters
+    ----------
+    cgen : Codegen
+        Instance of the Cython code generator.
+    name : str
+        Name of generated RHS module (disables the cache).
+    
+    Returns
+    -------
+    name, module : str, module
+        Name of the generated module and the imported module itself.
+    
+    """
+    os.environ['CFLAGS'] = '-O3 -w'
+    if name is None and qutip.settings.rhs_cache:
+        code=cgen.generate(None)
+        name="rhs_"+_rhs_cache_key(code)
+        return name,_rhs_cache_import(name,code)
+    
+    if name is None:
+        name="rhs"+str(odeconfig.cgen_num)
+    cgen.generate(name+".pyx")
+    import pyximport
+    pyximport.install(setup_args={'include_dirs':[numpy.get_include()]})
+    return name,importlib.import_module(name)
+
+
+def rhs_cache_clear():
+    """
+    Removes all compiled Cython RHS modules from the on-disk cache.
+    
+    Parameters
+    ----------
+    
+    Returns
+    -------
+    Nothing, just removes the files in the cache directory.
+    
+    """
+    cache_dir=_rhs_cache_dir()
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir,ignore_errors=True)
+
+
+def _rhs_cache_dir():
+    """
+    Private function returning the per-user directory holding the
+    compiled RHS modules.
+    """
+    if qutip.settings.rhs_cache_dir:
+        return os.path.expanduser(qutip.settings.rhs_cache_dir)
+    return os.path.join(os.path.expanduser("~"),".qutip","rhs_cache")
+
+
+def _rhs_cache_key(code):
+    """
+    Private function that hashes the generated code together with 
+    everything else that affects the compiled module.
+    """
+    import Cython
+    key=hashlib.sha1()
+    for item in [code,Cython.__version__,numpy.__version__,
+                 os.environ.get('CFLAGS',''),sys.version,platform.platform()]:
+        key.update(item.encode('utf-8'))
+    return key.hexdigest()
+
+
+def _rhs_cache_import(name,code):
+    """
+    Private function that imports a compiled RHS module from the cache,
+    compiling it first if it is not found.
+    """
+    import pyximport.pyxbuild
+    from sysconfig import get_config_var
+    cache_dir=_rhs_cache_dir()
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    if cache_dir not in sys.path:
+        sys.path.insert(0,cache_dir)
+    ext=get_config_var('EXT_SUFFIX') or get_config_var('SO')
+    if not os.path.exists(os.path.join(cache_dir,name+ext)):
+        #compile in a private directory and move the result into the cache 
+        #in one step, so concurrent processes never see a partial module
+        build_dir=tempfile.mkdtemp(dir=cache_dir)
+        try:
+            pyx_file=os.path.join(build_dir,name+".pyx")
+            with open(pyx_file,"w") as f:
+                f.write(code)
+            so_file=pyximport.pyxbuild.pyx_to_dll(pyx_file,build_in_temp=True,
+                        pyxbuild_dir=build_dir,inplace=True,
+                        setup_args={'include_dirs':[numpy.get_include()]})
+            os.rename(so_file,os.path.join(cache_dir,name+ext))
+        finally:
+            shutil.rmtree(build_dir,ignore_errors=True)
+    if hasattr(importlib,'invalidate_caches'):
+        importlib.invalidate_caches()
+    return importlib.import_module(name)
             
             
             
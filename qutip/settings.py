@@ -33,6 +33,10 @@ auto_herm=True
 auto_tidyup_atol=1e-15
 #number of cpus (set at qutip import)
 num_cpus=1
+#reuse compiled Cython RHS modules from the on-disk cache
+rhs_cache=True
+#directory for compiled Cython RHS modules (None = ~/.qutip/rhs_cache)
+rhs_cache_dir=None
 
 def reset():
     from qutip._reset import _reset
@@ -66,7 +66,14 @@ def _sp_one_norm(op):
     """
     One norm for Qobj
     """
-    return np.max(np.array([np.sum(np.abs((op.data[:,k]).data)) for k in range(op.shape[1])]))
+    return _sp_one_norm_data(op.data)
+
+
+def _sp_one_norm_data(A):
+    """
+    One norm of a sparse matrix.
+    """
+    return np.max(np.asarray(abs(A).sum(axis=0)))
 
 
 def sp_eigs(op,vecs=True,sparse=False,sort='low',eigvals=0,tol=0,maxiter=100000):
@@ -221,66 +228,104 @@ def _sp_expm(qo):
     """
     Sparse matrix exponential of a quantum operator.
     Called by the Qobj expm method.
+    
+    Banded and (nearly) nilpotent operators, whose exponential is itself
+    sparse, are exponentiated with a sparse Taylor series combined with 
+    scaling and squaring. If the series fills in, which shows after a few
+    cheap sparse products, the operator is exponentiated as a dense matrix.
     """
-    A=qo.data #extract Qobj data (sparse matrix)
-    m_vals=np.array([3,5,7,9,13])
-    theta=np.array([0.01495585217958292,0.2539398330063230,0.9504178996162932,2.097847961257068,5.371920351148152],dtype=float)
-    normA=_sp_one_norm(qo)
-    if normA<=theta[-1]:
-        for ii in range(len(m_vals)):
-            if normA<=theta[ii]:
-                F=_pade(A, m_vals[ii])
-                break
-    else:
-        t,s=np.frexp(normA/theta[-1])
-        s=s-(t==0.5)
-        A=A/2.0**s
-        F=_pade(A, m_vals[-1])
-        for i in range(s):
-            F=F*F
+    A=qo.data.tocsr() #extract Qobj data (sparse matrix)
+    n=A.shape[0]
+    if A.nnz==0:
+        return sp.eye(n,n,dtype=complex,format='csr')
+    coo=A.tocoo()
+    if np.all(coo.row==coo.col): #diagonal operator
+        return sp.diags([np.exp(A.diagonal())],[0],shape=(n,n),format='csr')
+    F=_sp_expm_taylor(A,max_fill=0.25)
+    if F is not None:
+        return F
+    return sp.csr_matrix(la.expm(A.toarray()))
+
 
+def _sp_expm_taylor(A,tol=1e-15,max_fill=0.25):
+    """
+    Sparse Taylor series for exp(A) with scaling and squaring. Elements 
+    smaller than tol relative to the largest element are dropped after each
+    product to keep the result sparse.  Returns None if the number of 
+    nonzero elements exceeds max_fill*N**2.
+    """
+    n=A.shape[0]
+    max_nnz=max_fill*n**2
+    normA=_sp_one_norm_data(A)
+    s=max(0,int(np.ceil(np.log2(normA)))) if normA>0 else 0
+    B=A/2.0**s
+    F=sp.eye(n,n,dtype=complex,format='csr')
+    T=F
+    for k in range(1,60):
+        T=_sp_drop(T*B/k,tol)
+        if T.nnz==0: #nilpotent, series terminated
+            break
+        F=F+T
+        if F.nnz>max_nnz:
+            return None
+        if np.max(np.abs(T.data))<tol*np.max(np.abs(F.data)):
+            break
+    for k in range(s):
+        F=_sp_drop(F*F,tol)
+        if F.nnz>max_nnz:
+            return None
     return F
 
-def _pade(A, m):
-    n=np.shape(A)[0]
-    c=_padecoeff(m)
-    if m!=13:
-        apows= [[] for jj in range(int(np.ceil((m+1)/2)))]
-        apows[0]=sp.eye(n,n,format='csr')
-        apows[1]=A*A
-        for jj in range(2,int(np.ceil((m+1)/2))):
-            apows[jj]=apows[jj-1]*apows[1]
-        U=sp.lil_matrix((n,n)).tocsr(); V=sp.lil_matrix((n,n)).tocsr()
-        for jj in range(m,0,-2):
-            U=U+c[jj]*apows[jj//2]
-        U=A*U
-        for jj in range(m-1,-1,-2):
-            V=V+c[jj]*apows[(jj+1)//2]
-        F=la.solve((-U+V).todense(),(U+V).todense())
-        return sp.lil_matrix(F).tocsr()
-    elif m==13:
-        A2=A*A
-        A4=A2*A2
-        A6=A2*A4
-        U = A*(A6*(c[13]*A6+c[11]*A4+c[9]*A2)+c[7]*A6+c[5]*A4+c[3]*A2+c[1]*sp.eye(n,n).tocsr())
-        V = A6*(c[12]*A6 + c[10]*A4 + c[8]*A2)+ c[6]*A6 + c[4]*A4 + c[2]*A2 + c[0]*sp.eye(n,n).tocsr()
-        F=la.solve((-U+V).todense(),(U+V).todense()) 
-        return sp.csr_matrix(F)
 
-def _padecoeff(m):
+def _sp_drop(A,tol):
     """
-    Private function returning coefficients for Pade approximation.
+    Removes elements smaller than tol times the largest element.
     """
-    if m==3:
-        return np.array([120, 60, 12, 1])
-    elif m==5:
-        return np.array([30240, 15120, 3360, 420, 30, 1])
-    elif m==7:
-        return np.array([17297280, 8648640, 1995840, 277200, 25200, 1512, 56, 1])
-    elif m==9:
-        return np.array([17643225600, 8821612800, 2075673600, 302702400, 30270240,2162160, 110880, 3960, 90, 1])
-    elif m==13:
-        return np.array([64764752532480000, 32382376266240000, 7771770303897600,1187353796428800, 129060195264000, 10559470521600,670442572800, 33522128640, 1323241920,40840800, 960960, 16380, 182, 1])
-
+    if A.nnz>0:
+        A.data[np.abs(A.data)<tol*np.max(np.abs(A.data))]=0
+        A.eliminate_zeros()
+    return A
 
 
+def _sp_expm_multiply(A, v, t, m=10, tol=1e-8, m_max=50):
+    """
+    Action of the matrix exponential exp(t*A) on the vector v using Krylov
+    subspaces, for a sparse (CSR) generator A.
+    
+    The Arnoldi process is extended from dimension m until the a posteriori
+    error estimate is below tol*|v|, or until m_max is reached, in which 
+    case the time step is split in two.
+    
+    Returns the propagated vector and the Krylov dimension that was needed,
+    which can be passed as m for the next step.
+    """
+    n = A.shape[0]
+    v = np.asarray(v, dtype=complex).ravel()
+    beta = la.norm(v)
+    if beta == 0.0:
+        return v, m
+    m_max = min(m_max, n)
+    m = max(1, min(m, m_max))
+    V = np.zeros((n, m_max + 1), dtype=complex)
+    H = np.zeros((m_max + 1, m_max), dtype=complex)
+    V[:, 0] = v / beta
+    for j in range(m_max):
+        # Arnoldi step with modified Gram-Schmidt
+        w = A * V[:, j]
+        for i in range(j + 1):
+            H[i, j] = np.vdot(V[:, i], w)
+            w = w - H[i, j] * V[:, i]
+        H[j + 1, j] = la.norm(w)
+        breakdown = abs(H[j + 1, j]) <= 1e-14 * beta
+        if j + 1 < m and not breakdown:
+            V[:, j + 1] = w / H[j + 1, j]
+            continue
+        E = la.expm(t * H[:j + 1, :j + 1])
+        err = beta * abs(H[j + 1, j] * E[j, 0])
+        if breakdown or err <= tol * beta:
+            return beta * np.dot(V[:, :j + 1], E[:, 0]), j + 1
+        V[:, j + 1] = w / H[j + 1, j]
+    # no convergence within m_max: split the time step
+    w, m1 = _sp_expm_multiply(A, v, 0.5 * t, m_max, tol, m_max)
+    w, m2 = _sp_expm_multiply(A, w, 0.5 * t, m_max, tol, m_max)
+    return w, max(m1, m2)
@@ -26,7 +26,8 @@ import numpy as np
 from scipy import prod, finfo, randn
 import scipy.sparse as sp
 import scipy.linalg as la
-from scipy.sparse.linalg import spsolve,bicg
+from scipy.sparse.linalg import spsolve,bicg,gmres,lgmres,bicgstab,spilu,splu,LinearOperator
+from scipy.sparse.csgraph import reverse_cuthill_mckee
 from qutip.qobj import *
 from qutip.superoperator import *
 from qutip.operators import qeye
@@ -34,7 +35,8 @@ from qutip.rand import rand_ket
 from qutip.sparse import _sp_inf_norm
 import qutip.settings as qset
 
-def steadystate(H, c_op_list,maxiter=100,tol=1e-6,method='solve'):
+def steadystate(H, c_op_list,maxiter=100,tol=1e-6,method='direct',matrix_free=False,
+                use_rcm=True,use_precond=True,rho0=None):
     """Calculates the steady state for the evolution subject to the 
     supplied Hamiltonian and list of collapse operators. 
     
@@ -56,36 +58,57 @@ def steadystate(H, c_op_list,maxiter=100,tol=1e-6,method='solve'):
         Tolerance used by iterative solver, default = 1e-6.
         
     method : str
-        Method for solving linear equations. Direct solver 'solve' (default) or 
-        iterative biconjugate gradient method 'bicg'.
+        Method for solving linear equations, see :func:`steady`. Direct LU
+        solver 'direct' (default), preconditioned iterative solvers 'gmres',
+        'lgmres' and 'bicgstab', or the inverse power method with a direct
+        ('solve') or biconjugate gradient ('bicg') solver.
+
+    matrix_free : bool
+        Use the matrix-free Liouvillian (:func:`qutip.liouvillian_operator`)
+        with an iterative solver, 'lgmres' unless `method` is 'gmres' or
+        'bicgstab'.
+
+    use_rcm : bool
+        Reorder the equations with reverse Cuthill-McKee before the
+        iterative solvers, default = True.
+
+    use_precond : bool
+        Use an incomplete-LU preconditioner in the iterative solvers, or for
+        a matrix-free Liouvillian the inverse of its part without the jump
+        terms, default = True.
+
+    rho0 : qobj
+        Initial guess for the iterative solvers, e.g. the steady state of a
+        nearby point in a parameter sweep.
     
     Returns
     -------
     ket : qobj 
         Ket vector for steady state.
     
-    Notes
-    -----
-    Uses the inverse power method.
-    See any Linear Algebra book with an iterative methods section.
-    
     """
     n_op = len(c_op_list)
 
     if n_op == 0:
         raise ValueError('Cannot calculate the steady state for a nondissipative system (no collapse operators given)')
 
-    L = liouvillian(H, c_op_list)
-    return steady(L,maxiter,tol,method)
+    if matrix_free:
+        L = liouvillian_operator(H, c_op_list)
+    else:
+        L = liouvillian(H, c_op_list)
+    return steady(L,maxiter,tol,method,use_rcm,use_precond,rho0)
 
-def steady(L,maxiter=100,tol=1e-6,method='solve'):
+def steady(L,maxiter=100,tol=1e-6,method='direct',use_rcm=True,use_precond=True,
+           rho0=None):
 	"""Steady state for the evolution subject to the 
 	supplied Louvillian.
     
     Parameters
     ----------
-    L : qobj
-        Liouvillian superoperator.
+    L : qobj / LinearOperator / :class:`LiouvillianLU`
+        Liouvillian superoperator, a matrix-free Liouvillian from
+        :func:`qutip.liouvillian_operator`, or a factorized Liouvillian whose
+        cached steady state is returned.
               
     maxiter : int 
         Maximum number of iterations to perform, default = 100.
@@ -94,8 +117,26 @@ def steady(L,maxiter=100,tol=1e-6,method='solve'):
         Tolerance used by iterative solver, default = 1e-6.
     
     method : str
-        Method for solving linear equations. Direct solver 'solve' (default) or 
-        iterative biconjugate gradient method 'bicg'.
+        Method for solving linear equations. 'direct' (default) replaces one
+        row of L with the trace condition and solves the resulting linear
+        system once with a sparse LU decomposition, for an operator L it
+        falls back to 'solve'. 'gmres', 'lgmres' and
+        'bicgstab' solve the same system iteratively. 'solve' (direct) and
+        'bicg' (biconjugate gradient) use the inverse power method.
+
+    use_rcm : bool
+        Reorder the equations with reverse Cuthill-McKee before the
+        iterative solvers, which reduces the fill-in of the incomplete LU
+        preconditioner, default = True.
+
+    use_precond : bool
+        Use an incomplete-LU preconditioner in the iterative solvers, or for
+        a matrix-free Liouvillian the inverse of its part without the jump
+        terms, default = True.
+
+    rho0 : qobj
+        Initial guess for the iterative solvers and the inverse power
+        method, e.g. the steady state of a nearby point in a parameter sweep.
     
     Returns
     --------
@@ -104,24 +145,39 @@ def steady(L,maxiter=100,tol=1e-6,method='solve'):
     
     Notes
     -----
-    Uses the inverse power method. 
-    See any Linear Algebra book with an iterative methods section.
+    The inverse power method is described in any Linear Algebra book with
+    an iterative methods section.
     
     """
+	if isinstance(L, LiouvillianLU):
+		return L.steady()
+	if isinstance(L, LinearOperator):
+		return _steady_linop(L,maxiter,tol,method,use_precond,rho0)
 	eps=finfo(float).eps
 	if (not isoper(L)) & (not issuper(L)):
 		raise TypeError('Steady states can only be found for operators or superoperators.')
+	if method=='direct' and not issuper(L):
+		#the trace condition needs a superoperator, find the null vector of
+		#an operator with the inverse power method instead
+		method='solve'
+	if method in ['direct','gmres','lgmres','bicgstab']:
+		if not issuper(L):
+			raise TypeError('Method '+method+' requires a superoperator.')
+		return _steady_trace_row(L,maxiter,tol,method,use_rcm,use_precond,rho0)
 	rhoss=Qobj()
 	sflag=issuper(L)
 	if sflag:
 		rhoss.dims=L.dims[0]
 		rhoss.shape=[prod(rhoss.dims[0]),prod(rhoss.dims[1])]
 	else:
-		rhoss.dims=[L.dims[0],1]
+		rhoss.dims=[L.dims[0],[1]]
 		rhoss.shape=[prod(rhoss.dims[0]),1]
 	n=prod(rhoss.shape)
 	L1=L.data+eps*_sp_inf_norm(L)*sp.eye(n,n,format='csr')
-	v=randn(n,1)
+	if rho0 is not None:
+		v=mat2vec(rho0.full())
+	else:
+		v=randn(n,1)
 	it=0
 	while (la.norm(L.data*v,np.inf)>tol) and (it<maxiter):
 		if method=='bicg':
@@ -137,11 +193,12 @@ def steady(L,maxiter=100,tol=1e-6,method='solve'):
 		trow=sp.eye(rhoss.shape[0],rhoss.shape[0],format='lil')
 		trow=trow.reshape((1,n)).tocsr()
 		data=v/sum(trow.dot(v))
+		data=reshape(data,(rhoss.shape[0],rhoss.shape[1])).T
+		data=sp.csr_matrix(data)
+		rhoss.data=0.5*(data+data.conj().T)
 	else:
-		data=data/la.norm(v)
-	data=reshape(data,(rhoss.shape[0],rhoss.shape[1])).T
-	data=sp.csr_matrix(data)
-	rhoss.data=0.5*(data+data.conj().T)
+		data=reshape(v/la.norm(v),(rhoss.shape[0],1))
+		rhoss.data=sp.csr_matrix(data)
 	#data=sp.triu(data,format='csr')#take only upper triangle
 	#rhoss.data=0.5*sp.eye(rhoss.shape[0],rhoss.shape[1],format='csr')*(data+data.conj().T) #output should be hermitian, but not guarenteed using iterative meth
 	if qset.auto_tidyup:
@@ -150,3 +207,226 @@ def steady(L,maxiter=100,tol=1e-6,method='solve'):
 	    return Qobj(rhoss)
 
     		
+
+
+def _steady_trace_row(L,maxiter,tol,method,use_rcm,use_precond,rho0):
+    """
+    Private function that solves for the steady state of the superoperator L
+    by replacing the first row of L, which belongs to the population of the
+    first state, with the trace condition Tr(rho) = 1. The resulting system
+    A x = e_0 is nonsingular for a unique steady state and is solved once,
+    directly or with a preconditioned Krylov method.
+    """
+    n=L.shape[0]
+    A,b=_trace_row_system(L)
+
+    if method=='direct':
+        v=spsolve(A.tocsc(),b,use_umfpack=False)
+    else:
+        x0=mat2vec(rho0.full()).ravel() if rho0 is not None else None
+        if use_rcm:
+            perm=reverse_cuthill_mckee(A,symmetric_mode=False)
+            A=A[perm,:][:,perm]
+            b=b[perm]
+            if x0 is not None:
+                x0=x0[perm]
+        M=None
+        if use_precond:
+            try:
+                ilu=spilu(A.tocsc(),drop_tol=1e-5,fill_factor=20)
+                M=LinearOperator((n,n),matvec=ilu.solve,dtype=complex)
+            except RuntimeError:
+                M=None
+        if method=='gmres':
+            v,check=gmres(A,b,x0=x0,tol=tol,maxiter=maxiter,M=M)
+        elif method=='bicgstab':
+            v,check=bicgstab(A,b,x0=x0,tol=tol,maxiter=maxiter,M=M)
+        else:
+            v,check=lgmres(A,b,x0=x0,tol=tol,maxiter=maxiter,M=M)
+        if check>0:
+            raise ValueError('Failed to find steady state after ' + str(maxiter) +' iterations')
+        elif check<0:
+            raise ValueError('Illegal input to the iterative solver')
+        if use_rcm:
+            v_perm=v
+            v=np.zeros(n,dtype=complex)
+            v[perm]=v_perm
+
+    return _vec2rhoss(v,L.dims[0])
+
+
+def _trace_row_system(L):
+    """
+    Private function returning the matrix A and right-hand side b of the
+    steady-state problem A x = b: L with its first row, which belongs to the
+    population of the first state, replaced by the trace condition
+    Tr(rho) = 1.
+    """
+    n=L.shape[0]
+    N=int(np.sqrt(n))
+    # vectorized indices of the diagonal elements, I = i + N*i
+    diag_idx=np.arange(N)*(N+1)
+    mask=np.ones(n)
+    mask[0]=0
+    A=sp.diags(mask,0,format='csr')*L.data.tocsr()
+    A=A+sp.csr_matrix((np.ones(N),(np.zeros(N,dtype=int),diag_idx)),shape=(n,n))
+    b=np.zeros(n,dtype=complex)
+    b[0]=1.0
+    return A,b
+
+
+def _vec2rhoss(v,dims):
+    """
+    Private function converting a steady-state vector to a normalized,
+    Hermitian density matrix.
+    """
+    N=int(np.sqrt(len(v)))
+    data=np.asarray(v).reshape((N,N),order='F')
+    data=data/np.trace(data)
+    data=0.5*(data+data.conj().T)
+    rhoss=Qobj(data,dims=dims,shape=[N,N])
+    if qset.auto_tidyup:
+        return rhoss.tidyup()
+    else:
+        return rhoss
+
+
+class LiouvillianLU():
+    """
+    Sparse LU factorizations of a Liouvillian, computed on first use and
+    cached, so that a system studied under many pairs of operators is only
+    factorized once. Used by :func:`steady`, :func:`qutip.spectrum_ss` and
+    the correlation functions in :mod:`qutip.correlation`.
+
+    Parameters
+    ----------
+    L : qobj
+        Liouvillian superoperator.
+
+    cache_size : int
+        Maximum number of factorizations of :math:`L - i\\omega` kept for
+        nonzero :math:`\\omega`, the oldest is dropped first. The default,
+        zero, keeps only the factorization of the steady-state problem, since
+        each factorization of the :math:`N^2 \\times N^2` matrix can take
+        a lot of memory.
+
+    """
+    def __init__(self,L,cache_size=0):
+        if not issuper(L):
+            raise TypeError('LiouvillianLU requires a superoperator.')
+        self.L=L
+        self.cache_size=cache_size
+        self._lu={}
+        self._lu_ss=None
+        self._rho_ss=None
+
+    def steady(self):
+        """
+        Steady state density matrix, from one LU factorization of L with the
+        trace condition in its first row.
+        """
+        if self._rho_ss is None:
+            A,b=_trace_row_system(self.L)
+            self._lu_ss=splu(A.tocsc())
+            self._rho_ss=_vec2rhoss(self._lu_ss.solve(b),self.L.dims[0])
+        return self._rho_ss
+
+    def factor(self,w,cache=True):
+        """
+        The LU factorization of :math:`L - i\\omega` (a
+        :class:`scipy.sparse.linalg.SuperLU` object). With `cache` False a
+        new factorization is not stored.
+        """
+        w=float(w)
+        lu=self._lu.get(w)
+        if lu is None:
+            n=self.L.shape[0]
+            A=self.L.data-1j*w*sp.identity(n,dtype=complex,format='csr')
+            lu=splu(A.tocsc())
+            if cache and self.cache_size>0:
+                if len(self._lu)>=self.cache_size:
+                    del self._lu[next(iter(self._lu))]
+                self._lu[w]=lu
+        return lu
+
+    def solve(self,b,w,cache=True):
+        """
+        Solve :math:`(L - i\\omega) x = b` for one or more right-hand sides
+        (the columns of `b`). L itself is singular, for `w` = 0 the traceless
+        solution is returned, which requires a traceless `b`. With `cache`
+        False the factorization for `w` is not stored.
+        """
+        b=np.array(b,dtype=complex)
+        if w==0:
+            # the trace row replaces a redundant population equation
+            self.steady()
+            b[0]=0
+            lu=self._lu_ss
+        else:
+            lu=self.factor(w,cache)
+        if b.ndim==1:
+            return lu.solve(b)
+        return np.column_stack([lu.solve(b[:,k]) for k in range(b.shape[1])])
+
+
+def _steady_linop(L,maxiter,tol,method,use_precond=True,rho0=None):
+    """
+    Private function for the steady state of a matrix-free Liouvillian. Since
+    the trace is conserved, t^T L = 0 for the trace vector t, and the steady
+    state is the solution of (L + t t^T) x = t, which is solved with a Krylov
+    method using only products with L. If L carries its effective
+    Hamiltonian, as from liouvillian_operator, the solver is preconditioned
+    with :func:`_steady_lyap_precond`.
+    """
+    N=int(np.sqrt(L.shape[0]))
+    trow=np.eye(N).ravel(order='F')
+    M=LinearOperator(L.shape,matvec=lambda v: L.matvec(v)+trow*np.dot(trow,v),
+                     dtype=complex)
+    b=trow.astype(complex)
+    P=None
+    if use_precond and getattr(L,'H_eff',None) is not None:
+        P=_steady_lyap_precond(L.H_eff)
+    #start from the maximally mixed state, with x0=0 the trace vector b is
+    #a left eigenvector of M and BiCGSTAB breaks down in the second step
+    x0=mat2vec(rho0.full()).ravel() if rho0 is not None else b/N
+    if method=='gmres':
+        v,check=gmres(M,b,x0=x0,tol=tol,maxiter=maxiter,M=P)
+    elif method=='bicgstab':
+        v,check=bicgstab(M,b,x0=x0,tol=tol,maxiter=maxiter,M=P)
+    else:
+        v,check=lgmres(M,b,x0=x0,tol=tol,maxiter=maxiter,M=P)
+    if check>0:
+        raise ValueError('Failed to find steady state after ' + str(maxiter) +' iterations')
+    elif check<0:
+        raise ValueError('Illegal input to the iterative solver')
+    data=v.reshape((N,N),order='F')
+    data=0.5*(data+data.conj().T)
+    dims=getattr(L,'dims',[[[N],[N]],[[N],[N]]])[0]
+    rhoss=Qobj(data,dims=dims,shape=[N,N])
+    if qset.auto_tidyup:
+        return rhoss.tidyup()
+    else:
+        return rhoss
+
+
+def _steady_lyap_precond(H_eff):
+    """
+    Private function returning the inverse of the Lyapunov part
+    rho -> -i H_eff rho + i rho H_eff^+ of a Liouvillian, i.e. L without the
+    jump terms, as a preconditioner for the matrix-free solvers. Products
+    solve a triangular Sylvester equation in the Schur basis of H_eff, which
+    is computed once, so that only N x N dense matrices are stored. The
+    operator is shifted by a small damping, 1% of the largest eigenvalue,
+    which keeps it invertible for undamped (dark) states.
+    """
+    N=H_eff.shape[0]
+    A=-1j*(H_eff.toarray() if sp.issparse(H_eff) else np.asarray(H_eff))
+    T,U=la.schur(A,output='complex')
+    T=T-0.005*(np.max(np.abs(np.diag(T))) or 1.0)*np.eye(N)
+    trsyl,=la.get_lapack_funcs(('trsyl',),(T,))
+    def matvec(v):
+        Q=np.dot(U.conj().T,np.dot(np.asarray(v).reshape((N,N),order='F'),U))
+        #T Y + Y T^+ = scale Q
+        Y,scale,info=trsyl(T,T,Q,tranb='C')
+        return np.dot(U,np.dot(Y/scale,U.conj().T)).ravel(order='F')
+    return LinearOperator((N*N,N*N),matvec=matvec,dtype=complex)
@@ -230,8 +230,7 @@ def smesolve_generic(H, rho0, tlist, c_ops, e_ops, rhs, d1, d2, ntraj, nsubsteps
     for c_idx, c in enumerate(c_ops):
 
         # xxx: precompute useful operator expressions...
-        cdc = c.dag() * c
-        Ldt = spre(c) * spost(c.dag()) - 0.5 * spre(cdc) - 0.5 * spost(cdc)
+        Ldt = liouvillian(None, [c])
         LdW = spre(c) + spost(c.dag())
         Lm  = spre(c) + spost(c.dag()) # currently same as LdW
 
@@ -239,7 +238,7 @@ def smesolve_generic(H, rho0, tlist, c_ops, e_ops, rhs, d1, d2, ntraj, nsubsteps
 
 
     # Liouvillian for the unitary part
-    L = -1.0j*(spre(H) - spost(H)) # XXX: should we split the ME in stochastic 
+    L = liouvillian(H, [])         # XXX: should we split the ME in stochastic 
                                    # and deterministic collapse operators here?
 
     progress_acc = 0.0
@@ -17,9 +17,11 @@
 #
 ################################################################################
 
+import numpy as np
 import scipy
 import scipy.linalg as la
 import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator
 from scipy import prod, transpose, reshape
 from qutip.qobj import *
 from qutip.operators import destroy
@@ -31,7 +33,7 @@ def liouvillian(H, c_op_list):
     Parameters
     ----------
     H : qobj
-        System Hamiltonian.
+        System Hamiltonian, or None for a purely dissipative Liouvillian.
         
     c_op_list : array_like 
         A ``list`` or ``array`` of collpase operators.
@@ -40,22 +42,39 @@ def liouvillian(H, c_op_list):
     -------
     L : qobj
         Louvillian superoperator.
+
+    Notes
+    -----
+    The superoperator is assembled directly from the sparse data of `H` and
+    the collapse operators, as one set of COO triplets, without intermediate
+    quantum objects.
     
     """
+    if not isinstance(H, Qobj):
+        H = None
+    if H is None and len(c_op_list) == 0:
+        return 0
 
-    L = -1.0j*(spre(H) - spost(H)) if H else 0
-
-    for c in c_op_list:
-        cdc = c.dag() * c
-        L += spre(c) * spost(c.dag()) - 0.5 * spre(cdc) - 0.5 * spost(cdc)
+    A = H if H is not None else c_op_list[0]
+    if not isoper(A):
+        raise TypeError('Input is not a quantum object')
 
+    d = A.dims[1]
+    L = Qobj()
+    L.dims = [[A.dims[0][:], d[:]], [A.dims[1][:], d[:]]]
+    L.shape = [prod(L.dims[0][0]) * prod(L.dims[0][1]),
+               prod(L.dims[1][0]) * prod(L.dims[1][1])]
+    L.data = _liouvillian_data(H.data if H is not None else None,
+                               [c.data for c in c_op_list])
+    L.type = 'super'
+    L.isherm = False
     return L
 
+
 def liouvillian_fast(H, c_op_list):
     """Assembles the Liouvillian superoperator from a Hamiltonian 
-    and a ``list`` of collapse operators. Like liouvillian, but with an 
-    experimental implementation which avoids creating extra Qobj instances,
-    which can be advantageous for large systems.
+    and a ``list`` of collapse operators. Same as :func:`liouvillian`, which
+    now uses the same direct sparse assembly.
     
     Parameters
     ----------
@@ -69,27 +88,140 @@ def liouvillian_fast(H, c_op_list):
     -------
     L : qobj
         Louvillian superoperator.
+    
+    """
+    return liouvillian(H, c_op_list)
+
+
+def liouvillian_operator(H, c_op_list):
+    """Matrix-free Liouvillian superoperator for a Hamiltonian and a
+    ``list`` of collapse operators.
+
+    The returned operator acts on column-stacked density matrices (see
+    :func:`mat2vec`) as
 
-    .. note::
+    .. math::
 
-        Experimental.
+        L\\rho = -i[H, \\rho] + \\sum_c c\\rho c^\\dagger
+        - \\frac{1}{2}\\{c^\\dagger c, \\rho\\}
+
+    using only N x N sparse-dense products, so the N^2 x N^2 superoperator
+    is never formed. It can be used where a Liouvillian is only applied to
+    vectors, e.g. by :func:`qutip.mesolve` (``Odeoptions.matrix_free``) and
+    the iterative methods of :func:`qutip.steady`.
+    
+    Parameters
+    ----------
+    H : qobj
+        System Hamiltonian, or None for a purely dissipative Liouvillian.
+        
+    c_op_list : array_like 
+        A ``list`` or ``array`` of collpase operators.
+    
+    Returns
+    -------
+    L : :class:`scipy.sparse.linalg.LinearOperator`
+        Liouvillian as a linear operator, with the superoperator dimensions
+        in ``L.dims`` and the effective non-Hermitian Hamiltonian
+        :math:`H - \\frac{i}{2}\\sum_c c^\\dagger c` as a sparse matrix in
+        ``L.H_eff``.
     
     """
-    d=H.dims[1]
-    L=Qobj()
-    L.dims=[[H.dims[0][:],d[:]],[H.dims[1][:],d[:]]]
-    L.shape=[prod(L.dims[0][0])*prod(L.dims[0][1]),prod(L.dims[1][0])*prod(L.dims[1][1])]
-    L.data = -1j *(sp.kron(sp.identity(prod(d)), H.data,format='csr') - sp.kron(H.data.T,sp.identity(prod(d)),format='csr'))
-
-    n_op = len(c_op_list)
-    for m in range(0, n_op):
-        L.data = L.data + sp.kron(sp.identity(prod(d)), c_op_list[m].data,format='csr') * sp.kron(c_op_list[m].data.T.conj().T,sp.identity(prod(d)),format='csr')
-        cdc = c_op_list[m].data.T.conj()*c_op_list[m].data
-        L.data = L.data - 0.5 * sp.kron(sp.identity(prod(d)), cdc,format='csr')
-        L.data = L.data - 0.5 * sp.kron(cdc.T,sp.identity(prod(d)),format='csr')
+    if not isinstance(H, Qobj):
+        H = None
+    if H is None and len(c_op_list) == 0:
+        raise ValueError('No Hamiltonian or collapse operators given')
+
+    A = H if H is not None else c_op_list[0]
+    if not isoper(A):
+        raise TypeError('Input is not a quantum object')
+    N = A.shape[0]
+
+    # rho -> pre * rho + rho * post + sum_c c * rho * c^+
+    pre = sp.csr_matrix((N, N), dtype=complex)
+    if H is not None:
+        pre = pre - 1j * H.data
+    post = -pre
+    c_data = []
+    for c in c_op_list:
+        cdc = c.data.T.conj() * c.data
+        pre = pre - 0.5 * cdc
+        post = post - 0.5 * cdc
+        c_data.append((c.data.tocsr(), c.data.conj().tocsr()))
+    pre = pre.tocsr()
+    post_T = post.T.tocsr()
+
+    def matmat(V):
+        V = np.asarray(V).reshape((N * N, -1))
+        out = np.zeros(V.shape, dtype=complex)
+        for k in range(V.shape[1]):
+            rho = V[:, k].reshape((N, N), order='F')
+            # right multiplication as rho * X = (X^T * rho^T)^T
+            drho = pre * rho + (post_T * rho.T).T
+            for c, c_conj in c_data:
+                drho += (c_conj * (c * rho).T).T
+            out[:, k] = drho.ravel(order='F')
+        return out
+
+    def matvec(v):
+        return matmat(v)[:, 0]
+
+    L = LinearOperator((N * N, N * N), matvec=matvec, matmat=matmat,
+                       dtype=complex)
+    d = A.dims[1]
+    L.dims = [[A.dims[0][:], d[:]], [A.dims[1][:], d[:]]]
+    L.H_eff = 1j * pre
     return L
 
 
+def _sp_kron_coo(A, B):
+    """
+    Private function returning the COO triplets (rows, cols, vals) of the
+    Kronecker product of the sparse matrices A and B.
+    """
+    A = A.tocoo()
+    B = B.tocoo()
+    rows = (A.row[:, None] * B.shape[0] + B.row[None, :]).ravel()
+    cols = (A.col[:, None] * B.shape[1] + B.col[None, :]).ravel()
+    vals = (A.data[:, None] * B.data[None, :]).ravel()
+    return rows, cols, vals
+
+
+def _liouvillian_data(H, c_ops):
+    """
+    Private function that assembles the CSR matrix of the Liouvillian
+    from the sparse matrices of the Hamiltonian (or None) and of the
+    collapse operators:
+
+        L = 1 x (-iH - C/2) + (iH - C/2)^T x 1 + sum_c conj(c) x c
+
+    with C = sum_c c^+ c. All terms are collected as COO triplets and summed
+    in a single conversion to CSR.
+    """
+    A = H if H is not None else c_ops[0]
+    N = A.shape[0]
+    I = sp.identity(N, dtype=complex, format='coo')
+
+    pre = sp.csr_matrix((N, N), dtype=complex)
+    if H is not None:
+        pre = pre - 1j * H
+    post = -pre
+    for c in c_ops:
+        cdc = c.T.conj() * c
+        pre = pre - 0.5 * cdc
+        post = post - 0.5 * cdc
+
+    triplets = [_sp_kron_coo(I, pre), _sp_kron_coo(post.T, I)]
+    for c in c_ops:
+        triplets.append(_sp_kron_coo(c.conj(), c))
+
+    rows = np.concatenate([t[0] for t in triplets])
+    cols = np.concatenate([t[1] for t in triplets])
+    vals = np.concatenate([t[2] for t in triplets])
+    return sp.csr_matrix((vals, (rows, cols)), shape=(N * N, N * N),
+                         dtype=complex)
+
+
 def mat2vec(mat):
     """
     Private function reshaping matrix to vector.
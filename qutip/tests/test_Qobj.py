@@ -330,6 +330,24 @@ def test_QobjExpm():
     B=A.expm()
     assert_equal(all(B.data.todense()-matrix(la.expm(data)))<1e-15,True)
 
+def test_QobjExpmSparse():
+    "Qobj expm of banded and nilpotent operators"
+    N=500
+    a=destroy(N)
+    for A in [0.1*a.dag()-0.1*a, 3*a, 0.5j*(a+a.dag())]:
+        B=A.expm()
+        C=la.expm(A.full())
+        assert_(np.max(np.abs(B.full()-C))<1e-12*np.max(np.abs(C)))
+    #exponential of a small displacement stays sparse
+    assert_((0.1*a.dag()-0.1*a).expm().data.nnz<0.1*N**2)
+    #a larger displacement of a large operator is still banded
+    N=2000
+    a=destroy(N)
+    D=(a.dag()-a).expm()
+    assert_(D.data.nnz<0.15*N**2)
+    psi=D*basis(N,0)
+    assert_(abs(expect(a,psi)-1)<1e-10)
+
 def test_QobjFull():
     "Qobj full"
     data=np.random.random((15,15))+1j*np.random.random((15,15))-(0.5+0.5j)
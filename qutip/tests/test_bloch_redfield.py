@@ -0,0 +1,128 @@
+#This file is part of QuTIP.
+#
+#    QuTIP is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QuTIP is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QuTIP.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2011-2013, Paul D. Nation & Robert J. Johansson
+#
+###########################################################################
+
+
+from numpy import allclose, diag, linspace, pi, sqrt
+from numpy.testing import assert_, run_module_suite
+
+from qutip import *
+from qutip.bloch_redfield import _br_blocks
+
+
+def test_brTensorWhiteNoise():
+    "bloch_redfield_tensor: white noise reduces to the Lindblad form"
+    H=rand_herm(5)
+    c_ops=[rand_herm(5),rand_herm(5)]
+    gamma=[0.1,0.25]
+    spectra=[lambda w: gamma[0],lambda w: gamma[1]]
+    R,ekets=bloch_redfield_tensor(H,c_ops,spectra,use_secular=False)
+    Heb=Qobj(diag(H.eigenenergies()),dims=H.dims)
+    L=liouvillian(Heb,
+                  [sqrt(g)*c.transform(ekets) for g,c in zip(gamma,c_ops)])
+    assert_(R.dims==L.dims)
+    assert_(allclose(R.full(),L.full()))
+
+
+def test_brTensorSecular():
+    "bloch_redfield_tensor: secular terms only couple equal frequencies"
+    H=rand_herm(4)
+    c_ops=[rand_herm(4)]
+    spectra=[lambda w: 0.1*(w>0)+0.01]
+    R,ekets=bloch_redfield_tensor(H,c_ops,spectra)
+    R_full,ekets=bloch_redfield_tensor(H,c_ops,spectra,use_secular=False)
+    #compare the dissipative parts only
+    Heb=Qobj(diag(H.eigenenergies()),dims=H.dims)
+    U=-1.0j*(spre(Heb)-spost(Heb))
+    R=(R-U).full()
+    R_full=(R_full-U).full()
+    evals=H.eigenenergies()
+    W=[evals[I%4]-evals[I//4] for I in range(16)]
+    dw_min=min(abs(w) for w in W if w!=0)
+    for I in range(16):
+        for J in range(16):
+            if abs(W[I]-W[J])<dw_min/10.0:
+                assert_(abs(R[I,J]-R_full[I,J])<1e-12)
+            else:
+                assert_(abs(R[I,J])<1e-10)
+
+
+def test_brmesolveQubit():
+    "brmesolve: qubit relaxation matches mesolve"
+    H=0.5*2*pi*sigmaz()
+    gamma=0.2
+    psi0=(basis(2,0)+basis(2,1)).unit()
+    tlist=linspace(0,10,50)
+    e_ops=[sigmax(),sigmay(),sigmaz()]
+    me=mesolve(H,psi0,tlist,[sqrt(gamma)*sigmam()],e_ops)
+    br=brmesolve(H,psi0,tlist,[sigmax()],e_ops,[lambda w: gamma*(w>0)])
+    for k in range(3):
+        assert_(allclose(me.expect[k],br.expect[k],atol=1e-3))
+
+
+def test_brTensorEigenReuse():
+    "bloch_redfield_tensor: reuse of the eigen-decomposition"
+    H=rand_herm(5)
+    c_ops=[rand_herm(5)]
+    R1,ekets,eigen=bloch_redfield_tensor(H,c_ops,[lambda w: 0.1*(w>0)],
+                                         return_eigen=True)
+    R2,ekets2=bloch_redfield_tensor(H,c_ops,[lambda w: 0.1*(w>0)],eigen=eigen)
+    assert_(allclose(R1.full(),R2.full()))
+    assert_(ekets2 is ekets)
+    #the secular blocks partition all the density-matrix elements
+    idx=sorted(i for block in _br_blocks(R1) for i in block)
+    assert_(idx==list(range(25)))
+
+
+def test_brmesolveEigenReuse():
+    "brmesolve: sweep over the noise spectra with a fixed eigenbasis"
+    N=4
+    a=destroy(N)
+    H=a.dag()*a+0.1*(a+a.dag())
+    c_ops=[a+a.dag()]
+    psi0=basis(N,2)
+    tlist=linspace(0,10,40)
+    e_ops=[a.dag()*a]
+    R,ekets,eigen=bloch_redfield_tensor(H,c_ops,[lambda w: 0.1*(w>0)],
+                                        return_eigen=True)
+    for gamma in [0.1,0.3]:
+        spectra=[lambda w: gamma*(w>0)]
+        out1=brmesolve(H,psi0,tlist,c_ops,list(e_ops),spectra,eigen=eigen)
+        out2=brmesolve(H,psi0,tlist,c_ops,list(e_ops),spectra)
+        assert_(allclose(out1.expect[0],out2.expect[0],atol=1e-6))
+
+
+def test_brmesolveBlocks():
+    "bloch_redfield_solve: block propagation matches the ODE solver"
+    N=4
+    a=destroy(N)
+    H=a.dag()*a+0.1*(a+a.dag())
+    psi0=basis(N,2)
+    tlist=linspace(0,10,40)
+    spectra=[lambda w: 0.2*(w>0)]
+    R,ekets=bloch_redfield_tensor(H,[a+a.dag()],spectra)
+    e_ops=[a.dag()*a,a+a.dag()]
+    out1=bloch_redfield_solve(R,ekets,psi0,tlist,list(e_ops),use_blocks=True)
+    opts=Odeoptions(atol=1e-10,rtol=1e-8)
+    out2=bloch_redfield_solve(R,ekets,psi0,tlist,list(e_ops),opts)
+    for k in range(2):
+        assert_(allclose(out1[k],out2[k],atol=1e-5))
+
+
+if __name__ == "__main__":
+    run_module_suite()
@@ -0,0 +1,85 @@
+#This file is part of QuTIP.
+#
+#    QuTIP is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QuTIP is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QuTIP.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2011-2013, Paul D. Nation & Robert J. Johansson
+#
+###########################################################################
+
+
+from qutip import *
+from numpy import allclose, array, exp, linspace, sqrt
+from numpy.testing import assert_, run_module_suite
+
+
+def test_eseriesValue():
+    "eseries: evaluation of operator and c-number series"
+    tlist = linspace(0, 2, 5)
+    es = eseries([sigmax(), sigmaz()], [0, -1.0])
+    vals = esval(es, tlist)
+    for t, val in zip(tlist, vals):
+        assert_(allclose(val.full(), (sigmax() + exp(-t) * sigmaz()).full()))
+    ex = expect(sigmaz(), es)
+    assert_(allclose(esval(ex, tlist), 2 * exp(-tlist)))
+    assert_(allclose(esval(es * es, [1.0]).full(),
+                     ((sigmax() + exp(-1) * sigmaz()) ** 2).full()))
+
+
+def test_eseriesTidy():
+    "eseries: merge equal rates and drop zero amplitudes"
+    es = eseries(array([1.0, 2.0, 3.0, 1.0]), array([1j, 1j + 1e-12, 0, -1]))
+    es = estidy(es - eseries(1.0, -1))
+    assert_(len(es.rates) == 2)
+    assert_(allclose(es.rates, [0, 1j]))
+    assert_(allclose(es.ampl, [3, 3]))
+
+
+def test_eseriesEmpty():
+    "eseries: zero amplitudes without rates give an empty series"
+    for q in [0, array([]), array([0.0, 0.0])]:
+        assert_(len(eseries(q).rates) == 0)
+    es = eseries(sigmax())
+    es2 = eseries() + es
+    assert_(es2 is not es)
+    assert_(allclose(esval(es2, [0.0]).full(), sigmax().full()))
+
+
+def test_eseriesSpectrum():
+    "eseries: spectrum from ode2es against the pseudo-inverse solver"
+    a = destroy(10)
+    H = a.dag() * a
+    c_op_list = [sqrt(0.3) * a, sqrt(0.1) * a.dag()]
+    wlist = linspace(-2, 2, 21)
+    S1 = spectrum_ss(H, wlist, c_op_list, a.dag(), a)
+    S2 = spectrum_ss(H, wlist, c_op_list, a.dag(), a, solver="pi")
+    assert_(allclose(S1, S2))
+
+
+def test_essolveExpect():
+    "essolve: expectation values against mesolve"
+    N = 10
+    a = destroy(N)
+    H = a.dag() * a + 0.3 * (a + a.dag())
+    psi0 = basis(N, 3)
+    tlist = linspace(0, 5, 21)
+    for c_op_list in [[], [sqrt(0.3) * a]]:
+        e_ops = [a.dag() * a, a]
+        ex_es = essolve(H, psi0, tlist, c_op_list, e_ops)
+        ex_me = mesolve(H, psi0, tlist, c_op_list, e_ops).expect
+        for n in range(len(e_ops)):
+            assert_(abs(ex_es[n] - ex_me[n]).max() < 1e-4)
+
+
+if __name__ == "__main__":
+    run_module_suite()
@@ -0,0 +1,140 @@
+#This file is part of QuTIP.
+#
+#    QuTIP is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QuTIP is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QuTIP.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2011-2013, Paul D. Nation & Robert J. Johansson
+#
+###########################################################################
+
+
+from numpy import allclose, arange, exp, linspace, pi, random, zeros
+from numpy.testing import assert_, run_module_suite
+
+from qutip import *
+from qutip.floquet import (floquet_master_equation_rates,
+                           floquet_master_equation_tensor, floquet_modes_table,
+                           floquet_propagator, _floquet_key)
+
+
+def _driven_qubit():
+    delta=0.2*2*pi
+    eps0=1.0*2*pi
+    A=0.5*2*pi
+    omega=1.0*2*pi
+    H0=-delta/2.0*sigmax()-eps0/2.0*sigmaz()
+    H1=A/2.0*sigmaz()
+    return [H0,[H1,'sin(w*t)']],2*pi/omega,{'w':omega}
+
+
+def test_floquetRates():
+    "floquet_master_equation_rates: sideband coefficients and rates"
+    H,T,args=_driven_qubit()
+    f_modes_0,f_energies=floquet_modes(H,T,args)
+    f_modes_table_t=floquet_modes_table(f_modes_0,f_energies,
+                                        linspace(0,T,101),H,T,args)
+    kmax=2
+    c_op=sigmax()
+    J_cb=lambda w: 0.1*w/(2*pi)
+    Delta,X,Gamma,A=floquet_master_equation_rates(f_modes_0,f_energies,c_op,
+                                                  H,T,args,J_cb,0.0,kmax,
+                                                  f_modes_table_t)
+    #direct quadrature of the sideband coefficients on the same time grid
+    X_ref=zeros((2,2,2*kmax+1),dtype=complex)
+    for t in arange(1,101)*T/100:
+        f_modes_t=floquet_modes_t_lookup(f_modes_table_t,t,T)
+        for a in range(2):
+            for b in range(2):
+                for k in range(-kmax,kmax+1):
+                    X_ref[a,b,k+kmax]+=exp(-2j*pi*k*t/T)/100* \
+                        (f_modes_t[a].dag()*c_op*f_modes_t[b]).full()[0,0]
+    assert_(allclose(X,X_ref))
+    assert_(allclose(Gamma,2*pi*(Delta>0)*J_cb(Delta)*abs(X_ref)**2))
+    #at zero temperature A is the sum of the sideband rates
+    assert_(allclose(A,Gamma.sum(axis=2)))
+
+
+def test_floquetModesTable():
+    "floquet_modes_table: the Floquet modes are periodic"
+    H,T,args=_driven_qubit()
+    f_modes_0,f_energies=floquet_modes(H,T,args)
+    tlist=linspace(0,T,51)
+    f_modes_table_t=floquet_modes_table(f_modes_0,f_energies,tlist,H,T,args)
+    assert_(len(f_modes_table_t)==51)
+    for n in range(2):
+        assert_(allclose(f_modes_table_t[-1][n].full(),f_modes_0[n].full(),
+                         atol=1e-4))
+    #the table agrees with propagating each mode separately
+    f_modes_t=floquet_modes_t(f_modes_0,f_energies,tlist[20],H,T,args)
+    for n in range(2):
+        assert_(allclose(f_modes_table_t[20][n].full(),f_modes_t[n].full(),
+                         atol=1e-4))
+
+
+def test_floquetPropagator():
+    "floquet_propagator: cached stroboscopic propagator"
+    H,T,args=_driven_qubit()
+    U=floquet_propagator(H,T,args)
+    assert_(floquet_propagator(H,T,dict(args)) is U)
+    opts=Odeoptions(atol=1e-10,rtol=1e-8,nsteps=10**5)
+    for t in [0.3*T,T,2.5*T]:
+        U_ref=propagator(H,t,[],args,opts)
+        assert_(allclose(U(t).full(),U_ref.full(),atol=1e-4))
+    #the table is used for times on the grid
+    assert_(allclose(U.U_tau(U.tlist[10]),U.table[:,:,10]))
+
+
+def test_floquetPropagatorKey():
+    "floquet_propagator: cache key from the contents of args and options"
+    H,T,args=_driven_qubit()
+    #arrays with abbreviated reprs that differ only in the middle
+    x=zeros(2000)
+    y=zeros(2000)
+    y[1000]=1.0
+    assert_(repr(x)==repr(y))
+    assert_(_floquet_key(H,T,{'w':1.0,'x':x})!=_floquet_key(H,T,{'w':1.0,'x':y}))
+    assert_(_floquet_key(H,T,{'w':1.0,'x':x})==_floquet_key(H,T,{'w':1.0,'x':x.copy()}))
+    #objects without a reliable key disable the cache
+    assert_(_floquet_key(H,T,{'w':1.0,'x':object()}) is None)
+    #different solver options give a different propagator
+    U=floquet_propagator(H,T,args)
+    opts=Odeoptions(atol=1e-10,rtol=1e-8)
+    assert_(floquet_propagator(H,T,args,opts) is not U)
+    assert_(floquet_propagator(H,T,args,Odeoptions(atol=1e-10,rtol=1e-8)) is
+            floquet_propagator(H,T,args,opts))
+
+
+def test_floquetTensor():
+    "floquet_master_equation_tensor: dephasing and population transfer"
+    N=4
+    Alist=[random.rand(N,N),random.rand(N,N)]
+    E=random.randn(N)
+    R=floquet_master_equation_tensor(Alist,E).full()
+    A=Alist[0]+Alist[1]
+    R_ref=zeros((N*N,N*N),dtype=complex)
+    for a in range(N):
+        for b in range(N):
+            I=a+N*b
+            if a==b:
+                for c in range(N):
+                    R_ref[I,c+N*c]+=A[a,c]
+                R_ref[I,I]-=A[:,a].sum()
+            else:
+                R_ref[I,I]=-1j*(E[a]-E[b])-0.5*(A[:,a].sum()+A[:,b].sum())
+    assert_(allclose(R,R_ref))
+    #the populations are conserved
+    assert_(allclose(R[::N+1].sum(axis=0),0))
+
+
+if __name__ == "__main__":
+    run_module_suite()
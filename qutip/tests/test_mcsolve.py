@@ -19,8 +19,8 @@
 
 from qutip import *
 from qutip.odechecks import _ode_checks
-from numpy import allclose, linspace, mean, ones
-from numpy.testing import assert_equal
+from numpy import allclose, linspace, mean, ones, random
+from numpy.testing import assert_equal, assert_raises
 from numpy.testing.decorators import skipif
 import unittest
 #find Cython if it exists
@@ -94,6 +94,20 @@ def test_MCNoCollStrExpt():
     diff=mean(abs(actual_answer-expt)/actual_answer)
     assert_equal(diff<error,True)
 
+def test_MCNoCollStrReuse():
+    "Monte-carlo: Reuse str format RHS with new args"
+    N=10 #number of basis states to consider
+    a=destroy(N)
+    #the photon number depends on the drive amplitude c
+    H=[a.dag()*a,[a+a.dag(),'c']]
+    psi0=basis(N,9) #initial state
+    tlist=linspace(0,10,100)
+    old=mcsolve(H,psi0,tlist,[],[a.dag()*a],args={'c':0.0},options=Odeoptions(gui=False))
+    reused=mcsolve(H,psi0,tlist,[],[a.dag()*a],args={'c':0.5},options=Odeoptions(gui=False,rhs_reuse=True))
+    fresh=mcsolve(H,psi0,tlist,[],[a.dag()*a],args={'c':0.5},options=Odeoptions(gui=False))
+    assert_equal(allclose(reused.expect[0],fresh.expect[0],atol=1e-6),True)
+    assert_equal(max(abs(reused.expect[0]-old.expect[0]))>0.1,True)
+
 def test_MCNoCollFuncExpt():
     "Monte-carlo: Constant H (func format) with no collapse ops (expect)"
     error=1e-8
@@ -160,6 +174,130 @@ def test_MCSimpleConst():
     avg_diff=mean(abs(actual_answer-expt)/actual_answer)
     assert_equal(avg_diff<mc_error,True)
 
+def test_MCSimpleConstBlock():
+    "Monte-carlo: Constant H with constant collapse (block engine)"
+    N=10 #number of basis states to consider
+    a=destroy(N)
+    H=a.dag()*a
+    psi0=basis(N,9) #initial state
+    kappa=0.2 #coupling to oscillator
+    c_op_list=[sqrt(kappa)*a]
+    tlist=linspace(0,10,100)
+    mcdata=mcsolve(H,psi0,tlist,c_op_list,[a.dag()*a],options=Odeoptions(gui=False,mc_engine='block',mc_block_size=64))
+    expt=mcdata.expect[0]
+    actual_answer=9.0*exp(-kappa*tlist)
+    avg_diff=mean(abs(actual_answer-expt)/actual_answer)
+    assert_equal(avg_diff<mc_error,True)
+
+def test_MCBlockStates():
+    "Monte-carlo: Trajectory states and collapses (block engine)"
+    N=10 #number of basis states to consider
+    a=destroy(N)
+    H=a.dag()*a
+    psi0=basis(N,9) #initial state
+    kappa=0.2 #coupling to oscillator
+    tlist=linspace(0,10,100)
+    mcdata=mcsolve(H,psi0,tlist,[sqrt(kappa)*a],[],ntraj=10,options=Odeoptions(gui=False,mc_engine='block',mc_avg=False))
+    for k in range(10):
+        #each collapse removes one excitation from the number state
+        n_final=expect(a.dag()*a,mcdata.states[k][-1])
+        assert_equal(abs(n_final-(9-len(mcdata.col_times[k])))<1e-8,True)
+        assert_equal(all(mcdata.col_times[k]<=tlist[-1]),True)
+
+def test_MCBlockSeeds():
+    "Monte-carlo: Block engine trajectories do not depend on the block size"
+    N=10 #number of basis states to consider
+    a=destroy(N)
+    H=a.dag()*a
+    psi0=basis(N,9) #initial state
+    kappa=0.2 #coupling to oscillator
+    tlist=linspace(0,10,100)
+    col_times=[]
+    for size in [1,5,20]:
+        #same seed for every trajectory of the three runs
+        random.seed(1)
+        opts=Odeoptions(gui=False,mc_engine='block',mc_avg=False,mc_block_size=size)
+        mcdata=mcsolve(H,psi0,tlist,[sqrt(kappa)*a],[],ntraj=20,options=opts)
+        col_times.append(mcdata.col_times)
+    for k in range(20):
+        for times in col_times[1:]:
+            assert_equal(len(times[k]),len(col_times[0][k]))
+            assert_equal(allclose(times[k],col_times[0][k],atol=1e-3),True)
+
+def test_MCBlockTimeDependent():
+    "Monte-carlo: Block engine rejects time-dependent problems"
+    N=10 #number of basis states to consider
+    a=destroy(N)
+    H=[a.dag()*a,[a+a.dag(),lambda t,args: cos(t)]]
+    psi0=basis(N,9) #initial state
+    tlist=linspace(0,1,10)
+    opts=Odeoptions(gui=False,mc_engine='block')
+    assert_raises(ValueError,mcsolve,H,psi0,tlist,[sqrt(0.2)*a],[],ntraj=10,options=opts)
+
+def test_MCStreamAvg():
+    "Monte-carlo: Streaming average of expectation values and states"
+    N=10 #number of basis states to consider
+    a=destroy(N)
+    H=a.dag()*a
+    psi0=basis(N,9) #initial state
+    kappa=0.2 #coupling to oscillator
+    c_op_list=[sqrt(kappa)*a]
+    tlist=linspace(0,10,100)
+    opts=Odeoptions(gui=False,mc_engine='block',mc_block_size=64,mc_stream=True)
+    mcdata=mcsolve(H,psi0,tlist,c_op_list,[a.dag()*a],options=opts)
+    actual_answer=9.0*exp(-kappa*tlist)
+    avg_diff=mean(abs(actual_answer-mcdata.expect[0])/actual_answer)
+    assert_equal(avg_diff<mc_error,True)
+    #photon number is binomially distributed
+    actual_var=9.0*exp(-kappa*tlist)*(1-exp(-kappa*tlist))
+    var_diff=mean(abs(actual_var[1:]-mcdata.expect_var[0][1:])/actual_var[1:])
+    assert_equal(var_diff<0.2,True)
+    mcdata=mcsolve(H,psi0,tlist,c_op_list,[],options=opts)
+    expt=expect(a.dag()*a,mcdata.states)
+    avg_diff=mean(abs(actual_answer-expt)/actual_answer)
+    assert_equal(avg_diff<mc_error,True)
+
+def test_MCStreamChunks():
+    "Monte-carlo: Streamed partial averages of chunks of trajectories"
+    N=10 #number of basis states to consider
+    a=destroy(N)
+    H=a.dag()*a
+    psi0=basis(N,9) #initial state
+    kappa=0.2 #coupling to oscillator
+    c_op_list=[sqrt(kappa)*a]
+    tlist=linspace(0,10,20)
+    ntraj=[12,36,60]
+    for engine in ['zvode','block']:
+        #same seeds and blocks for the trajectories of both runs
+        random.seed(1)
+        stored=mcsolve(H,psi0,tlist,c_op_list,[a.dag()*a],ntraj=ntraj,options=Odeoptions(gui=False,mc_engine=engine,mc_block_size=12))
+        random.seed(1)
+        streamed=mcsolve(H,psi0,tlist,c_op_list,[a.dag()*a],ntraj=ntraj,options=Odeoptions(gui=False,mc_engine=engine,mc_block_size=12,mc_stream=True))
+        assert_equal(len(streamed.expect),len(ntraj))
+        #the merged averages of all trajectories do not depend on the chunks
+        assert_equal(allclose(streamed.expect[-1][0],stored.expect[-1][0]),True)
+
+def test_MCAdaptiveNtraj():
+    "Monte-carlo: Number of trajectories set by target standard error"
+    N=10 #number of basis states to consider
+    a=destroy(N)
+    H=a.dag()*a
+    psi0=basis(N,9) #initial state
+    kappa=0.2 #coupling to oscillator
+    c_op_list=[sqrt(kappa)*a]
+    tlist=linspace(0,10,100)
+    opts=Odeoptions(gui=False,mc_engine='block',mc_tol=0.1)
+    mcdata=mcsolve(H,psi0,tlist,c_op_list,[a.dag()*a],ntraj=5000,options=opts)
+    assert_equal(mcdata.ntraj<5000,True)
+    std_err=sqrt(mcdata.expect_var[0]/mcdata.ntraj)
+    assert_equal(std_err.max()<=0.1,True)
+    actual_answer=9.0*exp(-kappa*tlist)
+    avg_diff=mean(abs(actual_answer-mcdata.expect[0])/actual_answer)
+    assert_equal(avg_diff<mc_error,True)
+    #the standard error needs averaged expectation values
+    opts=Odeoptions(gui=False,mc_tol=0.05,mc_avg=False)
+    assert_raises(ValueError,mcsolve,H,psi0,tlist,c_op_list,[a.dag()*a],ntraj=100,options=opts)
+
 def test_MCSimpleSingleCollapse():
     "Monte-carlo: Constant H with collapse operator specified as single operator"
     N=10 #number of basis states to consider
@@ -17,7 +17,7 @@
 #
 ###########################################################################
 
-from numpy import allclose, linspace, mean, ones
+from numpy import allclose, linspace, mean, ones, random
 from numpy.testing import assert_, run_module_suite
 
 # disable the MC progress bar
@@ -26,6 +26,7 @@ os.environ['QUTIP_GRAPHICS']="NO"
 
 from qutip import *
 from qutip.odechecks import _ode_checks
+import qutip.odeconfig as odeconfig
 
 class TestJCModelEvolution:
     """
@@ -385,7 +386,128 @@ class TestMESolveTDDecay:
         actual_answer=9.0*exp(-kappa*(1.0-exp(-tlist)))
         avg_diff=mean(abs(actual_answer-expt)/actual_answer)
         assert_(avg_diff<me_error)
-      
+
+
+    def testMESimpleTDDecayCachedRHS(self):
+        "mesolve: string-format RHS reused from the compile cache"
+
+        N=10 #number of basis states to consider
+        a=destroy(N)
+        H=a.dag()*a
+        psi0=basis(N,9) #initial state
+        c_op_list=[[a,'sqrt(k*exp(-t))']]
+        tlist=linspace(0,10,100)
+        names=[]
+        for kappa in [0.2,0.1]:
+            medata=mesolve(H,psi0,tlist,c_op_list,[a.dag()*a],args={'k':kappa})
+            names.append(odeconfig.last.tdname)
+            expt=medata.expect[0]
+            actual_answer=9.0*exp(-kappa*(1.0-exp(-tlist)))
+            avg_diff=mean(abs(actual_answer-expt)/actual_answer)
+            assert_(avg_diff<me_error)
+        assert_(names[0]==names[1])
+
+
+class TestMESolveBatch:
+    """
+    A test class for evolving a list of initial states in one integration.
+    """
+
+    def testMEBatchConstDecay(self):
+        "mesolve: list of initial states with constant decay"
+
+        N=10 #number of basis states to consider
+        a=destroy(N)
+        H=a.dag()*a
+        psi0_list=[basis(N,9),basis(N,5),ket2dm(basis(N,3))]
+        kappa=0.2 #coupling to oscillator
+        c_op_list=[sqrt(kappa)*a]
+        tlist=linspace(0,10,100)
+        medata_list=mesolve(H,psi0_list,tlist,c_op_list,[a.dag()*a])
+        assert_(len(medata_list)==len(psi0_list))
+        for n,medata in zip([9,5,3],medata_list):
+            expt=medata.expect[0]
+            actual_answer=n*exp(-kappa*tlist)
+            avg_diff=mean(abs(actual_answer-expt)/actual_answer)
+            assert_(avg_diff<me_error)
+
+    def testMEBatchUnitary(self):
+        "mesolve: list of initial kets without dissipation"
+
+        H=2*pi*sigmax()
+        psi0_list=[basis(2,0),basis(2,1)]
+        tlist=linspace(0,1,50)
+        medata_list=mesolve(H,psi0_list,tlist,[],[sigmaz()])
+        for psi0,medata in zip(psi0_list,medata_list):
+            medata_ref=mesolve(H,psi0,tlist,[],[sigmaz()])
+            assert_(allclose(medata.expect[0],medata_ref.expect[0],atol=1e-5))
+
+
+class TestMESolveKrylov:
+    """
+    A test class for propagation with the Krylov matrix exponential.
+    """
+
+    def testMEKrylovConstDecay(self):
+        "mesolve: constant decay with method='krylov'"
+
+        N=10 #number of basis states to consider
+        a=destroy(N)
+        H=a.dag()*a
+        psi0=basis(N,9) #initial state
+        kappa=0.2 #coupling to oscillator
+        c_op_list=[sqrt(kappa)*a]
+        tlist=linspace(0,10,100)
+        medata=mesolve(H,psi0,tlist,c_op_list,[a.dag()*a],
+                       options=Odeoptions(method='krylov'))
+        actual_answer=9.0*exp(-kappa*tlist)
+        assert_(allclose(medata.expect[0],actual_answer,rtol=1e-6))
+
+    def testMEKrylovUnitary(self):
+        "mesolve: unitary evolution with method='krylov'"
+
+        H=2*pi*sigmax()
+        tlist=linspace(0,1,50)
+        medata=mesolve(H,basis(2,0),tlist,[],[sigmaz()],
+                       options=Odeoptions(method='krylov'))
+        assert_(allclose(medata.expect[0],cos(4*pi*tlist),atol=1e-7))
+
+
+class TestMESolveMatrixFree:
+    """
+    A test class for mesolve with a matrix-free Liouvillian.
+    """
+
+    def testMEMatrixFreeDecay(self):
+        "mesolve: constant decay with a matrix-free Liouvillian"
+
+        N=10 #number of basis states to consider
+        a=destroy(N)
+        H=a.dag()*a
+        kappa=0.2 #coupling to oscillator
+        c_op_list=[sqrt(kappa)*a]
+        tlist=linspace(0,10,100)
+        for method in ['adams','krylov']:
+            opts=Odeoptions(matrix_free=True,method=method)
+            medata=mesolve(H,basis(N,9),tlist,c_op_list,[a.dag()*a],
+                           options=opts)
+            actual_answer=9.0*exp(-kappa*tlist)
+            assert_(allclose(medata.expect[0],actual_answer,rtol=1e-4))
+
+    def testLiouvillianOperator(self):
+        "liouvillian_operator: agrees with the explicit superoperator"
+
+        a=tensor(destroy(5),qeye(2))
+        sm=tensor(qeye(5),sigmam())
+        H=a.dag()*a+sm.dag()*sm+0.5*(a.dag()*sm+a*sm.dag())
+        c_op_list=[0.3*a,0.1j*sm]
+        L=liouvillian(H,c_op_list)
+        L_op=liouvillian_operator(H,c_op_list)
+        assert_(L_op.dims==L.dims)
+        V=random.rand(100,3)+1j*random.rand(100,3)
+        assert_(allclose(L_op*V,L.data*V))
+        assert_(allclose(L_op*V[:,0],L.data*V[:,0]))
+
 
 if __name__ == "__main__":
     run_module_suite()
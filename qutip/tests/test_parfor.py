@@ -0,0 +1,137 @@
+#This file is part of QuTIP.
+#
+#    QuTIP is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QuTIP is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QuTIP.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2011-2013, Paul D. Nation & Robert J. Johansson
+#
+###########################################################################
+
+import threading
+
+from numpy import allclose, arange, exp, linspace, mean, sqrt
+from numpy.testing import assert_, run_module_suite
+
+from qutip import *
+from qutip.parfor import _pool_broadcast,_pool_shared
+
+
+def _square(x):
+    return x**2
+
+
+def _power(x,n=1):
+    return x**n
+
+
+def _scaled(x):
+    return pool_data()['scale']*x
+
+
+def _shared(x):
+    return _pool_shared.get('offset',0)+x
+
+
+def test_parfor():
+    "parfor: squares"
+    out=parfor(_square,arange(10))
+    assert_(allclose(sorted(out),arange(10)**2))
+
+
+def test_parforOrderKwargs():
+    "parfor: ordered output with chunks and keyword arguments"
+    x=arange(50)
+    assert_(allclose(parfor(_power,x,n=3),x**3))
+    assert_(allclose(parfor(_power,x,chunksize=7,n=2),x**2))
+
+
+def test_parforIter():
+    "parfor: ordered iterator over the results"
+    out=[y for y in parfor_iter(_power,(k for k in range(20)),n=2)]
+    assert_(allclose(out,arange(20)**2))
+    out=list(parfor_iter(_square,arange(20),chunksize=3))
+    assert_(allclose(out,arange(20)**2))
+
+
+def test_parforPool():
+    "parfor: long-lived worker pool with preloaded data"
+    pool_start(2,data={'scale':3})
+    try:
+        out=parfor(_scaled,arange(10))
+        assert_(allclose(sorted(out),3*arange(10)))
+        #mcsolve runs its trajectories on the same pool
+        N=10
+        a=destroy(N)
+        H=a.dag()*a
+        psi0=basis(N,9)
+        kappa=0.2
+        tlist=linspace(0,10,100)
+        for engine in ['zvode','block']:
+            opts=Odeoptions(gui=False,mc_engine=engine)
+            mcdata=mcsolve(H,psi0,tlist,[sqrt(kappa)*a],[H],ntraj=100,options=opts)
+            actual_answer=9.0*exp(-kappa*tlist)
+            #standard error of the mean photon number is about 0.1
+            assert_(mean(abs(actual_answer-mcdata.expect[0]))<0.3)
+    finally:
+        pool_shutdown()
+    assert_(pool_data()=={})
+
+
+def test_parforPoolConcurrent():
+    "parfor: overlapping mcsolve calls on the long-lived pool"
+    N=10
+    a=destroy(N)
+    H=a.dag()*a
+    psi0=basis(N,9)
+    tlist=linspace(0,10,100)
+    results={}
+    def run(kappa):
+        opts=Odeoptions(gui=False)
+        results[kappa]=mcsolve(H,psi0,tlist,[sqrt(kappa)*a],[H],ntraj=100,options=opts)
+    pool_start(2)
+    try:
+        threads=[threading.Thread(target=run,args=(kappa,)) for kappa in [0.1,0.2]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        pool_shutdown()
+    for kappa in [0.1,0.2]:
+        actual_answer=9.0*exp(-kappa*tlist)
+        assert_(mean(abs(actual_answer-results[kappa].expect[0]))<0.3)
+
+
+def test_parforIterClose():
+    "parfor: closing the iterator early"
+    it=parfor_iter(_power,arange(100),n=2)
+    assert_(next(it)==0)
+    it.close()
+    assert_(allclose(list(parfor_iter(_square,arange(5))),arange(5)**2))
+
+
+def test_parforPoolBroadcast():
+    "parfor: data broadcast once to every worker of the pool"
+    pool_start(3)
+    try:
+        _pool_broadcast('offset',10)
+        out=parfor(_shared,arange(30),chunksize=1)
+        assert_(allclose(out,10+arange(30)))
+        _pool_broadcast('offset',None)
+        assert_(allclose(parfor(_shared,arange(30),chunksize=1),arange(30)))
+    finally:
+        pool_shutdown()
+
+
+if __name__ == "__main__":
+    run_module_suite()
@@ -0,0 +1,63 @@
+#This file is part of QuTIP.
+#
+#    QuTIP is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QuTIP is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QuTIP.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2011-2013, Paul D. Nation & Robert J. Johansson
+#
+###########################################################################
+
+
+from qutip import *
+from numpy import isfinite, linspace, real, sqrt
+from numpy.testing import assert_, run_module_suite
+
+
+def test_spectrum_pi():
+    "Spectrum: Thermal cavity, pseudo-inverse solver"
+    N = 30
+    a = destroy(N)
+    H = a.dag() * a
+    kappa = 0.2
+    n_th = 0.5
+    c_op_list = [sqrt(kappa * (1 + n_th)) * a, sqrt(kappa * n_th) * a.dag()]
+    wlist = linspace(-2, 2, 41)
+    # <a^dag(tau) a(0)> = n_th exp((i - kappa/2) tau)
+    S = spectrum_ss(H, wlist, c_op_list, a.dag(), a, solver="pi")
+    S_analytic = 2 * real(n_th / (1j * (wlist - 1) + kappa / 2))
+    assert_(abs(S - S_analytic).max() < 1e-3 * S_analytic.max())
+    # a shared factorization, with w = 0 in wlist
+    lu = LiouvillianLU(liouvillian(H, c_op_list))
+    S = spectrum_ss(H, wlist, c_op_list, a, a.dag(), solver="pi", lu=lu)
+    S_analytic = 2 * real((n_th + 1) / (1j * (wlist + 1) + kappa / 2))
+    assert_(abs(S - S_analytic).max() < 1e-3 * S_analytic.max())
+
+
+def test_spectrum_driven_solvers():
+    "Spectrum: Driven cavity, exponential series and pseudo-inverse solvers"
+    N = 15
+    a = destroy(N)
+    H = a.dag() * a + 0.5 * (a + a.dag())
+    c_op_list = [sqrt(0.5) * a, sqrt(0.1) * a.dag()]
+    # <a> is nonzero, the stationary limit removed from both spectra leaves
+    # no peak at w = 0
+    wlist = linspace(-2, 2, 41)
+    for a_op, b_op in [(a.dag(), a), (a.dag() * a, a)]:
+        S_es = spectrum_ss(H, wlist, c_op_list, a_op, b_op, solver="es")
+        S_pi = spectrum_ss(H, wlist, c_op_list, a_op, b_op, solver="pi")
+        assert_(isfinite(S_es).all())
+        assert_(abs(S_es - S_pi).max() < 1e-8)
+
+
+if __name__ == "__main__":
+    run_module_suite()
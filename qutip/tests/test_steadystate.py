@@ -20,7 +20,8 @@
 
 from qutip import *
 from numpy import linspace
-from numpy.testing import assert_equal
+import scipy.sparse as sp
+from numpy.testing import assert_equal, assert_raises
 
 
 def test_qubit():
@@ -77,3 +78,106 @@ def test_ho():
     assert_equal(delta < 1e-3,True)
 
 
+
+def test_ho_matrix_free():
+    "Steady state: Thermal harmonic oscillator, matrix-free Liouvillian"
+    a = destroy(30)
+    H = 0.5 * 2 * pi * a.dag() * a
+    gamma1 = 0.05
+    wth = 1.0
+    n_th = 1.0 / (exp(1.0/wth)-1)
+    c_op_list = [sqrt(gamma1 * (1 + n_th)) * a, sqrt(gamma1 * n_th) * a.dag()]
+    rho_ss = steadystate(H, c_op_list, matrix_free=True)
+    assert_equal(rho_ss.dims, H.dims)
+    assert_equal(abs(real(expect(a.dag() * a, rho_ss)) - n_th) < 1e-3, True)
+
+def test_driven_cavity_matrix_free():
+    "Steady state: Driven cavity, matrix-free Liouvillian"
+    a = destroy(20)
+    H = a.dag() * a + 0.3 * (a + a.dag())
+    c_op_list = [sqrt(0.5) * a]
+    rho_ref = steadystate(H, c_op_list)
+    # the coherent steady state is far from diagonal
+    assert_equal(abs(expect(a, rho_ref)) > 0.1, True)
+    for method in ['lgmres', 'gmres', 'bicgstab']:
+        rho_ss = steadystate(H, c_op_list, tol=1e-10, method=method,
+                             matrix_free=True)
+        assert_equal(abs((rho_ss - rho_ref).full()).max() < 1e-6, True)
+    # a decaying qubit, whose ground state is not damped
+    rho_ss = steadystate(sigmax(), [sigmam()], matrix_free=True)
+    rho_ref = steadystate(sigmax(), [sigmam()])
+    assert_equal(abs((rho_ss - rho_ref).full()).max() < 1e-6, True)
+
+def test_driven_cavity_methods():
+    "Steady state: Driven cavity, direct and preconditioned iterative solvers"
+    a = destroy(30)
+    H = a.dag() * a + 0.3 * (a + a.dag())
+    c_op_list = [sqrt(0.5) * a, sqrt(0.1) * a.dag()]
+    rho_ref = steadystate(H, c_op_list, method='solve')
+    for method in ['direct', 'gmres', 'lgmres', 'bicgstab']:
+        for use_rcm in [True, False]:
+            rho_ss = steadystate(H, c_op_list, method=method, use_rcm=use_rcm)
+            assert_equal(abs((rho_ss - rho_ref).full()).max() < 1e-6, True)
+    # warm start from a nearby steady state
+    H2 = a.dag() * a + 0.31 * (a + a.dag())
+    rho_ss = steadystate(H2, c_op_list, method='lgmres', rho0=rho_ref)
+    rho_ref = steadystate(H2, c_op_list)
+    assert_equal(abs((rho_ss - rho_ref).full()).max() < 1e-6, True)
+
+
+def test_default_method_inputs():
+    "Steady state: Default method for superoperators and operators"
+    a = destroy(10)
+    H = a.dag() * a + 0.3 * (a + a.dag())
+    c_op_list = [sqrt(0.5) * a]
+    rho_ref = steadystate(H, c_op_list, method='solve')
+    rho_ss = steady(liouvillian(H, c_op_list))
+    assert_equal(abs((rho_ss - rho_ref).full()).max() < 1e-6, True)
+    # the null vector of an operator
+    psi = steady(num(10))
+    assert_equal(psi.dims, [[10], [1]])
+    assert_equal(abs(abs(psi.full()[0, 0]) - 1) < 1e-6, True)
+
+
+def test_liouvillian_lu():
+    "Steady state: Factorized Liouvillian shared between solvers"
+    a = destroy(20)
+    H = a.dag() * a + 0.3 * (a + a.dag())
+    c_op_list = [sqrt(0.5) * a, sqrt(0.1) * a.dag()]
+    L = liouvillian(H, c_op_list)
+    lu = LiouvillianLU(L)
+    rho_ref = steadystate(H, c_op_list)
+    assert_equal(abs((steady(lu) - rho_ref).full()).max() < 1e-10, True)
+    assert_equal(lu.steady() is steady(lu), True)
+    # solves of (L - i w) x = b against a direct sparse solve
+    b = mat2vec((a * rho_ref).full())
+    for w in [-1.0, 0.5]:
+        x = lu.solve(b, w)
+        A = L.data - 1j * w * sp.identity(L.shape[0], format='csr')
+        assert_equal(abs(A * x - b).max() < 1e-10, True)
+    # only the steady-state factorization is kept by default
+    assert_equal(len(lu._lu), 0)
+    lu2 = LiouvillianLU(L, cache_size=2)
+    for w in [-1.0, 0.5, 2.0]:
+        lu2.solve(b, w)
+    lu2.solve(b, 3.0, cache=False)
+    assert_equal(sorted(lu2._lu.keys()), [0.5, 2.0])
+    # the same object serves correlation functions of different operators
+    tlist = linspace(0, 5, 11)
+    for op in [a, a.dag() * a]:
+        c1 = correlation_ss(H, tlist, c_op_list, op.dag(), op, lu=lu)
+        c2 = correlation_ss(H, tlist, c_op_list, op.dag(), op)
+        assert_equal(abs(c1 - c2).max() < 1e-6, True)
+    # spectra fill the cache of lu, and further spectra reuse it
+    wlist = linspace(-2, 2, 5)
+    lu3 = LiouvillianLU(L, cache_size=len(wlist))
+    spectrum_ss(H, wlist, c_op_list, a.dag(), a, solver="pi", lu=lu3)
+    assert_equal(sorted(lu3._lu.keys()), [-2.0, -1.0, 1.0, 2.0])
+    factors = dict(lu3._lu)
+    S2 = spectrum_ss(H, wlist, c_op_list, a, a.dag(), solver="pi", lu=lu3)
+    assert_equal(all([lu3._lu[w] is factors[w] for w in factors]), True)
+    S_ref = spectrum_ss(H, wlist, c_op_list, a, a.dag(), solver="pi")
+    assert_equal(abs(S2 - S_ref).max() < 1e-10, True)
+    # a factorization of a different system is rejected
+    assert_raises(TypeError, correlation_ss, qeye(10), tlist, c_op_list,
+                  a.dag(), a, lu=lu)
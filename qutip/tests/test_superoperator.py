@@ -66,5 +66,30 @@ class TestMatrixVector:
             i,j = vec2mat_index(N, I)
             assert_(V[I][0] == M[i,j])
 
+
+class TestLiouvillian:
+    """
+    A test class for the assembly of Liouvillian superoperators.
+    """
+
+    def testLiouvillianSpreSpost(self):
+        """
+        Superoperator: Liouvillian agrees with spre/spost construction
+        """
+        a = tensor(destroy(4), qeye(2))
+        sm = tensor(qeye(4), sigmam())
+        H = a.dag() * a + 0.3 * (a.dag() * sm + a * sm.dag())
+        c_ops = [0.5 * a, 0.2j * sm, rand_herm(8, dims=[[4, 2], [4, 2]])]
+        L_ref = -1j * (spre(H) - spost(H))
+        for c in c_ops:
+            cdc = c.dag() * c
+            L_ref += spre(c) * spost(c.dag()) - 0.5 * spre(cdc) - 0.5 * spost(cdc)
+        L = liouvillian(H, c_ops)
+        assert_(issuper(L))
+        assert_(L.dims == L_ref.dims)
+        assert_(abs(L.full() - L_ref.full()).max() < 1e-12)
+        L = liouvillian(None, c_ops) + liouvillian(H, [])
+        assert_(abs(L.full() - L_ref.full()).max() < 1e-12)
+
 if __name__ == "__main__":
     run_module_suite()
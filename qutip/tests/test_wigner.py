@@ -17,6 +17,7 @@
 #
 ###########################################################################
 
+import numpy as np
 from numpy import linspace
 from numpy.testing import assert_, run_module_suite
 from qutip import *
@@ -146,6 +147,71 @@ def test_wigner_compare_methods_ket():
         assert_(sum(W_qutip2) * dx * dy - 1.0 < 1e-8)
 
 
+def test_wigner_clenshaw_batch():
+    "wigner: clenshaw method for a list of states against laguerre"
+    xvec = linspace(-5.0, 5.0, 60)
+    yvec = linspace(-4.0, 4.0, 50)
+    N = 20
+    states = [rand_dm(N, 0.5 + rand()/2) for k in range(3)] + \
+             [rand_ket(N), coherent(N, 1.0 - 0.5j)]
+    W = wigner(states, xvec, yvec, method='clenshaw')
+    assert_(W.shape == (5, 50, 60))
+    for k, state in enumerate(states):
+        W_lag = wigner(state, xvec, yvec, method='laguerre')
+        assert_(abs(W[k] - W_lag).max() < 1e-12)
+
+
+def test_wigner_clenshaw_mixed_sizes():
+    "wigner: clenshaw method for a list of states of different sizes"
+    xvec = linspace(-5.0, 5.0, 60)
+    yvec = linspace(-4.0, 4.0, 50)
+    states = [rand_dm(10), rand_ket(20), coherent(15, 1.0 - 0.5j)]
+    W = wigner(states, xvec, yvec, method='clenshaw')
+    assert_(W.shape == (3, 50, 60))
+    for k, state in enumerate(states):
+        W_lag = wigner(state, xvec, yvec, method='laguerre')
+        assert_(abs(W[k] - W_lag).max() < 1e-12)
+
+
+def test_wigner_clenshaw_large_fock():
+    "wigner: clenshaw method for a Fock state beyond the factorial overflow"
+    xvec = linspace(-20.0, 20.0, 801)
+    dx = xvec[1] - xvec[0]
+    N = 200
+    W = wigner(fock(N, 180), xvec, xvec, g=2)
+    assert_(abs(np.sum(W) * dx * dx - 1.0) < 1e-6)
+    assert_(abs(W[401, 401] - W[399, 399]) < 1e-12)
+
+
+def test_wigner_fft():
+    "wigner: fft method against clenshaw on uniform grids"
+    xvec = linspace(-5.0, 5.0, 101)
+    yvec = linspace(-4.0, 6.0, 81)
+    N = 15
+    for state in [rand_dm(N, 0.5 + rand()/2), rand_ket(N)]:
+        for g in [sqrt(2), 2]:
+            W1 = wigner(state, xvec, yvec, g=g)
+            W2 = wigner(state, xvec, yvec, g=g, method='fft')
+            assert_(abs(W1 - W2).max() < 1e-10)
+
+
+def test_qfunc_fft():
+    "qfunc: fft method against polyval on uniform grids"
+    xvec = linspace(-5.0, 5.0, 101)
+    yvec = linspace(-4.0, 6.0, 81)
+    N = 15
+    for state in [rand_dm(N, 0.5 + rand()/2), coherent(N, 1.0 - 0.5j)]:
+        for g in [sqrt(2), 2]:
+            Q1 = qfunc(state, xvec, yvec, g=g)
+            Q2 = qfunc(state, xvec, yvec, g=g, method='fft')
+            assert_(abs(Q1 - Q2).max() < 1e-10)
+    try:
+        qfunc(state, xvec**3, yvec, method='fft')
+        assert_(False)
+    except ValueError:
+        pass
+
+
 
 if __name__ == "__main__":
     run_module_suite()
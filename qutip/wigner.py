@@ -20,7 +20,8 @@ import numpy as np
 from scipy import zeros,array,arange,exp,real,imag,conj,copy,sqrt,meshgrid,size,polyval,fliplr,conjugate
 import scipy.sparse as sp
 import scipy.linalg as la
-from scipy.special import genlaguerre
+from scipy.fftpack import fft, ifft
+from scipy.special import eval_genlaguerre, gammaln
 from qutip.tensor import tensor
 from qutip.qobj import *
 from qutip.states import *
@@ -31,15 +32,16 @@ try:#for scipy v <= 0.90
 except:#for scipy v >= 0.10
     from scipy.misc import factorial
     
-def wigner(psi, xvec, yvec, g=sqrt(2), method='iterative',parfor=False):
+def wigner(psi, xvec, yvec, g=sqrt(2), method='clenshaw',parfor=False):
     """Wigner function for a state vector or density matrix at points 
     `xvec + i * yvec`.
     
     Parameters
     ----------
 
-    state : qobj 
-        A state vector or density matrix.
+    state : qobj / list
+        A state vector or density matrix, or a list of them that are all
+        evaluated on the same grid.
     
     xvec : array_like
         x-coordinates at which to calculate the Wigner function.
@@ -50,14 +52,18 @@ def wigner(psi, xvec, yvec, g=sqrt(2), method='iterative',parfor=False):
     g : float
         Scaling factor for `a = 0.5 * g * (x + iy)`, default `g = sqrt(2)`.
 
-    method : string {'iterative', 'laguerre'}
-        Select method 'iterative' or 'laguerre', where 'iterative' use a 
-        iterative method to evaluate the Wigner functions for density matrices
-        :math:`|m><n|`, while 'laguerre' uses the Laguerre polynomials in scipy
-        for the same task. The 'iterative' method is default, and in general
-        recommended, but the 'laguerre' method is more efficient for very sparse
-        density matrices (e.g., superpositions of Fock states in a large Hilbert
-        space).
+    method : string {'clenshaw', 'iterative', 'laguerre', 'fft'}
+        Select method 'clenshaw', 'iterative', 'laguerre' or 'fft'. The default
+        'clenshaw' method sums the Laguerre series along each diagonal of the
+        density matrix with a Clenshaw recurrence, using only a few grids of
+        memory, and evaluates a list of states in one pass. 'iterative' uses 
+        an iterative method to evaluate the Wigner functions for density 
+        matrices :math:`|m><n|`, while 'laguerre' uses the Laguerre polynomials
+        in scipy for the same task, which is efficient for very sparse density
+        matrices (e.g., superpositions of Fock states in a large Hilbert
+        space). The 'fft' method requires uniform `xvec` and `yvec`, and
+        Fourier transforms the position-space density matrix along each
+        row of the grid, which is the fastest method for large grids.
     
     parfor : bool {False, True}
         Flag for calculating the Laguerre polynomial based Wigner function 
@@ -69,7 +75,8 @@ def wigner(psi, xvec, yvec, g=sqrt(2), method='iterative',parfor=False):
 
     W : array
         Values representing the Wigner function calculated over the specified
-        range [xvec,yvec].    
+        range [xvec,yvec]. For a list of states, an array with the Wigner
+        function of each state along the first axis.
     
 
     References
@@ -80,22 +87,115 @@ def wigner(psi, xvec, yvec, g=sqrt(2), method='iterative',parfor=False):
 
     """
 
-    if not (psi.type == 'ket' or psi.type == 'oper' or psi.type == 'bra'):
+    if isinstance(psi, (list, np.ndarray)):
+        rhos = [_wigner_dm(x) for x in psi]
+    else:
+        rhos = [_wigner_dm(psi)]
+
+    if method == 'clenshaw':
+        if all([rho.shape == rhos[0].shape for rho in rhos]):
+            W = _wigner_clenshaw(rhos, xvec, yvec, g)
+        else:
+            # states of different sizes are evaluated one at a time
+            W = array([_wigner_clenshaw([rho], xvec, yvec, g)[0]
+                       for rho in rhos])
+
+    elif method == 'iterative':
+        W = array([_wigner_iterative(rho, xvec, yvec, g) for rho in rhos])
+
+    elif method == 'laguerre':
+        W = array([_wigner_laguerre(rho, xvec, yvec, g, parfor)
+                   for rho in rhos])
+
+    elif method == 'fft':
+        W = array([_wigner_fft(rho, xvec, yvec, g) for rho in rhos])
+
+    else:
+        raise TypeError("method must be either 'clenshaw', 'iterative', " +
+                        "'laguerre' or 'fft'")
+
+    if isinstance(psi, (list, np.ndarray)):
+        return W
+    else:
+        return W[0]
+
+
+def _wigner_dm(psi):
+    """
+    Private function returning the density matrix of a state for wigner.
+    """
+    if not isinstance(psi, Qobj) or \
+            not (psi.type == 'ket' or psi.type == 'oper' or psi.type == 'bra'):
         raise TypeError('Input state is not a valid operator.')
 
     if psi.type=='ket' or psi.type=='bra':
-        rho = ket2dm(psi)
+        return ket2dm(psi)
     else:
-        rho = psi
+        return psi
 
-    if method == 'iterative':
-        return _wigner_iterative(rho, xvec, yvec, g)
 
-    elif method == 'laguerre':
-        return _wigner_laguerre(rho, xvec, yvec, g,parfor)
+def _wigner_clenshaw(rhos, xvec, yvec, g=sqrt(2)):
+    """
+    Evaluate the Wigner functions of the density matrices in `rhos` as
 
-    else:
-        raise TypeError("method must be either 'iterative' or 'laguerre'")
+    .. math::
+
+        W = \\frac{g^2}{2\\pi} e^{-B/2} {\\rm Re} \\sum_{d}
+        \\frac{(2A)^d}{\\sqrt{d!}} \\sum_{m} (2 - \\delta_{d0})
+        \\rho_{m,m+d} \\tilde{L}_m^d(B),
+
+    with :math:`B = 4|A|^2` and the normalized Laguerre polynomials
+    :math:`\\tilde{L}_m^d = (-1)^m \\sqrt{m!d!/(m+d)!} L_m^d`. The outer
+    sum is a Horner scheme over the diagonals d, the inner sum a Clenshaw
+    recurrence, so only a few grids are kept per state, and the factorials
+    never appear explicitly. The factor :math:`e^{-B/2}` is taken into the
+    coefficients of the recurrence, which keeps it from overflowing far from
+    the origin.
+    """
+
+    M = prod(rhos[0].shape[0])
+    X,Y = meshgrid(xvec, yvec)
+    A2 = g * (X + 1.0j * Y)
+    B = abs(A2)**2
+    scale = exp(-0.5 * B)
+
+    rho = array([r.full() for r in rhos], dtype=complex)
+    W = zeros((len(rhos),) + np.shape(A2), dtype=complex)
+    for d in range(M-1, -1, -1):
+        c = rho[:, arange(M-d), arange(M-d)+d]
+        if d < M-1:
+            W *= A2 / sqrt(d+1)
+        if d > 0:
+            c = 2 * c
+        if np.any(c):
+            W += _wig_laguerre_sum(d, B, c, scale)
+
+    return real(W) * 0.5 * g**2 / pi
+
+
+def _wig_laguerre_sum(d, x, c, scale):
+    """
+    Private function that evaluates :math:`s \\sum_m c_m \\tilde{L}_m^d(x)`,
+    with the grid `scale` s, for each row of `c` with the Clenshaw recurrence
+    of the normalized Laguerre polynomials,
+
+    .. math::
+
+        \\tilde{L}_{k+1} = -\\frac{(2k+1+d-x) \\tilde{L}_k +
+        \\sqrt{k(k+d)} \\tilde{L}_{k-1}}{\\sqrt{(k+1)(k+1+d)}}.
+    """
+    n = c.shape[1]
+    y1 = zeros((c.shape[0],) + np.shape(x), dtype=complex)
+    y2 = zeros((c.shape[0],) + np.shape(x), dtype=complex)
+    for k in range(n-1, -1, -1):
+        a_k = (x - (2*k + 1 + d)) / sqrt((k + 1.0) * (k + 1 + d))
+        b_k1 = -sqrt((k + 1.0) * (k + 1 + d) / ((k + 2.0) * (k + 2 + d)))
+        # y_k = c_k + a_k y_{k+1} + b_{k+1} y_{k+2}, in place of y_{k+2}
+        y2 *= b_k1
+        y2 += a_k * y1
+        y2 += c[:, k, np.newaxis, np.newaxis] * scale
+        y1, y2 = y2, y1
+    return y1
 
 
 def _wigner_iterative(rho, xvec, yvec, g=sqrt(2)):
@@ -170,21 +270,21 @@ def _wigner_laguerre(rho, xvec, yvec, g, parallel):
                     n = rho.data.indices[jj]
 
                     if m == n:
-                        W += real(rho[m,m] * (-1)**m * genlaguerre(m,0)(B))
+                        W += real(rho[m,m] * (-1)**m * eval_genlaguerre(m,0,B))
 
                     elif n > m:
                         W += 2.0 * real(rho[m,n] * (-1)**m * (2*A)**(n-m) * \
-                             sqrt(factorial(m)/factorial(n)) * genlaguerre(m,n-m)(B))
+                             exp(0.5*(gammaln(m+1)-gammaln(n+1))) * eval_genlaguerre(m,n-m,B))
     else:
         # for dense density matrices
         B = 4*abs(A)**2
         for m in range(M):
             if abs(rho[m,m]) > 0.0:
-                W += real(rho[m,m] * (-1)**m * genlaguerre(m,0)(B))
+                W += real(rho[m,m] * (-1)**m * eval_genlaguerre(m,0,B))
             for n in range(m+1,M):
                 if abs(rho[m,n]) > 0.0:
                     W += 2.0 * real(rho[m,n] * (-1)**m * (2*A)**(n-m) * \
-                         sqrt(factorial(m)/factorial(n)) * genlaguerre(m,n-m)(B))
+                         exp(0.5*(gammaln(m+1)-gammaln(n+1))) * eval_genlaguerre(m,n-m,B))
 
     return 0.5 * W * g**2 * np.exp(-B/2) / pi            
 
@@ -199,18 +299,71 @@ def _par_wig_eval(args):
         n = rho.data.indices[jj]
 
         if m == n:
-            W1 += real(rho[m,m] * (-1)**m * genlaguerre(m,0)(B))
+            W1 += real(rho[m,m] * (-1)**m * eval_genlaguerre(m,0,B))
 
         elif n > m:
             W1 += 2.0 * real(rho[m,n] * (-1)**m * (2*A)**(n-m) * \
-                 sqrt(factorial(m)/factorial(n)) * genlaguerre(m,n-m)(B))
+                 exp(0.5*(gammaln(m+1)-gammaln(n+1))) * eval_genlaguerre(m,n-m,B))
     return W1
+
+
+def _wigner_fft(rho, xvec, yvec, g=sqrt(2)):
+    """
+    Evaluate the Wigner function on a uniform grid from the position-space
+    density matrix,
+
+    .. math::
+
+        W(q,p) = \\frac{1}{\\pi} \\int \\rho(q+y,q-y) e^{-2ipy} dy,
+
+    in units where :math:`a = (q+ip)/\\sqrt{2}`. The points q+y and q-y lie on
+    one position lattice, where the singular vectors of rho are evaluated once,
+    and the integral over y is a chirp-z transform (three FFTs) per row that
+    lands exactly on `yvec`.
+    """
+    q, p = _phase_space_grid(xvec, yvec, g)
+    N = prod(rho.shape[0])
+    q_lim = p_lim = sqrt(2.0 * N + 1) + 6
+    nq, np_ = len(q), len(p)
+
+    # y must be sampled finely enough that the images of W at p + n*pi/dy
+    # fall outside of the momenta asked for
+    dy_max = pi / (p_lim + abs(p).max())
+    dq = q[1] - q[0] if nq > 1 else 2 * dy_max
+    if dq / 2 <= dy_max:
+        s, t = 1, int(dy_max // (dq / 2))
+    else:
+        s, t = int(np.ceil(dq / 2 / dy_max)), 1
+    h = dq / (2 * s)
+    dy = t * h
+    # both |q+y| and |q-y| are below q_lim where the integrand is nonzero
+    J = int(np.ceil(q_lim / dy))
+
+    # position lattice z_m = q_0 + (m - m0) h, with q_i +/- y_j = z_(m0 + 2si +/- tj)
+    m0 = t * J
+    z = q[0] + (arange(2 * m0 + 2 * s * (nq - 1) + 1) - m0) * h
+    U, S, V = _svd_functions(rho, z, q_lim)
+
+    j = arange(-J, J + 1)
+    i_plus = m0 + 2 * s * arange(nq)[:, np.newaxis] + t * j
+    i_minus = m0 + 2 * s * arange(nq)[:, np.newaxis] - t * j
+    f = zeros((nq, len(j)), dtype=complex)
+    for k in range(len(S)):
+        f += S[k] * U[i_plus, k] * conj(V[i_minus, k])
+
+    # sum_j f_j exp(-2i p_k y_j), with y_j = (j' - J) dy and p_k = p_0 + k dp
+    dp = p[1] - p[0] if np_ > 1 else 0.0
+    jj = arange(len(j))
+    f *= exp(-2.0j * p[0] * jj * dy)
+    W = _czt(f, np_, 2 * dp * dy) * exp(2.0j * p * J * dy)
+
+    return 0.5 * g**2 * real(W.T) * dy / pi
     
 
 #-------------------------------------------------------------------------------
 # Q FUNCTION
 #
-def qfunc(state, xvec, yvec, g=sqrt(2)):
+def qfunc(state, xvec, yvec, g=sqrt(2), method='polyval'):
     """Q-function of a given state vector or density matrix 
     at points `xvec + i * yvec`.
     
@@ -227,6 +380,13 @@ def qfunc(state, xvec, yvec, g=sqrt(2)):
         
     g : float
         Scaling factor for `a = 0.5 * g * (x + iy)`, default `g = sqrt(2)`.
+
+    method : string {'polyval', 'fft'}
+        Select method 'polyval', which evaluates the overlaps with coherent 
+        states as polynomials at every grid point, or 'fft', which requires
+        uniform `xvec` and `yvec` and computes them as Gaussian-windowed
+        Fourier transforms of the position-space state, one per row of the
+        grid.
     
     Returns
     --------
@@ -235,6 +395,13 @@ def qfunc(state, xvec, yvec, g=sqrt(2)):
         [xvec,yvec].
     
     """
+    if method == 'fft':
+        if not (isket(state) or isoper(state)):
+            raise TypeError('Invalid state operand to qfunc.')
+        return _qfunc_fft(state, xvec, yvec, g)
+    elif method != 'polyval':
+        raise TypeError("method must be either 'polyval' or 'fft'")
+
     X,Y = meshgrid(xvec, yvec)
     amat = 0.5*g*(X + Y * 1j);
 
@@ -285,6 +452,122 @@ def _qfunc_pure(psi, alpha_mat):
     return qmat1
 
 
+def _qfunc_fft(state, xvec, yvec, g=sqrt(2)):
+    """
+    Evaluate the Q-function on a uniform grid from the overlaps with coherent
+    states in position space,
+
+    .. math::
+
+        <\\alpha|\\psi> \\propto \\int e^{-(a-q)^2/2} e^{-ipa} \\psi(a) da,
+
+    which for each q is a Fourier transform of the state times a Gaussian
+    window, evaluated on `yvec` with a chirp-z transform (three FFTs).
+    """
+    q, p = _phase_space_grid(xvec, yvec, g)
+    N = prod(state.shape[0])
+    q_lim = p_lim = sqrt(2.0 * N + 1) + 6
+    nq, np_ = len(q), len(p)
+
+    # sampling of the windowed state, such that its images at p + n*2pi/h
+    # fall outside of the momenta asked for
+    h = 2 * pi / (p_lim + 6 + abs(p).max())
+    a = arange(-np.ceil(q_lim / h), np.ceil(q_lim / h) + 1) * h
+    U, S, V = _svd_functions(state, a, q_lim)
+
+    window = exp(-0.5 * (a[np.newaxis, :] - q[:, np.newaxis])**2) * \
+        exp(-1.0j * p[0] * (a - a[0]))
+    dp = p[1] - p[0] if np_ > 1 else 0.0
+    Q = zeros((nq, np_))
+    for k in range(len(S)):
+        Bu = _czt(window * U[:, k], np_, dp * h)
+        if V is U:
+            Q += S[k] * abs(Bu)**2
+        else:
+            Bv = _czt(window * V[:, k], np_, dp * h)
+            Q += real(S[k] * Bu * conj(Bv))
+
+    # |<alpha|psi>|^2 / (2 pi) per unit area in (q, p)
+    return 0.5 * g**2 * Q.T * h**2 / (2 * pi**1.5)
+
+
+#-------------------------------------------------------------------------------
+# FFT METHODS
+#
+def _phase_space_grid(xvec, yvec, g):
+    """
+    Private function returning the uniform grids `xvec` and `yvec` as position
+    and momentum, in units where :math:`a = (q+ip)/\\sqrt{2}`.
+    """
+    q = np.asarray(xvec, dtype=float).ravel() * g / sqrt(2)
+    p = np.asarray(yvec, dtype=float).ravel() * g / sqrt(2)
+    for v in [q, p]:
+        if len(v) > 1 and not (v[1] > v[0] and
+                np.allclose(np.diff(v), v[1] - v[0], rtol=1e-6, atol=0)):
+            raise ValueError('The fft method requires uniform, increasing ' +
+                             'xvec and yvec.')
+    return q, p
+
 
+def _hermite_functions(N, z):
+    """
+    Private function returning the harmonic oscillator eigenfunctions
+    :math:`<z|n>`, n = 0, ..., N-1, as the rows of an array, from the stable
+    recurrence of the normalized Hermite functions.
+    """
+    psi = zeros((N, len(z)))
+    psi[0] = exp(-0.5 * z**2) / pi**0.25
+    if N > 1:
+        psi[1] = sqrt(2.0) * z * psi[0]
+    for n in range(2, N):
+        psi[n] = sqrt(2.0 / n) * z * psi[n-1] - sqrt((n - 1.0) / n) * psi[n-2]
+    return psi
 
 
+def _svd_functions(rho, z, q_lim):
+    """
+    Private function that writes the density matrix in position space as
+    :math:`\\rho(a,b) = \\sum_k s_k u_k(a) v_k^*(b)` from its singular value
+    decomposition, returning u_k and v_k at the points z as columns of arrays,
+    and s_k. For a Hermitian rho the same array is returned for u and v, and
+    a ket is used as its own single vector.
+    """
+    z = np.asarray(z)
+    inside = abs(z) <= q_lim
+    psi = _hermite_functions(prod(rho.shape[0]), z[inside])
+    if isket(rho):
+        u, S = rho.full(), np.array([1.0])
+        v = u
+    elif rho.isherm:
+        S, u = la.eigh(rho.full())
+        v = u
+    else:
+        u, S, vh = la.svd(rho.full())
+        v = vh.conj().T
+    keep = abs(S) > 1e-14 * abs(S).max()
+    S = S[keep]
+    U = zeros((len(z), len(S)), dtype=complex)
+    U[inside] = np.dot(psi.T, u[:, keep])
+    if v is u:
+        return U, S, U
+    V = zeros((len(z), len(S)), dtype=complex)
+    V[inside] = np.dot(psi.T, v[:, keep])
+    return U, S, V
+
+
+def _czt(f, M, theta):
+    """
+    Private function evaluating :math:`\\sum_j f_j e^{-i\\theta jk}`,
+    k = 0, ..., M-1, along the last axis of f with the chirp-z transform of
+    Bluestein, i.e. as a convolution computed with FFTs.
+    """
+    L = f.shape[-1]
+    P = int(2**np.ceil(np.log2(L + M - 1)))
+    j = arange(L)
+    k = arange(M)
+    a = f * exp(-0.5j * theta * j**2)
+    b = zeros(P, dtype=complex)
+    b[:M] = exp(0.5j * theta * k**2)
+    b[P-L+1:] = exp(0.5j * theta * arange(-(L-1), 0)**2)
+    X = ifft(fft(a, P, axis=-1) * fft(b), axis=-1)[..., :M]
+    return X * exp(-0.5j * theta * k**2)